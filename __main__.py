@@ -1,58 +1,52 @@
 import logging
 import sys
-from logging import FileHandler, Formatter, Logger, StreamHandler
+from logging import Logger
+from logging.handlers import QueueListener
 from typing import Optional
 
-import discord
-import router
-
-import core
-import providers.clientArchive
+import loggingPipeline
 from core import Core
-
-root: Logger = logging.getLogger()
-
-formatter: Formatter = Formatter('[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
-# formatter: Formatter = Formatter('[%(asctime)s] [%(pathname)s:%(lineno)d] [%(name)s] [%(levelname)s] %(message)s')
-# formatter: Formatter = Formatter('[%(asctime)s] [%(levelname)s] %(message)s', '%Y-%m-%d %H:%M:%S')
-
-stdoutHandler: StreamHandler = StreamHandler(sys.stdout)
-stdoutHandler.setFormatter(formatter)
-stdoutHandler.setLevel(logging.INFO)
-root.addHandler(stdoutHandler)
-
-fileHandler: FileHandler = FileHandler("./.log", encoding="utf-8")
-fileHandler.setFormatter(formatter)
-fileHandler.setLevel(logging.DEBUG)
-root.addHandler(fileHandler)
-
-logging.addLevelName(logging.DEBUG, "DBG")
-logging.addLevelName(logging.INFO, "INF")
-logging.addLevelName(logging.WARN, "WRN")
-logging.addLevelName(logging.ERROR, "ERR")
-logging.addLevelName(logging.FATAL, "FTL")
-
-logging.getLogger().setLevel(logging.DEBUG)
-logging.getLogger(discord.__name__).setLevel(logging.WARNING)
-logging.getLogger(core.__name__).setLevel(logging.DEBUG)
-logging.getLogger(providers.clientArchive.__name__).setLevel(logging.DEBUG)
-logging.getLogger(router.__name__).setLevel(logging.INFO)
-logging.getLogger(router.packaging.__name__).setLevel(logging.INFO)
-logging.getLogger(router.packaging.__name__).setLevel(logging.INFO)
-logging.getLogger(router.packaging.__name__).setLevel(logging.INFO)
+from settings import Settings
+from sharding import ShardedCore, ShardSupervisor
+from shardInfo import ShardInfo
 
 log: Logger = logging.getLogger(__name__)
 
-try:
-    client = Core()
-    token: Optional[str] = client._settings.client.token.current
-    if not token: raise ValueError('No token was found in the configuration!')
-    client.loop.run_until_complete(client.start(token))
-except KeyboardInterrupt:
-    client.loop.run_until_complete(client.close())
-except Exception as error:
-    log.error(error)
-    client.loop.run_until_complete(client.close())
-finally:
-    client.loop.close()
-    sys.exit(input('Press enter to exit...'))
+# shard processes are spawned, so they re-import this module and must not start a client
+if __name__ == '__main__':
+
+    settings: Settings = Settings()
+
+    listener: QueueListener = loggingPipeline.configure(settings.client.logging)
+
+    shard_count: Optional[int] = settings.client.sharding.count
+
+    # spread the shards across processes, each running its own client
+    if shard_count and settings.client.sharding.processes > 1:
+        supervisor: ShardSupervisor = ShardSupervisor(
+            settings.directory,
+            shard_count=shard_count,
+            processes=settings.client.sharding.processes,
+            delay=settings.client.sharding.restart_delay,
+            max_delay=settings.client.sharding.max_restart_delay,
+        )
+        try:
+            supervisor.run()
+        finally:
+            listener.stop()
+        sys.exit(0)
+
+    try:
+        client = ShardedCore(settings, shard=ShardInfo(0, 1, list(range(shard_count)), shard_count)) if shard_count else Core(settings)
+        token: Optional[str] = client._settings.client.token.current
+        if not token: raise ValueError('No token was found in the configuration!')
+        client.loop.run_until_complete(client.start(token))
+    except KeyboardInterrupt:
+        client.loop.run_until_complete(client.close())
+    except Exception as error:
+        log.error(error)
+        client.loop.run_until_complete(client.close())
+    finally:
+        client.loop.close()
+        listener.stop()
+        sys.exit(input('Press enter to exit...'))
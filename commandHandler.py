@@ -1,33 +1,64 @@
+import asyncio
 import logging
 import re
-import textwrap
+import time
 import traceback
 from datetime import datetime, timezone
 from logging import Logger
-from re import Match
-from typing import Any, List, Literal, Optional
+from asyncio import Task
+from typing import Any, Dict, List, Optional, Tuple
 
 from discord import Embed, Message
 from router import Handler, HandlerError
 
+import metrics
+from commandIndex import CommandIndex
 from context import Context
+from dispatch import Dispatcher, Invocation
+from loader import ComponentLoader, LazyCommand
+from metrics import Counter, Histogram
 from rateLimiter import RateLimiter
+from typingIndicator import DeferredTyping
 
 log: Logger = logging.getLogger(__name__)
 
-MAX_MESSAGE_SIZE: Literal[2000] = 2000
-"""
-The maximum amount of characters
-permitted in a Discord message
-"""
+COMMAND_LATENCY: Histogram = metrics.histogram('command_duration_seconds', 'Time taken to run a command, including failures', ('command',))
+COMMAND_ERRORS: Counter = metrics.counter('command_errors_total', 'Commands that raised an error', ('command',))
+
 
 
 class CommandHandler(Handler):
 
     def __init__(self, parameter_prefix: str = '-'):
         self._limiter: Optional[RateLimiter] = None
+        self._dispatcher: Dispatcher = Dispatcher()
+        self._typing: DeferredTyping = DeferredTyping()
+        self._loader: Optional[ComponentLoader] = None
+        self._index: CommandIndex = CommandIndex()
+        self._running: Dict[Task, Tuple[Invocation, Context]] = dict()
         super().__init__(parameter_prefix)
 
+    @property
+    def running(self) -> Dict[Task, Tuple[Invocation, Context]]:
+        """
+        The commands currently being run, keyed by the task running them.
+        """
+        return self._running
+
+    @property
+    def index(self) -> CommandIndex:
+        """
+        The names, signatures and docs of the loaded commands.
+        """
+        return self._index
+
+    @property
+    def packages(self) -> Dict[str, Any]:
+        """
+        The packages loaded by the router and by the component loader.
+        """
+        return {**self._packages, **self._loader.packages} if self._loader else self._packages
+
     def __build_error_message__(self, error: Exception) -> Embed:
         embed: Embed = Embed()
 
@@ -42,35 +73,69 @@ class CommandHandler(Handler):
     def addLimiter(self, limiter: RateLimiter) -> None:
         self._limiter = limiter
 
-    async def handle(self, prefix: str, message: Message, *, context: Context):
+    def load(self, *args, **kwargs) -> Any:
+        result: Any = super().load(*args, **kwargs)
+        # rebuild the command lookup and index from the loaded packages
+        self._dispatcher.index(self.packages)
+        self._index.rebuild(self.packages)
+        return result
+
+    def attach(self, loader: ComponentLoader) -> None:
+        """
+        Dispatches commands to the components registered by the loader.
+        """
+        self._loader = loader
+        self._dispatcher.index(self.packages)
+        self._index.rebuild(self.packages)
+
+    def resolve(self, prefix: str, content: str) -> Optional[Invocation]:
+        """
+        Resolves the command invocation in the message content.
+        Returns None for messages that are not commands.
+        """
+        return self._dispatcher.resolve(prefix, content)
+
+    async def handle(self, invocation: Invocation, message: Message, *, context: Context):
 
+        # register the command with the task running it
+        task: Optional[Task] = asyncio.current_task()
+        if task: self._running[task] = (invocation, context)
+        # label unknown commands together to bound the number of series
+        label: str = invocation.name if invocation.command else '<unknown>'
+        start: float = time.perf_counter()
         try:
             # create args list from context instance
             args: List[Any] = [context]
-            # get command from message
-            command_match: Optional[Match[Any]] = re.match(rf"^{prefix}[\w]+", message.content)
-            # if the prefixed command could not be found at the beginning of the message
-            if not command_match: raise MissingPrefixError()
-            # remove prefix from message content
-            command_message: str = re.sub(rf"^{prefix}", "", message.content)
-        except MissingPrefixError:
-            raise
-        except Exception as error:
-            raise MessageParseError(error)
-            
-        try:
             # ratelimit check the message if available
             if self._limiter: self._limiter.check(message)
-            # trigger typing indicator
-            await context.message.channel.trigger_typing()
-            # call super to finish processing the message
-            await super().process(command_message, args=args)
+            # if no loaded command has the invoked name
+            if not invocation.command: raise UnknownCommandError(invocation.name, self._index.suggest(invocation.name))
+            # get the delay before showing a typing indicator
+            delay: float = context.settings.for_guild(message.guild).ux.typing_delay if message.guild else 0.0
+            # show a typing indicator only if the command outlives the delay
+            async with self._typing.typing(context.message.channel, delay):
+                _, _, command = invocation.command
+                # invoke commands registered by the component loader directly
+                if isinstance(command, LazyCommand): await command.invoke(invocation.message, context)
+                # call super to finish processing the message
+                else: await super().process(invocation.message, args=args)
         except CommandSyntaxError as error:
-            error.set_prefixes(prefix, self._parameter_prefix)
+            COMMAND_ERRORS.inc(command=label)
+            error.set_prefixes(invocation.prefix, self._parameter_prefix)
+            # suggest the parameters closest to the ones that were given
+            given: List[str] = re.findall(rf'(?:^|\s){re.escape(self._parameter_prefix)}(\w+)', invocation.message)
+            suggestions: List[str] = self._index.suggest_parameters(invocation.name, given)
+            if suggestions: error.set_suggestions(suggestions)
+            embed: Embed = self.__build_error_message__(error)
+            embed.set_author(name=context.client.user.name, icon_url=str(context.client.user.avatar_url))
+            await message.reply(embed=embed)
+        except UnknownCommandError as error:
+            COMMAND_ERRORS.inc(command=label)
             embed: Embed = self.__build_error_message__(error)
             embed.set_author(name=context.client.user.name, icon_url=str(context.client.user.avatar_url))
             await message.reply(embed=embed)
         except Exception as error:
+            COMMAND_ERRORS.inc(command=label)
             log.error(error)
             log.error(''.join(traceback.format_tb(error.__traceback__)))
 
@@ -80,6 +145,9 @@ class CommandHandler(Handler):
 
             if context.message.guild and context.settings.for_guild(context.message.guild).ux.verbose:
                 await self.__print_traceback__(context, error)
+        finally:
+            COMMAND_LATENCY.observe(time.perf_counter() - start, command=label)
+            if task: self._running.pop(task, None)
 
     async def __print_traceback__(self, context: Context, error: Exception) -> None:
         """
@@ -88,18 +156,8 @@ class CommandHandler(Handler):
         """
         # assemble the trace
         trace: str = ''.join(traceback.format_tb(error.__traceback__))
-        # define the block tag for code block messages
-        block_tag: str = '```'
-        # calculate the max characters that can be inserted into each message's code block
-        max_characters: int = MAX_MESSAGE_SIZE - (2 * len(block_tag))
-        # break the response into string segments with length equivalent to the maximum character limit
-        segments: List[str] = textwrap.wrap(trace, max_characters, break_long_words=False, replace_whitespace=False)
-        # set the initial message reference to the original message
-        message: Message = context.message
-        # for each segment# for each segment
-        for segment in segments:
-            # send the message and set the message reference to the sent message
-            message = await message.reply(f'{block_tag}\n{segment}\n{block_tag}')
+        # pack the trace into code blocks and send them as chained replies
+        await context.client.outbox.reply(context.message, trace, block=True)
 
 
 class MissingPrefixError(HandlerError):
@@ -112,6 +170,12 @@ class MessageParseError(HandlerError):
         message: str = f'An error occurred while parsing the message: {str(exception) if exception else "No info provided"}'
         super().__init__(message, exception)
 
+class UnknownCommandError(HandlerError):
+    def __init__(self, command_name: str, suggestions: Optional[List[str]] = None, exception: Optional[Exception] = None):
+        message: str = f'No command named \'{command_name}\' was found.'
+        if suggestions: message = f'{message} Did you mean: {", ".join(suggestions)}?'
+        super().__init__(message, exception)
+
 class CommandSyntaxError(HandlerError, SyntaxError):
     def __init__(self, command_name: str, suggested_parameters: List[str], exception: Optional[Exception] = None):
         self._command_prefix: str = "<command prefix>"
@@ -123,11 +187,15 @@ class CommandSyntaxError(HandlerError, SyntaxError):
         message: str = 'Could not parse provided parameters.'
         super().__init__(message, exception)
 
-    def set_prefixes(self, command_prefix: str, parameter_prefix: str) -> None:
+    def set_prefixes(self, command_prefix: str, parameter_prefix: str) -> 'CommandSyntaxError':
         self._command_prefix = command_prefix
         self._parameter_prefix = parameter_prefix
         return self
 
+    def set_suggestions(self, suggested_parameters: List[str]) -> 'CommandSyntaxError':
+        self._suggested_parameters = suggested_parameters
+        return self
+
     def __str__(self) -> str:
         lines: List[str] = [self._message, 'Did you mean:']
         for suggested_parameter in self._suggested_parameters:
@@ -0,0 +1,230 @@
+"""
+An index of the loaded packages, components and commands, built when components are loaded.
+
+The index maps names to entries holding each command's package, component, parameters and
+cleaned documentation, so help is a dictionary lookup rather than a walk of every package.
+It also keeps a trigram index of command names for "did you mean" suggestions, and ranks
+a command's parameter names by the same trigram similarity. Signatures are read from each package's source with the component scanner,
+so commands loaded by the router and by the component loader are indexed the same way.
+
+Rebuilding is incremental: packages whose objects are unchanged since the last build keep
+their entries, and only added, replaced or removed packages are indexed again.
+"""
+
+import inspect
+import logging
+from logging import Logger
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loader import CommandSignature, ComponentScanner, ModuleSignature
+
+log: Logger = logging.getLogger(__name__)
+
+SIMILARITY: float = 0.25
+"""The trigram similarity a name needs to be suggested"""
+
+
+class ParameterEntry():
+    """
+    A parameter of an indexed command.
+    """
+
+    def __init__(self, name: str, annotation: Optional[str], required: bool) -> None:
+        self.name: str = name
+        self.annotation: Optional[str] = annotation
+        self.required: bool = required
+
+
+class CommandEntry():
+    """
+    An indexed command.
+    """
+
+    def __init__(self, name: str, package: str, component: str, doc: Optional[str], parameters: List[ParameterEntry]) -> None:
+        self.name: str = name
+        self.package: str = package
+        self.component: str = component
+        self.doc: Optional[str] = doc
+        self.parameters: Dict[str, ParameterEntry] = {parameter.name: parameter for parameter in parameters}
+
+
+class ComponentEntry():
+    """
+    An indexed component and its commands.
+    """
+
+    def __init__(self, name: str, package: str, doc: Optional[str], commands: List[CommandEntry]) -> None:
+        self.name: str = name
+        self.package: str = package
+        self.doc: Optional[str] = doc
+        self.commands: List[CommandEntry] = commands
+
+
+class PackageEntry():
+    """
+    An indexed package and its components.
+    """
+
+    def __init__(self, name: str, doc: Optional[str], components: List[ComponentEntry], source: Any) -> None:
+        self.name: str = name
+        self.doc: Optional[str] = doc
+        self.components: List[ComponentEntry] = components
+        # the package object the entry was built from, to detect reloads
+        self.source: Any = source
+
+
+class CommandIndex():
+    """
+    Name lookups and fuzzy suggestions for the loaded commands.
+    """
+
+    def __init__(self) -> None:
+        self._scanner: ComponentScanner = ComponentScanner()
+        # the indexed packages, keyed by package key
+        self._packages: Dict[str, PackageEntry] = dict()
+        # the packages, keyed by the name shown in help
+        self._package_names: Dict[str, PackageEntry] = dict()
+        # the components, keyed by component name; names may be shared across packages
+        self._components: Dict[str, List[ComponentEntry]] = dict()
+        # the commands, keyed by command name
+        self._commands: Dict[str, CommandEntry] = dict()
+        # the command names containing each trigram
+        self._trigrams: Dict[str, Set[str]] = dict()
+
+    @property
+    def commands(self) -> Dict[str, CommandEntry]:
+        return self._commands
+
+    @property
+    def packages(self) -> List[PackageEntry]:
+        return list(self._packages.values())
+
+    def package(self, name: str) -> Optional[PackageEntry]:
+        """
+        Returns the package with the key or the name shown in help.
+        """
+        return self._packages.get(name) or self._package_names.get(name)
+
+    def components(self, name: str, *, package: Optional[str] = None) -> List[ComponentEntry]:
+        """
+        Returns the components with the name, optionally only those in the named package.
+        """
+        components: List[ComponentEntry] = self._components.get(name, [])
+        if not package: return list(components)
+        selected: Optional[PackageEntry] = self.package(package)
+        return [component for component in components if selected and component.package == selected.name]
+
+    def command(self, name: str) -> Optional[CommandEntry]:
+        return self._commands.get(name)
+
+    def rebuild(self, packages: Dict[str, Any]) -> None:
+        """
+        Updates the index to match the loaded packages, indexing only packages that changed.
+        """
+        changed: bool = False
+        # remove packages that were unloaded or replaced
+        for key in list(self._packages):
+            if packages.get(key) is not self._packages[key].source:
+                del self._packages[key]
+                changed = True
+        # index packages that were added or replaced
+        for key, package in packages.items():
+            if key in self._packages: continue
+            self._packages[key] = self.__index_package__(package)
+            changed = True
+        if changed: self.__rebuild_lookups__()
+
+    def suggest(self, name: str, *, limit: int = 3) -> List[str]:
+        """
+        Returns the command names most similar to the name.
+        """
+        # only names sharing a trigram can be similar
+        candidates: Set[str] = set()
+        for trigram in _trigrams(name): candidates.update(self._trigrams.get(trigram, ()))
+        return _rank(name, candidates, limit)
+
+    def suggest_parameters(self, command: str, names: Iterable[str], *, limit: int = 3) -> List[str]:
+        """
+        Returns the command's parameter names most similar to the given names,
+        or every parameter if none are similar.
+        """
+        entry: Optional[CommandEntry] = self._commands.get(command)
+        if not entry: return []
+        suggestions: List[str] = list()
+        for name in names:
+            if name in entry.parameters: continue
+            for suggestion in _rank(name, entry.parameters.keys(), limit):
+                if suggestion not in suggestions: suggestions.append(suggestion)
+        return suggestions if suggestions else list(entry.parameters)
+
+    def __index_package__(self, package: Any) -> PackageEntry:
+        """
+        Indexes a package from its source.
+        """
+        reference: Path = Path(package._reference)
+        # read the signatures of the package's commands from its source
+        signatures: Dict[Tuple[str, str], CommandSignature] = dict()
+        try:
+            module: ModuleSignature = self._scanner.scan_module(reference)
+            signatures = {(component.name, command.name): command for component in module.components for command in component.commands}
+        except (OSError, SyntaxError) as error:
+            log.warning('Could not read the signatures in %s: %s', reference.name, error)
+
+        name: str = reference.name
+        components: List[ComponentEntry] = list()
+        for component in package.values():
+            commands: List[CommandEntry] = list()
+            for command in component.values():
+                signature: Optional[CommandSignature] = signatures.get((component.name, command.name))
+                parameters: List[ParameterEntry] = [ParameterEntry(parameter.name, parameter.annotation, parameter.required) for parameter in signature.parameters] if signature else []
+                commands.append(CommandEntry(command.name, name, component.name, _clean(command.doc), parameters))
+            components.append(ComponentEntry(component.name, name, _clean(component.doc), commands))
+        return PackageEntry(name, _clean(package.doc), components, package)
+
+    def __rebuild_lookups__(self) -> None:
+        """
+        Rebuilds the name lookups from the indexed packages.
+        """
+        package_names: Dict[str, PackageEntry] = dict()
+        components: Dict[str, List[ComponentEntry]] = dict()
+        commands: Dict[str, CommandEntry] = dict()
+        trigrams: Dict[str, Set[str]] = dict()
+        for package in self._packages.values():
+            package_names[package.name] = package
+            for component in package.components:
+                components.setdefault(component.name, []).append(component)
+                for command in component.commands:
+                    commands[command.name] = command
+                    for trigram in _trigrams(command.name): trigrams.setdefault(trigram, set()).add(command.name)
+        self._package_names = package_names
+        self._components = components
+        self._commands = commands
+        self._trigrams = trigrams
+        log.debug('Indexed %d commands in %d packages', len(commands), len(package_names))
+
+
+def _clean(doc: Optional[str]) -> Optional[str]:
+    return inspect.cleandoc(doc) if doc else None
+
+
+def _trigrams(name: str) -> Set[str]:
+    """
+    Returns the trigrams of a name, padded so short names and word boundaries count.
+    """
+    padded: str = f'  {name.lower()} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def _rank(name: str, candidates: Iterable[str], limit: int) -> List[str]:
+    """
+    Returns the candidates most similar to the name by trigram Jaccard similarity.
+    """
+    trigrams: Set[str] = _trigrams(name)
+    scores: List[Tuple[float, str]] = list()
+    for candidate in candidates:
+        candidate_trigrams: Set[str] = _trigrams(candidate)
+        score: float = len(trigrams & candidate_trigrams) / len(trigrams | candidate_trigrams)
+        if score >= SIMILARITY: scores.append((score, candidate))
+    scores.sort(key=lambda pair: (-pair[0], pair[1]))
+    return [candidate for _, candidate in scores[:limit]]
@@ -17,11 +17,14 @@ import pandas
 import youtube_dl
 from commandHandler import CommandSyntaxError
 from context import Context
+from executors import Executors
 from discord import (Activity, ClientException, Guild, Member, StageChannel, Streaming,
                      TextChannel, User, VoiceChannel, VoiceClient, VoiceState)
 from discord.player import AudioSource
 from router.configuration import Section
 from database.database import Database
+from scheduler import EXTERNAL, cost
+from singleflight import SingleFlight
 from settings.settings import Settings
 
 from components.models.audio import AudioRequest, Metadata
@@ -61,26 +64,61 @@ class Audio():
         self._playback_queue: Queue = Queue()
         self._vclient: Optional[VoiceClient] = None
         self._current: Optional[Metadata] = None
+        self._resolutions: SingleFlight = SingleFlight('audio_resolve')
 
         try:
             self._client: discord.Client = kwargs['client']
             self._settings: Settings = kwargs['settings']
+            self._executors: Executors = kwargs['executors']
         except KeyError as error:
             raise AudioError(f'Key {error} was not found in provided kwargs', error)
 
         self.__setup__()
 
-        task: Task[NoReturn] = asyncio.create_task(self.__start__())
+        self._task: Task[NoReturn] = asyncio.create_task(self.__start__())
 
 
     def __setup__(self) -> None:
         # create database instance
-        self._database: Database = Database(Path('./archive/audio.db'))
+        self._database: Database = Database(self._client.scope(Path('./archive/audio.db')))
         # create a config section for Audio
         self._settings.client['Audio'] = Section('Audio', self._settings.client._parser, self._settings.client._reference)
         # create reference to Audio config section
         self._config: Section = self._settings.client['Audio']
 
+    def __export_state__(self) -> Dict[str, Any]:
+        """
+        Returns the playback state to hand to a reloaded instance.
+        This is used internally and should not be called as a command.
+        """
+        return {
+            'connection': self._connection,
+            'playback_event': self._playback_event,
+            'playback_queue': self._playback_queue,
+            'vclient': self._vclient,
+            'current': self._current,
+        }
+
+    def __import_state__(self, state: Dict[str, Any]) -> None:
+        """
+        Takes over the playback state of the instance this one replaces.
+        Called before the playback loop first runs, so the loop waits on the inherited events.
+        This is used internally and should not be called as a command.
+        """
+        self._connection = state['connection']
+        # the track playing during the reload sets this event through the old instance's callback
+        self._playback_event = state['playback_event']
+        self._playback_queue = state['playback_queue']
+        self._vclient = state['vclient']
+        self._current = state['current']
+
+    def __unload__(self) -> None:
+        """
+        Stops the playback loop of a replaced instance.
+        This is used internally and should not be called as a command.
+        """
+        self._task.cancel()
+
     def __on_complete__(self, error: Optional[Exception]):
         """
         Called when a source completes in the audio loop.
@@ -126,6 +164,10 @@ class Audio():
                     # restart the loop
                     continue
 
+                # finish the track started before a reload
+                if self._vclient.is_playing() or self._vclient.is_paused():
+                    _: True = await self._playback_event.wait()
+
                 log.debug(f'Waiting for next audio request')
 
                 # get an audio request from the queue
@@ -170,8 +212,8 @@ class Audio():
         """
 
         try:
-            # extract the info from the 
-            data: Dict[str, Any] = downloader.extract_info(query, download=False)
+            # extract the info from the query, sharing the lookup with identical queries in flight
+            data: Dict[str, Any] = await self._resolutions.do(query.strip(), lambda: self._executors.offload('io', downloader.extract_info, query, download=False))
             # get the entries property, if it exists
             entries: Optional[List[Any]] = data.get('entries')
             # if the data contains a list of entries, use the list
@@ -310,6 +352,7 @@ class Audio():
         finally:
             self._connection.clear()
 
+    @cost(EXTERNAL)
     async def play(self, context: Context, *, url: Optional[str] = None, search: Optional[str] = None, speed: Optional[str] = None):
         """
         Plays audio in a voice channel.
@@ -394,6 +437,7 @@ class Audio():
             await self.disconnect(context)
             return
 
+    @cost(EXTERNAL)
     async def nightcore(self, context: Context, *, url: Optional[str] = None, search: Optional[str] = None, speed: Optional[str] = '1.25'):
         """
         Plays audio in a voice channel.
@@ -4,6 +4,7 @@ from logging import Logger
 
 import discord
 from context import Context
+from restBudget import background
 
 
 class Delete():
@@ -71,10 +72,10 @@ class Delete():
         if isinstance(context.message.channel, discord.DMChannel):
             # use the message author as the server owner
             server_owner_id = context.message.author.id
-        # if the members intent is available
-        elif discord.Intents.members and context.message.guild:
+        # if the message is from a guild; the owner id doesn't need the owner in the member cache
+        elif context.message.guild:
             # get the guild owner id
-            server_owner_id = str(context.message.guild.owner.id)
+            server_owner_id = str(context.message.guild.owner_id)
         # otherwise
         else:
             # set the guild owner id to None
@@ -91,30 +92,33 @@ class Delete():
             raise ValueError(f'{context.message.author.id} is not a whitelisted user ID.')
         # create empty list for messages to be added to
         messages = []
-        # for each message in the channel's history
-        async for message in context.message.channel.history(limit=limit+1):
-            # if the message is the delete command message
-            if context.message.id == message.id:
-                # skip it
-                continue
-            # if the author was not specified
-            if author is None:
-                # add the message to the messages list
-                messages.append(message)
-            # if the message's author matches the provided author
-            elif message.author.id == author:
-                # add the message to the messages list
-                messages.append(message)
-        # get number of messages to be deleted
-        message_count = len(messages)
-        try:
-            # delete every message in the messages list
-            await context.message.channel.delete_messages(messages)
-        except discord.errors.Forbidden as error:
-            self._logger.error(f'I am not authorized to delete messages.', error)
-            return
-        except Exception as error:
-            self._logger.error(error)
+        # scan and delete at background priority, so other commands' replies keep their share of the rate limits
+        with background():
+            # for each message in the channel's history
+            async for message in context.message.channel.history(limit=limit+1):
+                # if the message is the delete command message
+                if context.message.id == message.id:
+                    # skip it
+                    continue
+                # if the author was not specified
+                if author is None:
+                    # add the message to the messages list
+                    messages.append(message)
+                # if the message's author matches the provided author
+                elif message.author.id == author:
+                    # add the message to the messages list
+                    messages.append(message)
+            # get number of messages to be deleted
+            message_count = len(messages)
+            try:
+                # delete the messages in batches of the most a bulk delete accepts
+                for index in range(0, message_count, 100):
+                    await context.message.channel.delete_messages(messages[index:index+100])
+            except discord.errors.Forbidden as error:
+                self._logger.error(f'I am not authorized to delete messages.', error)
+                return
+            except Exception as error:
+                self._logger.error(error)
         # send a summary message
         summary_message = await context.message.channel.send(f'{message_count} messages deleted.')
         # wait 3 seconds
@@ -0,0 +1,170 @@
+"""
+Contains components for inspecting the bot's runtime behaviour.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from logging import Logger
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+from context import Context
+from discord import Embed
+from memoryReport import MemoryReport
+from metrics import Counter, Gauge, Histogram
+from pipeline import STAGE_ERRORS, STAGE_LATENCY, STAGE_STOPS
+
+log: Logger = logging.getLogger(__name__)
+
+
+class Diagnostics():
+    """
+    Reports on the bot's startup and runtime performance.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+    def __check_authorization__(self, context: Context) -> None:
+        owner: Optional[int] = None
+        try: owner = context.settings.client.data.owner
+        except ValueError: pass
+        if not owner or context.message.author.id != owner: raise Exception('Unauthorized')
+
+
+    async def startup(self, context: Context):
+        """
+        Shows how long each component took to scan, import and initialize.
+        Lazily loaded components show no import or initialization time until first used.
+        """
+
+        self.__check_authorization__(context)
+
+        embed: Embed = Embed()
+        embed.title = 'Startup'
+        embed.description = f'```\n{context.client.report}\n```'
+        embed.timestamp = context.timestamp
+
+        await context.message.channel.send(embed=embed)
+
+
+    async def stats(self, context: Context):
+        """
+        Summarizes message intake, command latency and errors, queue depths and cache hit rates.
+        """
+
+        self.__check_authorization__(context)
+
+        uptime: timedelta = datetime.now(tz=timezone.utc) - context.timestamp
+
+        embed: Embed = Embed()
+        embed.title = 'Stats'
+        embed.timestamp = datetime.now(tz=timezone.utc)
+
+        # message intake
+        messages: Optional[Counter] = metrics.REGISTRY.get('discord_messages_total')
+        received: float = messages.value() if messages else 0.0
+        embed.add_field(name='Messages', value=f'{int(received)} received ({received / max(uptime.total_seconds(), 1.0) * 60:.1f}/min)', inline=False)
+
+        # command latency and errors, busiest commands first
+        latency: Optional[Histogram] = metrics.REGISTRY.get('command_duration_seconds')
+        errors: Optional[Counter] = metrics.REGISTRY.get('command_errors_total')
+        rows: List[Tuple[str, int, int, float, float]] = list()
+        for (command, ) in latency.keys() if latency else list():
+            p50: Optional[float] = latency.quantile(0.5, command=command)
+            p95: Optional[float] = latency.quantile(0.95, command=command)
+            rows.append((command, latency.count(command=command), int(errors.value(command=command)) if errors else 0, p50 or 0.0, p95 or 0.0))
+        rows.sort(key=lambda row: -row[1])
+        lines: List[str] = [f'{"command":<16}{"runs":>6}{"errors":>7}{"p50":>8}{"p95":>8}']
+        lines.extend(f'{command[:16]:<16}{runs:>6}{failed:>7}{p50:>7.2f}s{p95:>7.2f}s' for command, runs, failed, p50, p95 in rows[:10])
+        embed.add_field(name='Commands', value=f'```\n{chr(10).join(lines)}\n```' if rows else 'None run yet', inline=False)
+
+        # event loop health and queue depths
+        gauges: List[Tuple[str, str]] = [
+            ('Loop lag', 'event_loop_lag_seconds'),
+            ('Loop stalls', 'event_loop_stalls'),
+            ('Log writer queue', 'log_writer_queue_depth'),
+            ('Blob queue', 'blob_queue_depth'),
+            ('Outbound queue', 'outbound_queue_depth'),
+            ('Commands running', 'commands_running'),
+        ]
+        for name, metric_name in gauges:
+            gauge: Optional[Gauge] = metrics.REGISTRY.get(metric_name)
+            value: float = gauge.value() if gauge else 0.0
+            embed.add_field(name=name, value=f'{value:.3f}s' if metric_name.endswith('seconds') else str(int(value)), inline=True)
+
+        # cache hit rates
+        caches: Optional[Counter] = metrics.REGISTRY.get('cache_requests_total')
+        totals: Dict[str, Tuple[float, float]] = dict()
+        for (cache, result), count in (caches.values().items() if caches else list()):
+            hits, requests = totals.get(cache, (0.0, 0.0))
+            totals[cache] = (hits + (count if result == 'hit' else 0.0), requests + count)
+        cache_lines: List[str] = [f'{cache}: {hits / requests:.0%} of {int(requests)}' for cache, (hits, requests) in sorted(totals.items()) if requests]
+        embed.add_field(name='Cache hit rates', value='\n'.join(cache_lines) if cache_lines else 'No lookups yet', inline=False)
+
+        await context.message.channel.send(embed=embed)
+
+
+    async def reloads(self, context: Context):
+        """
+        Shows the most recent component reloads and how long each took.
+        """
+
+        self.__check_authorization__(context)
+
+        embed: Embed = Embed()
+        embed.title = 'Reloads'
+        embed.timestamp = datetime.now(tz=timezone.utc)
+
+        if not context.client.reloader:
+            embed.description = 'Hot reload is disabled.'
+        elif not context.client.reloader.history:
+            embed.description = 'No components have been reloaded.'
+        else:
+            lines: List[str] = [f'{record.timestamp:%H:%M:%S} {record.module:<16}{record.elapsed * 1000:>8.1f} ms {"failed: " + str(record.error) if record.error else ""}'.rstrip() for record in reversed(context.client.reloader.history)]
+            embed.description = f'```\n{chr(10).join(lines)}\n```'
+
+        await context.message.channel.send(embed=embed)
+
+
+    async def memory(self, context: Context):
+        """
+        Estimates how much memory each cache holds: members, messages, archive connections, log files and rate limits.
+        """
+
+        self.__check_authorization__(context)
+
+        report: MemoryReport = MemoryReport.collect(context.client, archive=context.archive, limiter=context.client.limiter, writer=context.client.log_writer)
+
+        embed: Embed = Embed()
+        embed.title = 'Memory'
+        embed.description = f'```\n{report}\n```'
+        embed.set_footer(text='Sizes are estimated from a sample of each cache; archive page caches show their upper bound.')
+        embed.timestamp = datetime.now(tz=timezone.utc)
+
+        await context.message.channel.send(embed=embed)
+
+
+    async def pipeline(self, context: Context):
+        """
+        Shows the stages each message passes through, and how long each takes.
+        """
+
+        self.__check_authorization__(context)
+
+        lines: List[str] = [f'{"order":>5} {"stage":<12}{"mode":<6}{"runs":>7}{"p50":>9}{"p95":>9}{"stops":>7}{"errors":>7}']
+        for stage in context.client.pipeline.stages:
+            p50: float = STAGE_LATENCY.quantile(0.5, stage=stage.name) or 0.0
+            p95: float = STAGE_LATENCY.quantile(0.95, stage=stage.name) or 0.0
+            stops: int = int(STAGE_STOPS.value(stage=stage.name))
+            errors: int = int(STAGE_ERRORS.value(stage=stage.name))
+            lines.append(f'{stage.order:>5} {stage.name[:12]:<12}{stage.mode:<6}{STAGE_LATENCY.count(stage=stage.name):>7}{p50 * 1000:>7.2f}ms{p95 * 1000:>7.2f}ms{stops:>7}{errors:>7}')
+
+        embed: Embed = Embed()
+        embed.title = 'Pipeline'
+        embed.description = f'```\n{chr(10).join(lines)}\n```'
+        embed.add_field(name='Background stages running', value=str(context.client.pipeline.pending), inline=False)
+        embed.timestamp = datetime.now(tz=timezone.utc)
+
+        await context.message.channel.send(embed=embed)
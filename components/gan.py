@@ -1,17 +1,45 @@
 import io
-from typing import Any, Callable
+from pathlib import Path
+from typing import Any, Callable, Optional
 
 import torch
 from context import Context
 from discord import File, TextChannel
+from executors import Executors
 from PIL import Image
+from scheduler import HEAVY, cost
 
 
 class GAN():
 
     def __init__(self, *args, **kwargs):
-        pass
+        try:
+            self._executors: Executors = kwargs['executors']
+        except KeyError as error:
+            raise Exception(f'Key {error} was not found in provided kwargs', error)
 
+    def __paint__(self, source: Image.Image) -> Image.Image:
+        """
+        Loads the generator and applies it to the image.
+        This blocks, and is run in the cpu pool.
+        """
+        model2 = torch.hub.load(
+            "bryandlee/animegan2-pytorch:main",
+            "generator",
+            pretrained="face_paint_512_v2",
+            #device="cuda",
+            progress=False
+        )
+
+        face2paint: Callable[[Any, Image.Image], Image.Image] = torch.hub.load(
+            "bryandlee/animegan2-pytorch:main", 
+            "face2paint", 
+            size=512
+        )
+
+        return face2paint(model2, source)
+
+    @cost(HEAVY)
     async def anime(self, context: Context):
         """
         Applies AnimeGANv2 to an attached image.
@@ -21,25 +49,14 @@ class GAN():
         for attachment in context.message.attachments:
 
             input_binary: io.BytesIO = io.BytesIO()
-            file: File = await attachment.save(input_binary)
+            # read the attachment from the blob store if it was already downloaded
+            path: Optional[Path] = context.archive.blobs.path(attachment.id) if context.archive.blobs else None
+            if path: input_binary.write(await self._executors.offload('io', path.read_bytes))
+            else: await attachment.save(input_binary)
             input_binary.seek(0)
             source: Image = Image.open(input_binary).convert("RGB")
 
-            model2 = torch.hub.load(
-                "bryandlee/animegan2-pytorch:main",
-                "generator",
-                pretrained="face_paint_512_v2",
-                #device="cuda",
-                progress=False
-            )
-
-            face2paint: Callable[[Any, Image.Image], Image.Image] = torch.hub.load(
-                "bryandlee/animegan2-pytorch:main", 
-                "face2paint", 
-                size=512
-            )
-
-            output: Image.Image = face2paint(model2, source)
+            output: Image.Image = await self._executors.offload('cpu', self.__paint__, source)
             
             input_binary.close()
 
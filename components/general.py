@@ -2,6 +2,7 @@ from typing import List, Optional, Tuple
 
 from discord import Embed, Message
 from context import Context
+from outbound import Outbox
 
 emoji_list: List[str] = ['🇦', '🇧', '🇨', '🇩', '🇪', '🇫', '🇬', '🇭']
 
@@ -10,7 +11,10 @@ class Poll():
     """
 
     def __init__(self, *args, **kwargs):
-        pass
+        try:
+            self._outbox: Outbox = kwargs['outbox']
+        except KeyError as error:
+            raise Exception(f'Key {error} was not found in provided kwargs', error)
 
     async def poll(self, context: Context, *, options: str, title: Optional[str] = None, description: Optional[str] = None, image: Optional[str] = None):
 
@@ -33,7 +37,6 @@ class Poll():
 
         if image: embed.set_thumbnail(url=image)
 
-        poll_message: Message = await context.message.channel.send(embed=embed)
+        poll_message: Message = await self._outbox.send(context.message.channel, embed=embed)
 
-        for option in available_options:
-            await poll_message.add_reaction(option[0])
\ No newline at end of file
+        await self._outbox.react(poll_message, *[option[0] for option in available_options])
\ No newline at end of file
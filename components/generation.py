@@ -1,27 +1,51 @@
+import logging
 import re
 import sqlite3
 from datetime import datetime, timezone
+from logging import Logger
 from pathlib import Path
-from time import process_time
+from time import perf_counter
 from typing import List, Optional, Pattern, Tuple, Union
 
 import discord
 import markovify
-import nltk
 from context import Context
+from executors import Executors
 from discord import ClientUser, Guild, Member, Message, TextChannel, User
 from providers.channelArchive import ChannelArchive
+from router.configuration import Section
+from scheduler import HEAVY, cost
+from singleflight import CHANNEL, coalesce
 from settings.settings import Settings
 
-from components.models.generation import ChannelUser, POSifiedText
+from components.models import generation, nlp
+from components.models.generation import ChannelUser
+from components.models.nlp import ResourceError, ResourceManager
 
-nltk.download('averaged_perceptron_tagger', quiet=True)
+log: Logger = logging.getLogger(__name__)
 
 
 class Generation():
     """
     """
 
+    @property
+    def nltk_data(self) -> Optional[Path]:
+        key: str = "nltk_data"
+        value: Optional[str] = None
+        try:
+            value = self._config[key]
+            return Path(value) if value and isinstance(value, str) else None
+        except KeyError:
+            self._config[key] = ""
+            return None
+
+    @nltk_data.setter
+    def nltk_data(self, value: Path) -> None:
+        key: str = "nltk_data"
+        if value: self._config[key] = str(value)
+
+
     def __init__(self, *args, **kwargs):
         self._root: Path = Path('./archive/models')
         self.__compile_regex__()
@@ -29,9 +53,22 @@ class Generation():
         try:
             self._client: discord.Client = kwargs['client']
             self._settings: Settings = kwargs['settings']
+            self._executors: Executors = kwargs['executors']
         except KeyError as error:
             raise Exception(f'Key {error} was not found in provided kwargs')
 
+        self.__setup__()
+
+    def __setup__(self) -> None:
+        # create a config section for Generation
+        self._settings.client['Generation'] = Section('Generation', self._settings.client._parser, self._settings.client._reference)
+        # create reference to Generation config section
+        self._config: Section = self._settings.client['Generation']
+        # verify the part-of-speech tagger up front so a missing or corrupt tagger fails the component at load
+        if not self.nltk_data: raise ResourceError('No nltk_data directory was provided in the Generation configuration.')
+        # the model build workers load the verified tagger on first use
+        ResourceManager(self.nltk_data).verify(nlp.TAGGER)
+
     def __compile_regex__(self) -> None:
         """
         Compile regex patterns used in message analyzation.
@@ -103,6 +140,8 @@ class Generation():
         return user
 
 
+    @cost(HEAVY)
+    @coalesce(CHANNEL)
     async def compile(self, context: Context) -> None:
 
         guild: Guild = context.message.guild
@@ -113,7 +152,7 @@ class Generation():
 
         message: Message = await context.message.reply('Compiling...')
 
-        start: float = process_time()
+        start: float = perf_counter()
 
         select: str = '''
         SELECT * FROM Messages
@@ -133,17 +172,18 @@ class Generation():
         text: str = '\n'.join(texts)
 
         
-        model: POSifiedText = POSifiedText(text)
-        json: str = model.to_json()
+        # build the model in a worker process
+        json: str = await self._executors.offload('process', generation.build, text, self.nltk_data)
         self.__save__(guild, channel, user, json)
 
-        finish: float = process_time()
+        finish: float = perf_counter()
 
         delta: float = finish - start
 
         await message.edit(content=f'Compiled model for {user.mention} in {"%.2f" % delta}s')
 
 
+    @cost(HEAVY)
     async def generate(self, context: Context, *, tries: int = 10) -> None:
 
         guild: Guild = context.message.guild
@@ -153,8 +193,7 @@ class Generation():
         archive: ChannelArchive = context.archive[guild.id][channel.id]
 
         json_str: str = self.__load__(guild, channel, user)
-        model: POSifiedText = POSifiedText.from_json(json_str)
-        sentence: Optional[str] = model.make_sentence(tries=int(tries))
+        sentence: Optional[str] = await self._executors.offload('process', generation.sentence, json_str, int(tries))
         if not sentence: 
             raise ValueError('Could not generate content; not enough source data. Try increasing value of the `-tries` flag (default 10).')
         
@@ -166,6 +205,7 @@ class Generation():
         response: Message = await channel.send(embed=embed)
 
     
+    @cost(HEAVY)
     async def talk(self, context: Context, *, about: str, tries: Union[int, str] = 10, loops: Union[int, str] = 1000) -> None:
 
         guild: Guild = context.message.guild
@@ -175,25 +215,13 @@ class Generation():
         archive: ChannelArchive = context.archive[guild.id][channel.id]
 
         json_str: str = self.__load__(guild, channel, user)
-        model: POSifiedText = POSifiedText.from_json(json_str)
 
-        loop: int = 0
         loops = loops if isinstance(loops, int) else int(loops)
         tries = tries if isinstance(tries, int) else int(tries)
 
-        attempt: Optional[str] = None
-        sentence: Optional[str] = None
-        
-        while loop < loops:
-            loop = loop + 1
-            attempt = model.make_sentence(tries=int(tries))
-            if not attempt:
-                continue
-            elif about.lower() not in attempt.lower():
-                continue
-            else:
-                sentence = attempt
-                break
+        sentence: Optional[str]
+        loop: int
+        sentence, loop = await self._executors.offload('process', generation.search, json_str, about, tries, loops)
         
         if not sentence:
             raise ValueError(f'Could not find content containing {about} in {loops} attempts.')
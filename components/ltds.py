@@ -7,13 +7,22 @@ import logging
 import sqlite3
 from datetime import datetime, timezone
 from logging import Logger
+from pathlib import Path
 from random import Random
 from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import discord
 from context import Context
 from discord import Guild, Message, TextChannel, User
+from executors import Executors
+from providers.archiveTransfer import ArchiveExporter, ArchiveImporter
 from providers.channelArchive import ChannelArchive
+from providers.columnarExport import ColumnarExporter
+from providers.messageEntry import AuthorEntry
+from responseCache import idempotent
+from scheduler import HEAVY, cost
+from singleflight import CHANNEL, coalesce
 
 log: Logger = logging.getLogger(__name__)
 
@@ -25,6 +34,94 @@ class Archive():
     def __init__(self, *args, **kwargs):
         self._archivers = dict()
 
+        try:
+            self._executors: Executors = kwargs['executors']
+        except KeyError as error:
+            raise Exception(f'Key {error} was not found in provided kwargs', error)
+
+
+    def __check_authorization__(self, context: Context) -> None:
+        owner: Optional[int] = None
+        try: owner = context.settings.client.data.owner
+        except ValueError: pass
+        if not owner or context.message.author.id != owner: raise Exception('Unauthorized')
+
+
+    @cost(HEAVY)
+    async def export(self, context: Context, *, directory: str = './exports', scope: str = 'guild'):
+        """
+        Exports the local message database to compressed NDJSON chunks with checksums.
+        Interrupted exports resume after the last completed chunk.
+
+        Parameters:
+            - directory: The directory on the host to write the export to.
+            - scope: 'guild' to export the current guild, 'client' to export every guild.
+        """
+
+        self.__check_authorization__(context)
+
+        exporter: ArchiveExporter = ArchiveExporter(Path(directory))
+
+        if scope == 'client':
+            count: int = await exporter.export(context.archive)
+        elif scope == 'guild':
+            count: int = await exporter.export_guild(context.archive[context.message.guild.id])
+        else:
+            raise ValueError(f"Unknown scope '{scope}'; expected 'guild' or 'client'")
+
+        await context.message.reply(f'Exported {count} messages to `{directory}`')
+
+
+    @cost(HEAVY)
+    async def restore(self, context: Context, *, directory: str = './exports', scope: str = 'guild'):
+        """
+        Imports an NDJSON export into the local message database.
+        Chunks are verified against their checksums and chunks that were already imported are skipped.
+
+        Parameters:
+            - directory: The directory on the host to read the export from.
+            - scope: 'guild' to import the current guild, 'client' to import every guild.
+        """
+
+        self.__check_authorization__(context)
+
+        importer: ArchiveImporter = ArchiveImporter(Path(directory))
+
+        if scope == 'client':
+            count: int = await importer.restore(context.archive)
+        elif scope == 'guild':
+            count: int = await importer.restore_guild(context.archive[context.message.guild.id])
+        else:
+            raise ValueError(f"Unknown scope '{scope}'; expected 'guild' or 'client'")
+
+        await context.message.reply(f'Imported {count} messages from `{directory}`')
+
+
+    @cost(HEAVY)
+    async def export_columnar(self, context: Context, *, directory: str = './analytics', format: str = 'parquet', scope: str = 'guild'):
+        """
+        Exports the local message database to columnar files partitioned by channel and month.
+        Only messages newer than the previous export are written.
+
+        Parameters:
+            - directory: The directory on the host to write the export to.
+            - format: 'parquet' or 'arrow' (Arrow IPC).
+            - scope: 'guild' to export the current guild, 'client' to export every guild.
+        """
+
+        self.__check_authorization__(context)
+
+        exporter: ColumnarExporter = ColumnarExporter(Path(directory), format=format)
+
+        if scope == 'client':
+            count: int = await exporter.export(context.archive)
+        elif scope == 'guild':
+            count: int = await exporter.export_guild(context.archive[context.message.guild.id])
+        else:
+            raise ValueError(f"Unknown scope '{scope}'; expected 'guild' or 'client'")
+
+        await context.message.reply(f'Exported {count} new messages to `{directory}`')
+
 
     async def count(self, context: Context):
         """
@@ -34,15 +131,22 @@ class Archive():
             - user: Specify a user to filter the messages by.
         """
 
-        guild: Guild = context.message.guild
         channel: TextChannel = context.message.channel
-        user: User = context.message.author
 
-        try:
-            mention: Optional[User] = context.message.mentions.pop(0)
-            if mention: user = mention
-        except IndexError:
-            pass
+        embed: discord.Embed = (await self.__build_count__(context)).copy()
+        embed.timestamp = datetime.now(tz=timezone.utc)
+
+        response: Message = await channel.send(embed=embed)
+
+    @idempotent(ttl=60.0, key=lambda context: (context.message.channel.id, _target(context).id), version=lambda context: context.archive[context.message.guild.id][context.message.channel.id].version)
+    async def __build_count__(self, context: Context) -> discord.Embed:
+        """
+        Counts the target's messages, rebuilding only when the channel archive changes.
+        """
+
+        guild: Guild = context.message.guild
+        channel: TextChannel = context.message.channel
+        user: User = _target(context)
 
         archive: ChannelArchive = context.archive[guild.id][channel.id]
 
@@ -59,80 +163,88 @@ class Archive():
         embed: discord.Embed = discord.Embed()
         embed.set_author(name=user.name, icon_url=user.avatar_url)
         embed.description = f'{count} messages sent in #{channel.name}'
-        embed.timestamp = datetime.now(tz=timezone.utc)
 
-        response: Message = await channel.send(embed=embed)
+        return embed
 
 
-    async def distribution(self, context: Context, *, containing: str=None):
+    def __render__(self, data: List[Tuple[str, int]]) -> io.BytesIO:
         """
-        Generates a bar graph of messages contained in the local message database per user.
-
-        Parameters:
-            - containing: A string to filter messages by. Only messages containing this string will be included. 
+        Renders a horizontal bar graph of (name, count) pairs to a PNG buffer.
+        Uses matplotlib's object-oriented API, since pyplot's global state isn't thread-safe.
         """
 
-        import matplotlib.pyplot as pyplot
         import numpy
+        from matplotlib.axes import Axes
         from matplotlib.figure import Figure
-        from matplotlib.pyplot import Axes
-        from PIL import Image
-
-
-        guild: Guild = context.message.guild
-        channel: TextChannel = context.message.channel
-        user: User = context.message.author
-
-        archive: ChannelArchive = context.archive[guild.id][channel.id]
-
-        data: Dict[str, Tuple[User, int]] = dict()
-
-        query = containing if containing else ''
-
-        member: User
-        for member in guild.members:
-            sql: str = '''
-            SELECT * FROM Messages
-            WHERE AuthorID = ?
-            AND Content LIKE ?
-            '''
-            parameters: Tuple = (member.id, f'%{query}%')
-            archive._cursor.execute(sql, parameters)
-            rows: List[sqlite3.Row] = archive._cursor.fetchall()
-            data[member.id] = (member, len(rows))
-
-        embed: discord.Embed = discord.Embed()
-        embed.set_author(name=user.name, icon_url=user.avatar_url)
-        embed.title = f'Message Distribution for messages containing \"{containing}\"' if containing else f'Message Distribution'
-        embed.timestamp = datetime.now(tz=timezone.utc)
 
         # generate the figure and axes
-        subplots: Tuple[Figure, Axes] = pyplot.subplots()
-        figure: Figure = subplots[0]
-        axes: Axes = subplots[1]
-        # generate an evenly spaced range by the length of the data dict
+        figure: Figure = Figure()
+        axes: Axes = figure.subplots()
+        # generate an evenly spaced range by the length of the data
         y_positions = numpy.arange(len(data))
         # get the message count from the data
-        values: List[int] = [pair[1] for pair in data.values()]
+        values: List[int] = [pair[1] for pair in data]
         # create a horizontal bar plot
         axes.barh(y_positions, values, align='center')
         # set the y ticks at the calculated positions
         axes.set_yticks(y_positions)
         # set the y tick labels to the members list
-        axes.set_yticklabels([pair[0].name for pair in data.values()])
+        axes.set_yticklabels([pair[0] for pair in data])
         # invert the y axis to be horizontal
         axes.invert_yaxis()
         # turn on the grid
-        axes.grid('on')
+        axes.grid(True)
         # set the x axis label
         axes.set_xlabel('Messages')
 
         # create a buffer
         buffer: io.BytesIO = io.BytesIO()
         # save the figure to the buffer
-        pyplot.savefig(buffer)
+        figure.savefig(buffer, format='png')
         # seek to beginning of buffer
         buffer.seek(0)
+        return buffer
+
+    @cost(HEAVY)
+    @coalesce(CHANNEL)
+    async def distribution(self, context: Context, *, containing: str=None):
+        """
+        Generates a bar graph of messages contained in the local message database per user.
+
+        Parameters:
+            - containing: A string to filter messages by. Only messages containing this string will be included. 
+        """
+
+        guild: Guild = context.message.guild
+        channel: TextChannel = context.message.channel
+        user: User = context.message.author
+
+        archive: ChannelArchive = context.archive[guild.id][channel.id]
+
+        query = containing if containing else ''
+
+        # count messages per author, resolving names from the recorded authors
+        sql: str = '''
+        SELECT Messages.AuthorID AS AuthorID, Authors.Name AS Name, COUNT(*) AS Count
+        FROM Messages
+        LEFT JOIN Authors ON Authors.ID = Messages.AuthorID
+        WHERE Messages.Content LIKE ?
+        GROUP BY Messages.AuthorID
+        ORDER BY Count DESC
+        '''
+        parameters: Tuple = (f'%{query}%', )
+        archive._cursor.execute(sql, parameters)
+        rows: List[sqlite3.Row] = archive._cursor.fetchall()
+        # authors recorded before the Authors table existed fall back to their ID
+        data: Dict[int, Tuple[str, int]] = {row['AuthorID']: (row['Name'] if row['Name'] else str(row['AuthorID']), row['Count']) for row in rows}
+
+        embed: discord.Embed = discord.Embed()
+        embed.set_author(name=user.name, icon_url=user.avatar_url)
+        embed.title = f'Message Distribution for messages containing \"{containing}\"' if containing else f'Message Distribution'
+        embed.timestamp = datetime.now(tz=timezone.utc)
+
+        # render the graph in the cpu pool
+        buffer: io.BytesIO = await self._executors.offload('cpu', self.__render__, [pair for pair in data.values()])
 
         # register the file with the discord library
         file = discord.File(buffer, filename="image.png")
@@ -162,6 +274,28 @@ class Archive():
         row: sqlite3.Row = rows[index]
         messageID: int = row['MessageID']
 
+        # if the attachment is stored locally, send it without contacting the CDN
+        path: Optional[Path] = context.archive.blobs.path(row['ID']) if context.archive.blobs else None
+        if path:
+            jump_url: str = f'https://discord.com/channels/{guild.id}/{channel.id}/{messageID}'
+            author: Optional[sqlite3.Row] = archive._cursor.execute('''
+            SELECT Authors.* FROM Messages
+            JOIN Authors ON Authors.ID = Messages.AuthorID
+            WHERE Messages.ID = ?
+            ''', (messageID, )).fetchone()
+            embed = discord.Embed()
+            if author:
+                entry: AuthorEntry = AuthorEntry.fromRow(author)
+                embed.set_author(name=entry.name, url=jump_url, icon_url=entry.avatar_url)
+            embed.title = jump_url
+            embed.url = jump_url
+            embed.timestamp = discord.utils.snowflake_time(messageID)
+            # attachment URLs are signed, so take the name from the path without the query string
+            filename: str = Path(urlsplit(row['URL']).path).name
+            embed.set_image(url=f'attachment://{filename}')
+            await channel.send(file=discord.File(path, filename=filename), embed=embed)
+            return
+
         message: Message = await channel.fetch_message(messageID)
         attachment: discord.Attachment = message.attachments.pop(0)
 
@@ -172,3 +306,10 @@ class Archive():
         embed.set_image(url=attachment.proxy_url)
         
         await channel.send(embed=embed)
+
+
+def _target(context: Context) -> User:
+    """
+    Returns the first mentioned user, or the message author if nobody was mentioned.
+    """
+    return context.message.mentions[0] if context.message.mentions else context.message.author
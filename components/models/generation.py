@@ -1,14 +1,17 @@
 import re
+from pathlib import Path
+from typing import Optional, Tuple
 
 from discord import Guild, TextChannel
 import markovify
-import nltk
+
+from components.models import nlp
 
 
 class POSifiedText(markovify.NewlineText):
     def word_split(self, sentence: str):
         words = re.split(self.word_split_pattern, sentence)
-        words = [ "::".join(tag) for tag in nltk.pos_tag(words) ]
+        words = [ "::".join(tag) for tag in nlp.tagger().tag(words) ]
         return words
 
     def word_join(self, words: str):
@@ -21,4 +24,34 @@ class ChannelUser:
         self.id: int = channel.id
         self.name: str = channel.name
         self.avatar_url: str = guild.icon_url
-        self.mention: str = channel.mention
\ No newline at end of file
+        self.mention: str = channel.mention
+
+
+def build(text: str, nltk_data: Optional[Path]) -> str:
+    """
+    Builds a model from newline separated text and returns it as JSON.
+    Runs in a worker process, which loads its own copy of the tagger.
+    """
+    if nltk_data: nlp.preload(nltk_data)
+    return POSifiedText(text).to_json()
+
+
+def sentence(json: str, tries: int) -> Optional[str]:
+    """
+    Generates a sentence from a JSON model.
+    """
+    return POSifiedText.from_json(json).make_sentence(tries=tries)
+
+
+def search(json: str, about: str, tries: int, loops: int) -> Tuple[Optional[str], int]:
+    """
+    Generates sentences from a JSON model until one contains the text.
+    Returns the sentence, if found, and the number of loops taken.
+    """
+    model: POSifiedText = POSifiedText.from_json(json)
+    loop: int = 0
+    while loop < loops:
+        loop = loop + 1
+        attempt: Optional[str] = model.make_sentence(tries=tries)
+        if attempt and about.lower() in attempt.lower(): return attempt, loop
+    return None, loop
@@ -0,0 +1,157 @@
+"""
+Resolves NLP resources from a local directory instead of downloading them.
+
+The directory follows nltk's data layout (e.g. taggers/averaged_perceptron_tagger/...)
+and contains a manifest.json mapping each file's path, relative to the directory,
+to its sha256 digest. To provision a host:
+
+    python -m nltk.downloader -d <directory> averaged_perceptron_tagger
+    python -m components.models.nlp <directory>
+
+The second command writes the manifest from the files currently in the directory.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional
+
+log: Logger = logging.getLogger(__name__)
+
+MANIFEST: str = 'manifest.json'
+"""The name of the checksum manifest in the resource directory"""
+
+TAGGER: str = 'taggers/averaged_perceptron_tagger'
+"""
+The path prefix of the part-of-speech tagger's files.
+Matches both the pickled and the per-language JSON layouts used by different nltk versions.
+"""
+
+
+class ResourceManager():
+    """
+    Verifies and loads NLP resources from a local directory.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._directory: Path = directory.resolve()
+        self._manifest: Optional[Dict[str, str]] = None
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def verify(self, prefix: str) -> List[Path]:
+        """
+        Checks every file of the resource against the manifest.
+        Returns the verified files.
+        """
+        manifest: Dict[str, str] = self.__manifest__()
+        entries: Dict[str, str] = {path: digest for path, digest in manifest.items() if path.startswith(prefix)}
+        if not entries: raise MissingResourceError(prefix, self._directory)
+
+        files: List[Path] = list()
+        for path, digest in entries.items():
+            file: Path = self._directory.joinpath(path)
+            if not file.is_file(): raise MissingResourceError(path, self._directory)
+            if _checksum(file) != digest: raise ResourceChecksumError(path, self._directory)
+            files.append(file)
+        return files
+
+    def __manifest__(self) -> Dict[str, str]:
+        """
+        Reads the checksum manifest once.
+        """
+        if self._manifest is not None: return self._manifest
+        reference: Path = self._directory.joinpath(MANIFEST)
+        try:
+            self._manifest = json.loads(reference.read_text(encoding='utf-8'))
+        except FileNotFoundError as error:
+            raise ResourceError(f'No checksum manifest was found at {reference}. Run \'python -m components.models.nlp {self._directory}\' to create one.', error)
+        except json.JSONDecodeError as error:
+            raise ResourceError(f'The checksum manifest at {reference} could not be read: {error}', error)
+        return self._manifest
+
+
+_tagger = None
+_tagger_lock: threading.Lock = threading.Lock()
+
+
+def preload(directory: Path) -> None:
+    """
+    Verifies the tagger's files and loads the shared tagger.
+    Raises a ResourceError if the tagger is missing or its files don't match the manifest.
+    """
+    global _tagger
+    with _tagger_lock:
+        if _tagger is not None: return
+        manager: ResourceManager = ResourceManager(directory)
+        manager.verify(TAGGER)
+        import nltk
+        from nltk.tag.perceptron import PerceptronTagger
+        # resolve resources from the configured directory only, so nltk never reaches the network
+        nltk.data.path[:] = [str(manager.directory)]
+        try:
+            _tagger = PerceptronTagger()
+        except LookupError as error:
+            raise MissingResourceError(TAGGER, manager.directory, error)
+        log.info('Loaded the part-of-speech tagger from %s', manager.directory)
+
+
+def tagger():
+    """
+    Returns the shared part-of-speech tagger.
+    Raises a ResourceError if it hasn't been preloaded.
+    """
+    if _tagger is None: raise ResourceError('The part-of-speech tagger has not been loaded. Configure the Generation nltk_data directory.')
+    return _tagger
+
+
+def _checksum(reference: Path) -> str:
+    """
+    Returns the sha256 digest of a file.
+    """
+    digest = hashlib.sha256()
+    with reference.open('rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''): digest.update(block)
+    return digest.hexdigest()
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Writes the checksum manifest for an NLP resource directory.')
+    parser.add_argument('directory', type=Path, help='the resource directory')
+    arguments: argparse.Namespace = parser.parse_args()
+
+    directory: Path = arguments.directory.resolve()
+    manifest: Dict[str, str] = {file.relative_to(directory).as_posix(): _checksum(file) for file in sorted(directory.rglob('*')) if file.is_file() and file.name != MANIFEST}
+    directory.joinpath(MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    print(f'Recorded {len(manifest)} files in {directory.joinpath(MANIFEST)}')
+
+
+class ResourceError(Exception):
+    def __init__(self, message: str, exception: Optional[Exception] = None):
+        self._message = message
+        self._inner_exception = exception
+
+    def __str__(self) -> str:
+        return self._message
+
+
+class MissingResourceError(ResourceError):
+    def __init__(self, resource: str, directory: Path, exception: Optional[Exception] = None):
+        message: str = f'NLP resource \'{resource}\' was not found in {directory}. Provision it with \'python -m nltk.downloader -d {directory} averaged_perceptron_tagger\' and record it in the manifest.'
+        super().__init__(message, exception)
+
+
+class ResourceChecksumError(ResourceError):
+    def __init__(self, resource: str, directory: Path, exception: Optional[Exception] = None):
+        message: str = f'NLP resource \'{resource}\' in {directory} does not match its recorded checksum.'
+        super().__init__(message, exception)
+
+
+if __name__ == '__main__':
+    main()
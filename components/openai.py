@@ -8,12 +8,15 @@ import textwrap
 from logging import Logger
 from math import ceil
 from pathlib import Path
-from typing import Dict, List, Literal, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from context import Context
 from database.database import Database
+from executors import Executors
+from outbound import Outbox
 from discord import Client, Embed, Member, Message, User
 from router.configuration import Section
+import scheduler
 from settings.settings import Settings
 
 import openai
@@ -22,12 +25,6 @@ from openai.openai_object import OpenAIObject
 
 log: Logger = logging.getLogger(__name__)
 
-MAX_MESSAGE_SIZE: Literal[2000] = 2000
-"""
-The maximum amount of characters
-permitted in a Discord message
-"""
-
 # define model costs
 MODEL_COSTS: Dict[str, float] = {
     'text-davinci-002': 0.0600 / 1000,
@@ -78,6 +75,8 @@ class OpenAI():
         try:
             self._client: Client = kwargs['client']
             self._settings: Settings = kwargs['settings']
+            self._executors: Executors = kwargs['executors']
+            self._outbox: Outbox = kwargs['outbox']
         except KeyError as error:
             raise Exception(f'Key {error} was not found in provided kwargs', error)
 
@@ -92,7 +91,7 @@ class OpenAI():
         # set the api key
         openai.api_key = self.key
         # create database instance
-        self._database: Database = Database(Path('./archive/openai.db'))
+        self._database: Database = Database(self._client.scope(Path('./archive/openai.db')))
 
     async def __send__(self, context: Context, *, prompt: str, model: str = 'text-davinci-002', tokens: Union[int, str] = 128, echo: bool = False) -> List[str]:
         # check enabled configuration parameter
@@ -104,7 +103,7 @@ class OpenAI():
         # convert the tokens parameter to an int if not already an int
         tokens = tokens if isinstance(tokens, int) else int(tokens)
         # create the Completion request
-        completion: OpenAIObject = openai.Completion.create(model=model, prompt=prompt, max_tokens=tokens, echo=echo, user=str(id))
+        completion: OpenAIObject = await self._executors.offload('io', openai.Completion.create, model=model, prompt=prompt, max_tokens=tokens, echo=echo, user=str(id))
 
         # get the list of choices
         choices: List[OpenAIObject] = completion.choices
@@ -134,20 +133,10 @@ class OpenAI():
         return submissions
     
     async def __print__(self, context: Context, *, responses: List[str]):
-        # define the block tag for code block messages
-        block_tag: str = '```'
         # for each returned response
         for response in responses:
-            # calculate the max characters that can be inserted into each message's code block
-            max_characters: int = MAX_MESSAGE_SIZE - (2 * len(block_tag))
-            # break the response into string segments with length equivalent to the maximum character limit
-            segments: List[str] = textwrap.wrap(response, max_characters, break_long_words=False, replace_whitespace=False)
-            # set the initial message reference to the original message
-            message: Message = context.message
-            # for each segment
-            for segment in segments:
-                # send the message and set the message reference to the sent message
-                message = await message.reply(f'{block_tag}\n{segment}\n{block_tag}')
+            # pack the response into code blocks and send them as chained replies
+            await self._outbox.reply(context.message, response, block=True)
 
     async def __get_cost__(self, submission: Submission, costs: Dict[str, float]) -> float:
         try:
@@ -209,6 +198,7 @@ class OpenAI():
 
             await context.message.reply(embed=embed)
 
+    @scheduler.cost(scheduler.EXTERNAL)
     async def prompt(self, context: Context, *, content: str, model: str = 'text-davinci-002', tokens: Union[str, int] = 128) -> None:
         """
         Provides a prompt to the designated AI model 
@@ -227,6 +217,7 @@ class OpenAI():
         # send the responses
         await self.__print__(context, responses=responses)
 
+    @scheduler.cost(scheduler.EXTERNAL)
     async def write(self, context: Context, *, a: Optional[str] = None, about: Optional[str] = None, model: str = 'text-davinci-002', tokens: Union[str, int] = 128) -> None:
         """
         A shorthand command for 'prompt'.
@@ -259,6 +250,7 @@ class OpenAI():
         # send the responses
         await self.__print__(context, responses=responses)
 
+    @scheduler.cost(scheduler.EXTERNAL)
     async def greentext(self, context: Context, *, be_me: Optional[str] = None, model: str = 'text-davinci-002', tokens: Union[str, int] = 256) -> None:
         """
         Generates a 4chan-style greentext.
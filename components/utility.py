@@ -6,6 +6,7 @@ from context import Context
 from discord import Guild, TextChannel, User
 from providers.channelArchive import ChannelArchive
 from providers.guildArchive import GuildArchive
+from responseCache import idempotent
 from settings import Settings
 
 
@@ -56,6 +57,17 @@ class Utility():
             context.settings.for_guild(context.message.guild).limiting.count = count_value
 
 
+    async def set_typing_delay(self, context: Context, *, delay: str):
+        """
+        Sets the number of seconds a command may run before a typing indicator is shown.
+        """
+
+        self.__check_authorization__(context)
+
+        context.settings.for_guild(context.message.guild).ux.typing_delay = max(0.0, float(delay))
+        await context.message.reply(f"Typing delay set to {context.settings.for_guild(context.message.guild).ux.typing_delay} seconds")
+
+
     async def enable_verbose(self, context: Context):
         """
         Enables the verbose configuration flag.
@@ -122,28 +134,39 @@ class Utility():
         """
         Display's the creation date of the message author's account.
         """
+        channel: discord.abc.Messageable = context.message.channel
+        embed: discord.Embed = await self.__build_age__(context)
+        await channel.send(embed=embed)
+
+    @idempotent(ttl=600.0, key=lambda context: context.message.author.id)
+    async def __build_age__(self, context: Context) -> discord.Embed:
         user: discord.User = context.message.author
         timestamp: datetime = discord.utils.snowflake_time(user.id)
-        channel: discord.abc.Messageable = context.message.channel
         embed = discord.Embed()
         embed.title = f'Discord user since {timestamp.year}'
         embed.set_author(name=user.name, icon_url=user.avatar_url)
         embed.timestamp = timestamp
-        await channel.send(embed=embed)
+        return embed
 
     async def count_(self, context: Context):
         """
         """
 
+        channel: discord.TextChannel = context.message.channel
+        embed: discord.Embed = (await self.__build_count__(context)).copy()
+        embed.timestamp = datetime.now(tz=timezone.utc)
+        await channel.send(embed=embed)
+
+    @idempotent(ttl=60.0, key=lambda context: (context.message.channel.id, context.message.author.id), version=lambda context: context.archive[context.message.guild.id][context.message.channel.id].version)
+    async def __build_count__(self, context: Context) -> discord.Embed:
         user: discord.User = context.message.author
         channel: discord.TextChannel = context.message.channel
-        guildArchive: GuildArchive = context.archive._archives[context.message.guild.id]
-        channelArchive: ChannelArchive = guildArchive._archives[context.message.channel.id]
+        guildArchive: GuildArchive = context.archive[context.message.guild.id]
+        channelArchive: ChannelArchive = guildArchive[context.message.channel.id]
         count: int = len(channelArchive)
 
         embed = discord.Embed()
         embed.title = f'#{channel.name} Message Count'
         embed.set_author(name=user.name, icon_url=user.avatar_url)
         embed.description = f'{count} Messages'
-        embed.timestamp = datetime.now(tz=timezone.utc)
-        await channel.send(embed=embed)
+        return embed
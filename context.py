@@ -4,6 +4,7 @@ from typing import Dict
 from discord import Client, Message
 from router.packaging import Package
 
+from commandIndex import CommandIndex
 from providers.clientArchive import ClientArchive
 from settings import Settings
 
@@ -33,6 +34,10 @@ class Context:
     def packages(self) -> Dict[str, Package]:
         return self._packages
 
+    @property
+    def index(self) -> CommandIndex:
+        return self._index
+
     def __init__(
         self,
         client: Client,
@@ -41,6 +46,7 @@ class Context:
         archive: ClientArchive,
         timestamp: datetime,
         packages: Dict[str, Package],
+        index: CommandIndex,
     ):
         self._client: Client = client
         self._settings: Settings = settings
@@ -48,3 +54,4 @@ class Context:
         self._message: Message = message
         self._timestamp: datetime = timestamp
         self._packages: Dict[str, Package] = packages
+        self._index: CommandIndex = index
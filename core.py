@@ -1,37 +1,170 @@
 import logging
-import re
+import time
 from datetime import datetime, timezone
-from logging import FileHandler, Formatter, Logger
+from logging import Logger
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import discord
 from discord.abc import GuildChannel
-from discord import (Client, DMChannel, GroupChannel, Intents, Member, Message,
-                     TextChannel, User)
-from pip import List
+from discord import (Client, DMChannel, GroupChannel, Intents, Member,
+                     MemberCacheFlags, Message, TextChannel, User)
 from router import HandlerError
 
+import gateway
+import metrics
 from commandHandler import CommandHandler, MissingPrefixError
+from dispatch import Invocation
+from executors import Executors
+from gateway import GatewayConfigurationError
+from hotReload import HotReloader
 from context import Context
+from loader import ComponentLoader, StartupReport
+from logWriter import MessageLogWriter
+from loopWatchdog import LoopWatchdog
+from metrics import Counter, MetricsServer
+from outbound import Outbox
+from pipeline import ASYNC, Envelope, Pipeline
+from providers.archiveWriter import ArchiveWriter
+from providers.blobStore import BlobStore
 from providers.clientArchive import ClientArchive
 from rateLimiter import RateLimiter
+from responseCache import RESPONSES
+from restBudget import RestBudget
+from scheduler import EXTERNAL, HEAVY, LANES, LIGHT, Lane, LaneFullError, Scheduler
 from settings import Settings
+from shardInfo import ShardInfo
+from shedding import LoadShedder, OverloadedError
+from singleflight import AUTHOR, CHANNEL, SingleFlight, normalize, scope_of
 
 log: Logger = logging.getLogger(__name__)
 
+MESSAGES: Counter = metrics.counter('discord_messages_total', 'Messages received')
+
 class Core(Client):
 
-    def __init__(self) -> None:
+    def __init__(self, settings: Optional[Settings] = None, *, shard: Optional[ShardInfo] = None, **options) -> None:
         self._timestamp: datetime = datetime.now(tz=timezone.utc)
-        self._settings: Settings = Settings()
+        self._settings: Settings = settings if settings else Settings()
         self._limiter: RateLimiter = RateLimiter(self._settings)
         self._handler: CommandHandler = CommandHandler()
-        self._loggers: Dict[int, Logger] = dict()
-        super().__init__(intents=Intents.all())
+        self._log_writer: MessageLogWriter = MessageLogWriter(Path('./logs'))
+        self._outbox: Outbox = Outbox()
+        self._archive_writer: ArchiveWriter = ArchiveWriter()
+        self._blobs: Optional[BlobStore] = None
+        self._shard: Optional[ShardInfo] = shard
+        self._loader: Optional[ComponentLoader] = None
+        self._reloader: Optional[HotReloader] = None
+        self._executors: Executors = self.__get_executors__()
+        self._scheduler: Scheduler = self.__get_scheduler__()
+        self._watchdog: Optional[LoopWatchdog] = None
+        self._shedder: Optional[LoadShedder] = self.__get_shedder__()
+        self._flights: SingleFlight = SingleFlight('commands')
+        self._pipeline: Pipeline = self.__get_pipeline__()
+        self._report: StartupReport = StartupReport(self._settings.client.data.loader)
+        self._metrics_server: Optional[MetricsServer] = None
+        intents, member_cache_flags = self.__get_intents__()
+        super().__init__(
+            intents=intents,
+            member_cache_flags=member_cache_flags,
+            chunk_guilds_at_startup=self._settings.client.gateway.chunk_guilds,
+            max_messages=self._settings.client.gateway.max_messages or None,
+            **options,
+        )
+        self._budget: Optional[RestBudget] = self.__get_budget__()
+        self.__register_metrics__()
+
+    @property
+    def shard(self) -> Optional[ShardInfo]:
+        """
+        The shards owned by this process, or None if the client is not sharded.
+        """
+        return self._shard
+
+    @property
+    def report(self) -> StartupReport:
+        """
+        The time spent loading each component at startup.
+        """
+        return self._loader.report if self._loader else self._report
+
+    def scope(self, path: Path) -> Path:
+        """
+        Returns this process's copy of a client-wide file, so sharded processes never write the same file.
+        """
+        return self._shard.scope(path) if self._shard else path
+
+    @property
+    def watchdog(self) -> Optional[LoopWatchdog]:
+        return self._watchdog
+
+    @property
+    def reloader(self) -> Optional[HotReloader]:
+        """
+        The component hot reloader, or None if hot reload is disabled.
+        """
+        return self._reloader
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
+    @property
+    def log_writer(self) -> MessageLogWriter:
+        return self._log_writer
+
+    @property
+    def outbox(self) -> Outbox:
+        """
+        Sends messages in order per channel, paced against Discord's rate limits.
+        """
+        return self._outbox
+
+    @property
+    def pipeline(self) -> Pipeline:
+        """
+        The stages every received message passes through.
+        """
+        return self._pipeline
+
+    @property
+    def scheduler(self) -> Scheduler:
+        return self._scheduler
+
+    @property
+    def shedder(self) -> Optional[LoadShedder]:
+        return self._shedder
+
+    async def start(self, *args, **kwargs) -> None:
+        self._log_writer.start()
+        self._archive_writer.start()
+        self._watchdog = self.__get_watchdog__()
+        if self._shedder: self._shedder.start()
+        await self.__start_metrics_server__()
+        await super().start(*args, **kwargs)
+
+    async def login(self, *args, **kwargs) -> None:
+        await super().login(*args, **kwargs)
+        # the http session is created on login; discord.py doesn't expose it, nor accept trace configs
+        if self._budget and not self._budget.attach(getattr(self.http, '_HTTPClient__session', None)):
+            log.warning('Could not read rate limit headers; background REST calls are only held to the global limit')
+
+    async def close(self) -> None:
+        await super().close()
+        self._log_writer.close()
+        self._archive_writer.close()
+        if self._blobs: await self._blobs.close()
+        self._scheduler.stop()
+        self._outbox.close()
+        self._pipeline.close()
+        if self._shedder: self._shedder.stop()
+        if self._reloader: self._reloader.stop()
+        self._executors.shutdown()
+        if self._watchdog: self._watchdog.stop()
+        if self._metrics_server: await self._metrics_server.stop()
 
     async def on_ready(self):
-        self._archive: ClientArchive = ClientArchive(Path('./archive'), self)
+        self._archive: ClientArchive = ClientArchive(Path('./archive'), self, self.__get_blobs__(), self._archive_writer)
         await self.__on_ready__()
 
     async def on_message(self, message: Message):
@@ -54,9 +187,26 @@ class Core(Client):
     async def __on_ready__(self):
         try:
             if not self._settings.client.data.components: raise HandlerError('No components directory provided.')
-            self._handler.load(self._settings.client.data.components, extension='py', client=self, settings=self._settings)
+            mode: str = self._settings.client.data.loader
+            # load the components through the router on every ready event
+            if mode == 'router':
+                if self._settings.client.data.hot_reload: log.warning('Hot reload requires the eager or lazy loader; components will not be reloaded')
+                start: float = time.perf_counter()
+                self._handler.load(self._settings.client.data.components, extension='py', client=self, settings=self._settings, executors=self._executors, outbox=self._outbox, pipeline=self._pipeline)
+                self._report.total = time.perf_counter() - start
+            # register the components once, importing them eagerly or on first use
+            elif not self._loader:
+                self._loader = ComponentLoader(self._settings.client.data.components, mode=mode, parameter_prefix=self._handler._parameter_prefix, client=self, settings=self._settings, executors=self._executors, outbox=self._outbox, pipeline=self._pipeline)
+                self._loader.load()
+                self._handler.attach(self._loader)
+                # watch the components directory for changes
+                if self._settings.client.data.hot_reload:
+                    self._reloader = HotReloader(self._loader, self._handler, directory=self._settings.client.data.components, interval=self._settings.client.data.reload_interval)
+                    self._reloader.start()
+            # responses built from the previous components are stale
+            RESPONSES.invalidate()
             self._handler.addLimiter(self._limiter)
-        except HandlerError as error:
+        except (HandlerError, ValueError) as error:
             log.warning(error)
 
         try:
@@ -71,77 +221,235 @@ class Core(Client):
         # if the provided message parameter was not a message
         if not isinstance(message, Message):
             return
-        # log the message
-        self.__log_message__(message)
-        # archive the message
-        self.__archive_message__(message)
-        # if the message author is the bot
-        if message.author.id == self.user.id:
-            return
+        # count the message
+        MESSAGES.inc()
         try:
-            prefix: Optional[str] = self._settings.for_guild(message.guild).ux.prefix if message.guild else None
-            context: Context = Context(
-                self,
-                message,
-                self._settings,
-                self._archive,
-                self._timestamp,
-                self._handler._packages,
-            )
-            # process the message
-            if prefix: await self._handler.handle(prefix, message, context=context)
+            # pass the message through each stage
+            await self._pipeline.run(Envelope(message))
+        except (LaneFullError, OverloadedError) as error:
+            await message.reply(str(error))
         except MissingPrefixError:
             pass
         except HandlerError as error:
             log.error(error)
 
+    def __get_pipeline__(self) -> Pipeline:
+        pipeline: Pipeline = Pipeline()
+        pipeline.add('log', self.__log_stage__, order=100, mode=ASYNC)
+        pipeline.add('archive', self.__archive_stage__, order=200, mode=ASYNC)
+        pipeline.add('author', self.__author_stage__, order=300)
+        pipeline.add('command', self.__command_stage__, order=400)
+        pipeline.add('admit', self.__admit_stage__, order=500)
+        pipeline.add('dispatch', self.__dispatch_stage__, order=900)
+        return pipeline
+
+    async def __log_stage__(self, envelope: Envelope) -> None:
+        # only queues the message; the log writer thread writes it
+        self.__log_message__(envelope.message)
+
+    async def __archive_stage__(self, envelope: Envelope) -> None:
+        # only queues the message; the archive writer thread writes it
+        self.__archive_message__(envelope.message)
+
+    def __author_stage__(self, envelope: Envelope) -> bool:
+        # stop if the message author is the bot
+        return envelope.message.author.id != self.user.id
+
+    def __command_stage__(self, envelope: Envelope) -> bool:
+        message: Message = envelope.message
+        envelope.prefix = self._settings.for_guild(message.guild).ux.prefix if message.guild else None
+        # reject non-command messages before allocating a context
+        if not envelope.prefix or not message.content.startswith(envelope.prefix): return False
+        # resolve the invoked command
+        envelope.invocation = self._handler.resolve(envelope.prefix, message.content)
+        if not envelope.invocation: return False
+        envelope.context = Context(
+            self,
+            message,
+            self._settings,
+            self._archive,
+            self._timestamp,
+            self._handler.packages,
+            self._handler.index,
+        )
+        return True
+
+    async def __admit_stage__(self, envelope: Envelope) -> None:
+        # refuse or defer expensive commands while overloaded
+        if self._shedder and envelope.invocation: await self._shedder.admit(self._scheduler.lane(envelope.invocation.key).name)
+
+    async def __dispatch_stage__(self, envelope: Envelope) -> None:
+        message: Message = envelope.message
+        invocation: Optional[Invocation] = envelope.invocation
+        context: Optional[Context] = envelope.context
+        if not invocation or not context: return
+        # process the message in the command's lane
+        guild_id: int = message.guild.id if message.guild else 0
+        submit = lambda: self._scheduler.submit(invocation.key, guild_id, lambda: self._handler.handle(invocation, message, context=context))
+        scope: Optional[str] = scope_of(invocation.key)
+        # share a queued or running duplicate's execution instead of repeating it
+        if scope: await self._flights.do(self.__flight_key__(invocation, message, scope), submit, label=invocation.name)
+        else: await submit()
+
+    def __flight_key__(self, invocation: Invocation, message: Message, scope: str) -> Tuple:
+        # key the invocation by command, normalized arguments and the scope its result is shared in
+        guild_id: int = message.guild.id if message.guild else 0
+        if scope == CHANNEL: target: Tuple = (guild_id, message.channel.id)
+        elif scope == AUTHOR: target = (guild_id, message.channel.id, message.author.id)
+        else: target = (guild_id, )
+        return (invocation.key, normalize(invocation.message), target)
+
+    def __get_blobs__(self) -> Optional[BlobStore]:
+        # reuse the blob store across reconnects
+        if self._blobs: return self._blobs
+        # if the blob store is not enabled, return None
+        if not self._settings.client.blobs.enabled: return None
+        # get the blob settings
+        directory: Optional[Path] = self._settings.client.blobs.directory
+        workers: Optional[int] = self._settings.client.blobs.workers
+        max_size: Optional[int] = self._settings.client.blobs.max_size
+        quota: Optional[int] = self._settings.client.blobs.quota
+        # create the blob store, falling back to defaults for missing settings
+        blobs: BlobStore = BlobStore(
+            directory if directory else Path('./archive/blobs'),
+            workers=workers if workers else 4,
+            max_size=max_size if max_size else 8 << 20,
+            quota=quota if quota else 1 << 30,
+            index=self.scope(Path('index.db')).name,
+        )
+        # start the download workers
+        blobs.start()
+        self._blobs = blobs
+        return blobs
+
+    def __register_metrics__(self) -> None:
+        # read queue depths and loop health from their owners when the metrics are rendered
+        metrics.gauge('log_writer_queue_depth', 'Messages waiting to be written to channel logs', function=lambda: self._log_writer.depth)
+        metrics.gauge('log_writer_dropped', 'Messages dropped because the log writer queue was full', function=lambda: self._log_writer.dropped)
+        metrics.gauge('archive_writer_queue_depth', 'Messages waiting to be written to channel archives', function=lambda: self._archive_writer.depth)
+        metrics.gauge('archive_writer_dropped', 'Messages written on the event loop because the archive writer queue was full', function=lambda: self._archive_writer.dropped)
+        metrics.gauge('blob_queue_depth', 'Attachments waiting to be downloaded', function=lambda: self._blobs.depth if self._blobs else 0)
+        metrics.gauge('executor_jobs_waiting', 'Jobs waiting for a slot in each executor pool', ('pool', ), function=lambda: {(name, ): pool.statistics.waiting for name, pool in self._executors.pools.items()})
+        metrics.gauge('executor_jobs_running', 'Jobs running in each executor pool', ('pool', ), function=lambda: {(name, ): pool.statistics.running for name, pool in self._executors.pools.items()})
+        metrics.gauge('executor_wait_seconds', 'Total time jobs spent waiting for a slot in each executor pool', ('pool', ), function=lambda: {(name, ): pool.statistics.wait_time for name, pool in self._executors.pools.items()})
+        metrics.gauge('executor_run_seconds', 'Total time jobs spent running in each executor pool', ('pool', ), function=lambda: {(name, ): pool.statistics.run_time for name, pool in self._executors.pools.items()})
+        metrics.gauge('scheduler_queue_depth', 'Commands queued in each scheduler lane', ('lane', ), function=lambda: {(name, ): lane.depth for name, lane in self._scheduler.lanes.items()})
+        metrics.gauge('scheduler_running', 'Commands running in each scheduler lane', ('lane', ), function=lambda: {(name, ): lane.running for name, lane in self._scheduler.lanes.items()})
+        metrics.gauge('load_shedding_active', 'Whether expensive commands are being shed', function=lambda: int(self._shedder.shedding) if self._shedder else 0)
+        metrics.gauge('outbound_queue_depth', 'Messages and reactions waiting to be sent', function=lambda: self._outbox.depth)
+        metrics.gauge('rest_background_rate', 'Background REST calls currently allowed per second', function=lambda: self._budget.background_rate if self._budget else 0)
+        metrics.gauge('pipeline_pending_stages', 'Background message pipeline stages still running', function=lambda: self._pipeline.pending)
+        metrics.gauge('commands_running', 'Commands currently running', function=lambda: len(self._handler.running))
+        metrics.gauge('typing_requests_saved', 'Typing requests avoided by deferring the typing indicator', function=lambda: self._handler._typing.saved)
+        metrics.gauge('event_loop_lag_seconds', 'The most recently measured event loop lag', function=lambda: self._watchdog.lag if self._watchdog else 0.0)
+        metrics.gauge('event_loop_stalls', 'Event loop stalls recorded by the watchdog', function=lambda: self._watchdog.stalls if self._watchdog else 0)
+
+    async def __start_metrics_server__(self) -> None:
+        # serve the metrics once, if enabled
+        if self._metrics_server or not self._settings.client.metrics.enabled: return
+        # each shard process serves on its own port
+        port: int = self._settings.client.metrics.port + (self._shard.index if self._shard else 0)
+        server: MetricsServer = MetricsServer(metrics.REGISTRY, host=self._settings.client.metrics.host, port=port)
+        try:
+            await server.start()
+            self._metrics_server = server
+        except OSError as error:
+            log.error('Could not serve metrics: %s', error)
+
+    def __get_watchdog__(self) -> Optional[LoopWatchdog]:
+        # reuse the watchdog across restarts
+        if self._watchdog: return self._watchdog
+        # load shedding reads the loop lag from the watchdog, so run it whenever shedding is enabled
+        if not self._settings.client.watchdog.enabled and not self._shedder: return None
+        if not self._settings.client.watchdog.enabled: log.info('Starting the loop watchdog to measure loop lag for load shedding')
+        watchdog: LoopWatchdog = LoopWatchdog(
+            self.loop,
+            self._handler.running,
+            interval=self._settings.client.watchdog.interval,
+            threshold=self._settings.client.watchdog.threshold,
+            file=self.scope(self._settings.client.watchdog.file),
+        )
+        watchdog.start()
+        return watchdog
+
+    def __get_intents__(self) -> Tuple[Intents, MemberCacheFlags]:
+        # an invalid intent list is fatal; connecting with the wrong intents fails silently later
+        intents: Intents = gateway.intents(self._settings.client.gateway.intents)
+        try:
+            return intents, gateway.member_cache(self._settings.client.gateway.member_cache, intents)
+        except GatewayConfigurationError as error:
+            log.warning('%s; caching the members the intents allow', error)
+            return intents, MemberCacheFlags.from_intents(intents)
+
+    def __get_budget__(self) -> Optional[RestBudget]:
+        # if the REST budget is not enabled, return None
+        if not self._settings.client.rest.enabled: return None
+        budget: RestBudget = RestBudget(reserve=self._settings.client.rest.reserve, rate=self._settings.client.rest.rate)
+        budget.install(self.http)
+        return budget
+
+    def __get_executors__(self) -> Executors:
+        # get the executor settings, falling back to defaults for missing settings
+        io_workers: Optional[int] = self._settings.client.executors.io_workers
+        cpu_workers: Optional[int] = self._settings.client.executors.cpu_workers
+        process_workers: Optional[int] = self._settings.client.executors.process_workers
+        return Executors(
+            io_workers=io_workers if io_workers else 16,
+            cpu_workers=cpu_workers if cpu_workers else 4,
+            process_workers=process_workers if process_workers else 2,
+            io_limit=self._settings.client.executors.io_limit,
+            cpu_limit=self._settings.client.executors.cpu_limit,
+            process_limit=self._settings.client.executors.process_limit,
+        )
+
+    def __get_shedder__(self) -> Optional[LoadShedder]:
+        # if load shedding is not enabled, return None
+        if not self._settings.client.shedding.enabled: return None
+        return LoadShedder(
+            # a blocked loop hasn't measured its lag yet, so count the heartbeat that is waiting
+            lambda: max(self._watchdog.lag, self._watchdog.pending) if self._watchdog else 0.0,
+            lambda: self._scheduler.depth,
+            lag_threshold=self._settings.client.shedding.lag,
+            depth_threshold=self._settings.client.shedding.depth,
+            recovery=self._settings.client.shedding.recovery,
+            hold=self._settings.client.shedding.hold,
+            lanes=self._settings.client.shedding.lanes,
+            action=self._settings.client.shedding.action,
+            defer_timeout=self._settings.client.shedding.defer_timeout,
+        )
+
+    def __get_scheduler__(self) -> Scheduler:
+        # workers, queue capacity and per-guild concurrency of each lane
+        defaults: Dict[str, Tuple[int, int, int]] = {
+            LIGHT: (8, 256, 4),
+            HEAVY: (2, 32, 1),
+            EXTERNAL: (4, 64, 2),
+        }
+        lanes: Dict[str, Lane] = dict()
+        for name in LANES:
+            workers, capacity, concurrency = defaults[name]
+            # get the lane settings, falling back to defaults for missing settings
+            configured_workers: Optional[int] = getattr(self._settings.client.scheduler, f'{name}_workers')
+            configured_capacity: Optional[int] = getattr(self._settings.client.scheduler, f'{name}_queue')
+            configured_concurrency: Optional[int] = getattr(self._settings.client.scheduler, f'{name}_concurrency')
+            lanes[name] = Lane(
+                name,
+                workers=configured_workers if configured_workers else workers,
+                capacity=configured_capacity if configured_capacity else capacity,
+                concurrency=configured_concurrency if configured_concurrency else concurrency,
+            )
+        return Scheduler(lanes)
 
     def __archive_message__(self, message: Message):
         self._archive.save(message)
 
     def __log_message__(self, message: Message):
-        # get the message author
-        user: Union[User, Member] = message.author
-        # get a logger for the channel
-        logger: Optional[Logger] = self.__get_logger__(message.channel)
-        # if a logger was found, log the message
-        if logger:
-            logger.info("%s#%s -> %s", user.name, user.discriminator, message.clean_content)
-
-    def __get_logger__(self, channel: Union[TextChannel, DMChannel, GroupChannel]) -> Optional[Logger]:
-        logger: Optional[Logger] = None
-        try:
-            path: Path = Path(f"./logs/{channel.id}.log").resolve()
-            if not path.parent.exists():
-                path.parent.mkdir(parents=True, exist_ok=True)
-            if not path.exists():
-                path.touch(exist_ok=True)
-            logger = self._loggers[channel.id]
-        except KeyError:
-            logger = logging.getLogger(str(channel.id))
-            handler: FileHandler = FileHandler(path)
-            formatter: Formatter = Formatter("[%(asctime)s] %(message)s")
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-            self._loggers[channel.id] = logger
-        finally:
-            return logger
+        # queue the message for the channel log writer
+        self._log_writer.write(message)
 
     def filter(self, parameter_matches: List[str]) -> List[str]:
         """
         A parameter match filter for the message handler.
         """
-        # strip any user mention strings down to the author's id
-        parameter_matches = [
-            re.sub(r"<@!", "", parameter_match) for parameter_match in parameter_matches
-        ]
-        # strip any user mention strings down to the author's id (mobile)
-        parameter_matches = [
-            re.sub(r"<@", "", parameter_match) for parameter_match in parameter_matches
-        ]
-        # strip any voice channel mention strings down to the channel's id
-        parameter_matches = [
-            re.sub(r"<#", "", parameter_match) for parameter_match in parameter_matches
-        ]
-        return parameter_matches
-
+        # strip any user and channel mention strings down to their ids
+        return self._handler._dispatcher.normalize(parameter_matches)
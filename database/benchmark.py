@@ -0,0 +1,121 @@
+"""
+Benchmarks the storage profiles against synthetic channel archives.
+
+Usage:
+    python -m database.benchmark [--channels N] [--messages N] [--live N] [--profiles a,b,...]
+
+For each profile, a fresh set of channel archives is created in a temporary directory and
+the following workloads are timed:
+    - live:   single message inserts with a commit per message, as done for incoming messages
+    - bulk:   batched inserts in a single transaction, as done by archive imports
+    - count:  per-author message counts, as done by the analytics commands
+    - search: substring searches over message content
+    - lookup: random point lookups by message ID
+    - stream: a full ordered scan of every archive
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from random import Random
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from database.profile import PROFILES
+from providers.channelArchive import ChannelArchive
+from providers.messageEntry import AttachmentEntry, MessageEntry
+
+WORDS: List[str] = 'the a bot message archive guild channel hello world discord python sqlite query benchmark profile journal cache memory'.split()
+"""The vocabulary used to generate message content"""
+
+
+def generate(random: Random, count: int, start: int) -> List[MessageEntry]:
+    """
+    Generates synthetic message entries with increasing snowflake IDs
+    """
+    entries: List[MessageEntry] = list()
+    timestamp: datetime = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    for index in range(count):
+        id: int = start + (index << 22)
+        content: str = ' '.join(random.choice(WORDS) for _ in range(random.randint(1, 30)))
+        entry: MessageEntry = MessageEntry(id, random.randint(1, 50), content, timestamp + timedelta(seconds=index))
+        if random.random() < 0.05: entry._attachments = [AttachmentEntry(id + 1, f'https://cdn.discordapp.com/attachments/{id}/image.png')]
+        entries.append(entry)
+    return entries
+
+
+def measure(function: Callable[[], None]) -> float:
+    """
+    Returns the wall-clock time taken by the function in seconds
+    """
+    start: float = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(profile: str, *, channels: int, messages: int, live: int, seed: int) -> Dict[str, float]:
+    """
+    Runs every workload against fresh archives using the profile
+    """
+    random: Random = Random(seed)
+    results: Dict[str, float] = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        archives: List[ChannelArchive] = [ChannelArchive(Path(directory), SimpleNamespace(id=index), profile=profile) for index in range(channels)]
+        datasets: List[List[MessageEntry]] = [generate(random, messages, 1 << 40) for _ in archives]
+
+        def ingest_live() -> None:
+            for archive, entries in zip(archives, datasets):
+                for entry in entries[:live]: archive[entry.id] = entry
+
+        def ingest_bulk() -> None:
+            for archive, entries in zip(archives, datasets):
+                for offset in range(live, len(entries), 1000): archive.insert(entries[offset:offset + 1000])
+
+        def count() -> None:
+            for archive in archives:
+                archive._connection.execute('SELECT AuthorID, COUNT(*) FROM Messages GROUP BY AuthorID').fetchall()
+
+        def search() -> None:
+            for archive in archives:
+                for word in WORDS[:5]: archive._connection.execute('SELECT COUNT(*) FROM Messages WHERE Content LIKE ?', (f'%{word}%', )).fetchall()
+
+        def lookup() -> None:
+            for archive, entries in zip(archives, datasets):
+                for entry in random.sample(entries, min(len(entries), 500)): archive[entry.id]
+
+        def stream() -> None:
+            for archive in archives:
+                for _ in archive.stream(size=1000): pass
+
+        results['live'] = measure(ingest_live)
+        results['bulk'] = measure(ingest_bulk)
+        results['count'] = measure(count)
+        results['search'] = measure(search)
+        results['lookup'] = measure(lookup)
+        results['stream'] = measure(stream)
+
+        for archive in archives: archive._connection.close()
+    return results
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Benchmarks the sqlite storage profiles.')
+    parser.add_argument('--channels', type=int, default=4, help='the number of channel archives per profile')
+    parser.add_argument('--messages', type=int, default=20000, help='the number of messages per channel')
+    parser.add_argument('--live', type=int, default=500, help='the number of messages per channel inserted one at a time')
+    parser.add_argument('--profiles', type=str, default=','.join(PROFILES), help='a comma separated list of profiles to run')
+    parser.add_argument('--seed', type=int, default=0, help='the seed for synthetic data generation')
+    arguments: argparse.Namespace = parser.parse_args()
+
+    workloads: List[str] = ['live', 'bulk', 'count', 'search', 'lookup', 'stream']
+    print(f'{arguments.channels} channels x {arguments.messages} messages ({arguments.live} live inserts per channel)')
+    print(f'{"profile":<10}' + ''.join(f'{workload:>10}' for workload in workloads))
+    for profile in arguments.profiles.split(','):
+        results: Dict[str, float] = run(profile.strip(), channels=arguments.channels, messages=arguments.messages, live=arguments.live, seed=arguments.seed)
+        print(f'{profile:<10}' + ''.join(f'{results[workload]:>9.3f}s' for workload in workloads))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,19 @@
 
-import sqlite3
 from pathlib import Path
 from sqlite3 import Connection, Row
-from typing import List, Type
+from typing import List, Optional, Type
 
+from database.profile import connect
 from database.storable import TStorable
 from database.table import Table
 
 
 class Database():
 
-    def __init__(self, reference: Path) -> None:
+    PROFILE: str = 'durable'
+    """The storage profile applied to the database connection"""
+
+    def __init__(self, reference: Path, *, profile: Optional[str] = None) -> None:
         # create an absolute reference to the database
         self._database: Path = reference.absolute()
         # if the parent directory does not exist, create it
@@ -18,8 +21,8 @@ class Database():
         # if the database file does not exist, create it
         if not self._database.exists(): self._database.touch(exist_ok=True)
 
-        # connect to the database
-        self._connection: Connection = sqlite3.connect(self._database)
+        # connect to the database with the storage profile
+        self._connection: Connection = connect(self._database, profile if profile else self.PROFILE)
         # set the connection's row factory
         self._connection.row_factory = Row
 
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from sqlite3 import Connection
+from typing import Dict, List
+
+
+class StorageProfile():
+    """
+    A named set of sqlite connection settings applied when a connection is opened.
+    """
+
+    def __init__(self, name: str, *, journal_mode: str, synchronous: str, cache_size: int, mmap_size: int, temp_store: str) -> None:
+        self._name: str = name
+        self._journal_mode: str = journal_mode
+        self._synchronous: str = synchronous
+        self._cache_size: int = cache_size
+        self._mmap_size: int = mmap_size
+        self._temp_store: str = temp_store
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def cache_bytes(self) -> int:
+        """
+        The most memory a connection's page cache may use, assuming 4 KiB pages
+        """
+        # a negative cache size is in KiB, a positive one in pages
+        return -self._cache_size * 1024 if self._cache_size < 0 else self._cache_size * 4096
+
+    def __pragmas__(self) -> List[str]:
+        """
+        Returns the PRAGMA statements that apply the profile
+        """
+        return [
+            f'PRAGMA journal_mode = {self._journal_mode}',
+            f'PRAGMA synchronous = {self._synchronous}',
+            f'PRAGMA cache_size = {self._cache_size}',
+            f'PRAGMA mmap_size = {self._mmap_size}',
+            f'PRAGMA temp_store = {self._temp_store}',
+        ]
+
+    def apply(self, connection: Connection) -> None:
+        """
+        Applies the profile's settings to the connection
+        """
+        for pragma in self.__pragmas__():
+            connection.execute(pragma)
+
+    def __str__(self) -> str:
+        return f'{self._name} (journal_mode={self._journal_mode}, synchronous={self._synchronous}, cache_size={self._cache_size}, mmap_size={self._mmap_size}, temp_store={self._temp_store})'
+
+
+PROFILES: Dict[str, StorageProfile] = {
+    # sqlite's compiled-in defaults
+    'default': StorageProfile('default', journal_mode='DELETE', synchronous='FULL', cache_size=-2000, mmap_size=0, temp_store='DEFAULT'),
+    # small, rarely written databases where every commit must survive power loss
+    'durable': StorageProfile('durable', journal_mode='WAL', synchronous='FULL', cache_size=-2000, mmap_size=0, temp_store='DEFAULT'),
+    # many append-heavy databases opened at once; commits survive crashes but may roll back on power loss
+    'archive': StorageProfile('archive', journal_mode='WAL', synchronous='NORMAL', cache_size=-4000, mmap_size=64 << 20, temp_store='MEMORY'),
+    # one-off bulk loads that can be rerun from their source if interrupted
+    'bulk': StorageProfile('bulk', journal_mode='MEMORY', synchronous='OFF', cache_size=-64000, mmap_size=256 << 20, temp_store='MEMORY'),
+}
+"""The named storage profiles available to database classes"""
+
+
+def connect(reference: Path, profile: str) -> Connection:
+    """
+    Opens a connection to the database and applies the named storage profile
+    """
+    # get the storage profile
+    try:
+        storage_profile: StorageProfile = PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown storage profile '{profile}'; expected one of {', '.join(PROFILES)}")
+    # connect to the database
+    connection: Connection = sqlite3.connect(reference)
+    # apply the storage profile
+    storage_profile.apply(connection)
+    return connection
@@ -0,0 +1,170 @@
+import logging
+import re
+import typing
+from functools import lru_cache
+from logging import Logger
+from re import Match, Pattern
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from router.packaging import Component, Package
+
+import metrics
+
+log: Logger = logging.getLogger(__name__)
+
+MENTION_PATTERN: Pattern = re.compile(r'<(?:@!?|#)')
+"""Matches the opening of user (desktop and mobile) and channel mention strings"""
+
+
+class ArgumentError(ValueError):
+    """Raised when a command's arguments can't be parsed or converted."""
+
+
+@lru_cache(maxsize=None)
+def _parameter_pattern(parameter_prefix: str) -> Pattern:
+    # match parameter names preceded by the parameter prefix and surrounded by whitespace
+    return re.compile(r'(?:^|\s)' + re.escape(parameter_prefix) + r'([A-Za-z_]\w*)(?=\s|$)')
+
+
+def split_arguments(text: str, parameter_prefix: str) -> Dict[str, str]:
+    """
+    Splits the text following a command name into the raw value given for each parameter.
+    A parameter given without a value maps to an empty string.
+    Raises ArgumentError for text that isn't attached to a parameter.
+    """
+    matches: List[Match[str]] = list(_parameter_pattern(parameter_prefix).finditer(text))
+    # reject text that isn't attached to a parameter
+    leading: str = text[:matches[0].start() if matches else len(text)].strip()
+    if leading: raise ArgumentError(f"'{leading}' is not attached to a parameter")
+
+    arguments: Dict[str, str] = dict()
+    for index, match in enumerate(matches):
+        end: int = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        arguments[match.group(1)] = text[match.end():end].strip()
+    return arguments
+
+
+def convert(annotation: Any, value: str) -> Any:
+    """
+    Converts a raw parameter value to the parameter's annotated type.
+    Mention strings are stripped down to their IDs. Unions are tried in order,
+    and unannotated parameters receive the value as a string.
+    Raises ArgumentError if the value can't be converted.
+    """
+    # a flag given without a value is set
+    if annotation is bool: return value.lower() != str(False).lower() if value else True
+    # strip user and channel mention strings down to their IDs
+    value = MENTION_PATTERN.sub('', value)
+    if annotation in (None, Any, str) or isinstance(annotation, str): return value
+    # try each type of a union, such as Optional[int] or Union[int, str], in order
+    if typing.get_origin(annotation) is Union:
+        for argument in typing.get_args(annotation):
+            if argument is type(None): continue
+            try: return convert(argument, value)
+            except ArgumentError: continue
+        raise ArgumentError(f"'{value}' is not a valid {annotation}")
+    if annotation in (int, float):
+        try: return annotation(value)
+        except ValueError as error: raise ArgumentError(f"'{value}' is not a valid {annotation.__name__}") from error
+    return value
+
+
+class Invocation():
+    """
+    A command invocation resolved from a message.
+    """
+
+    def __init__(self, prefix: str, name: str, message: str, command: Optional[Tuple[Package, Component, Any]]) -> None:
+        self._prefix: str = prefix
+        self._name: str = name
+        self._message: str = message
+        self._command: Optional[Tuple[Package, Component, Any]] = command
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def message(self) -> str:
+        """
+        The message content with the prefix removed.
+        """
+        return self._message
+
+    @property
+    def command(self) -> Optional[Tuple[Package, Component, Any]]:
+        """
+        The (package, component, command) the name resolved to, or None if no command has the name.
+        """
+        return self._command
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """
+        The (component, command) names of the resolved command, which tell apart commands
+        sharing a name across components. The component is empty if no command has the name.
+        """
+        return (self._command[1].name if self._command else '', self._name)
+
+
+class Dispatcher():
+    """
+    Resolves command names from message content using cached, precompiled prefix matchers
+    and a hash lookup of the loaded commands.
+    """
+
+    def __init__(self) -> None:
+        # create the compiled matcher cache, keyed by prefix
+        self._matchers: Dict[str, Pattern] = dict()
+        # create the command lookup, keyed by command name
+        self._commands: Dict[str, Tuple[Package, Component, Any]] = dict()
+
+    def index(self, packages: Dict[str, Package]) -> None:
+        """
+        Rebuilds the command lookup from the loaded packages.
+        """
+        commands: Dict[str, Tuple[Package, Component, Any]] = dict()
+        for package in packages.values():
+            for component in package.values():
+                for command in component.values():
+                    if command.name in commands: log.warning('Command %s is defined by multiple components', command.name)
+                    commands[command.name] = (package, component, command)
+        self._commands = commands
+
+    def matcher(self, prefix: str) -> Pattern:
+        """
+        Returns the compiled matcher for the prefix, compiling it on first use.
+        """
+        try:
+            pattern: Pattern = self._matchers[prefix]
+            metrics.cache_hit('prefix_matchers')
+            return pattern
+        except KeyError:
+            metrics.cache_miss('prefix_matchers')
+            pattern: Pattern = re.compile(re.escape(prefix) + r'(\w+)')
+            self._matchers[prefix] = pattern
+            return pattern
+
+    def resolve(self, prefix: str, content: str) -> Optional[Invocation]:
+        """
+        Resolves the invocation in the message content.
+        Returns None if the content does not begin with the prefix followed by a command name.
+        """
+        # reject non-command messages before doing any other work
+        if not content.startswith(prefix): return None
+        # match the command name following the prefix
+        match: Optional[Match[str]] = self.matcher(prefix).match(content)
+        if not match: return None
+        # get the command name
+        name: str = match.group(1)
+        return Invocation(prefix, name, content[len(prefix):], self._commands.get(name))
+
+    def normalize(self, parameters: List[str]) -> List[str]:
+        """
+        Strips user and channel mention strings down to their IDs in a single pass.
+        """
+        return [MENTION_PATTERN.sub('', parameter) for parameter in parameters]
@@ -0,0 +1,163 @@
+"""
+Named worker pools shared by every component, so blocking and CPU-heavy work stays off the event loop.
+
+Components receive an Executors instance as kwargs['executors'] and run work with
+    result = await executors.offload('io', function, *args, **kwargs)
+
+The available pools are:
+    - io:      threads for blocking network and disk calls (youtube_dl, openai)
+    - cpu:     threads for work that releases the GIL (torch, matplotlib rendering)
+    - process: processes for pure Python CPU work (markovify model builds);
+               functions and arguments must be picklable
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from asyncio import AbstractEventLoop, Semaphore
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from logging import Logger
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+log: Logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class PoolStatistics():
+    """
+    Counts the jobs run by a pool and the time they spent waiting and running.
+    """
+
+    def __init__(self) -> None:
+        self.submitted: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.cancelled: int = 0
+        self.waiting: int = 0
+        self.running: int = 0
+        self.wait_time: float = 0.0
+        self.run_time: float = 0.0
+
+
+class Pool():
+    """
+    An executor with a limit on the number of jobs admitted at once.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Executor], limit: int) -> None:
+        self._name: str = name
+        self._factory: Callable[[], Executor] = factory
+        self._limit: int = limit
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[Semaphore] = None
+        self._statistics: PoolStatistics = PoolStatistics()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def statistics(self) -> PoolStatistics:
+        return self._statistics
+
+    @property
+    def executor(self) -> Executor:
+        """
+        The pool's executor, created on first use.
+        """
+        if not self._executor: self._executor = self._factory()
+        return self._executor
+
+    @property
+    def semaphore(self) -> Semaphore:
+        """
+        The admission semaphore, created on first use from the event loop.
+        """
+        if not self._semaphore: self._semaphore = Semaphore(self._limit)
+        return self._semaphore
+
+    def shutdown(self) -> None:
+        if self._executor: self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+class Executors():
+    """
+    The shared worker pools.
+    """
+
+    def __init__(self, *, io_workers: int = 16, cpu_workers: int = 4, process_workers: int = 2, io_limit: Optional[int] = None, cpu_limit: Optional[int] = None, process_limit: Optional[int] = None) -> None:
+        self._pools: Dict[str, Pool] = {
+            'io': Pool('io', lambda: ThreadPoolExecutor(io_workers, thread_name_prefix='io'), io_limit if io_limit else io_workers),
+            'cpu': Pool('cpu', lambda: ThreadPoolExecutor(cpu_workers, thread_name_prefix='cpu'), cpu_limit if cpu_limit else cpu_workers),
+            # spawn workers rather than forking a process with running threads
+            'process': Pool('process', lambda: ProcessPoolExecutor(process_workers, mp_context=multiprocessing.get_context('spawn')), process_limit if process_limit else process_workers),
+        }
+
+    @property
+    def pools(self) -> Dict[str, Pool]:
+        return self._pools
+
+    async def offload(self, name: str, function: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Runs the function in the named pool and returns its result.
+
+        Waits for a free slot if the pool is at its limit. Cancelling the caller cancels
+        the job if it hasn't started; a job that already started runs to completion,
+        holding its slot, and its result is discarded.
+        """
+        try:
+            pool: Pool = self._pools[name]
+        except KeyError:
+            raise ValueError(f"Unknown pool '{name}'; expected one of {', '.join(self._pools)}")
+        statistics: PoolStatistics = pool.statistics
+        loop: AbstractEventLoop = asyncio.get_running_loop()
+
+        # wait for a free slot
+        queued: float = time.perf_counter()
+        statistics.waiting += 1
+        try:
+            await pool.semaphore.acquire()
+        finally:
+            statistics.waiting -= 1
+        started: float = time.perf_counter()
+        statistics.wait_time += started - queued
+        statistics.submitted += 1
+
+        try:
+            future: Future = pool.executor.submit(functools.partial(function, *args, **kwargs))
+        except BaseException:
+            pool.semaphore.release()
+            raise
+        statistics.running += 1
+
+        def complete(future: Future, finished: float) -> None:
+            statistics.running -= 1
+            statistics.run_time += finished - started
+            if future.cancelled(): statistics.cancelled += 1
+            elif future.exception(): statistics.failed += 1
+            else: statistics.completed += 1
+            # release the slot when the job finishes, not when the caller stops waiting
+            pool.semaphore.release()
+
+        def finish(future: Future) -> None:
+            # runs on the worker thread, or on the loop if the job was cancelled before starting
+            try: loop.call_soon_threadsafe(complete, future, time.perf_counter())
+            except RuntimeError: pass
+        future.add_done_callback(finish)
+
+        # cancelling the wrapper cancels the job if it hasn't started
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """
+        Cancels queued jobs and stops every pool without waiting for running jobs.
+        """
+        for pool in self._pools.values(): pool.shutdown()
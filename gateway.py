@@ -0,0 +1,78 @@
+"""
+Builds the gateway intents and member cache flags from their settings.
+
+Intents are written as a comma separated list of discord.Intents flag names, optionally
+starting from a preset ('all', 'default' or 'none'). A name prefixed with '-' is removed:
+
+    intents = default, -typing, -integrations
+
+The member cache is written as a list of discord.MemberCacheFlags names ('online', 'voice',
+'joined'), 'none' to cache no members beyond those in messages, or 'auto' to cache what
+the intents allow.
+"""
+
+import logging
+from logging import Logger
+from typing import List
+
+from discord import Intents, MemberCacheFlags
+
+log: Logger = logging.getLogger(__name__)
+
+PRESETS = {
+    'all': Intents.all,
+    'default': Intents.default,
+    'none': Intents.none,
+}
+"""The intent presets a specification may start from"""
+
+REQUIRED_INTENTS = {
+    'online': 'presences',
+    'voice': 'voice_states',
+    'joined': 'members',
+}
+"""The intent each member cache flag depends on"""
+
+
+def intents(specification: str) -> Intents:
+    """
+    Returns the intents described by the specification.
+    Raises a GatewayConfigurationError for unknown intent names.
+    """
+    names: List[str] = [name.strip().lower() for name in specification.split(',') if name.strip()]
+    # start from a preset, or from no intents if the list only names flags
+    result: Intents = PRESETS[names.pop(0)]() if names and names[0] in PRESETS else Intents.none()
+    for name in names:
+        enabled: bool = not name.startswith('-')
+        flag: str = name.lstrip('+-')
+        if flag not in Intents.VALID_FLAGS: raise GatewayConfigurationError(f"Unknown intent '{flag}'; expected one of {', '.join(sorted(Intents.VALID_FLAGS))}")
+        setattr(result, flag, enabled)
+    return result
+
+
+def member_cache(specification: str, intents: Intents) -> MemberCacheFlags:
+    """
+    Returns the member cache flags described by the specification.
+    Raises a GatewayConfigurationError for unknown flags, or flags the intents don't support.
+    """
+    names: List[str] = [name.strip().lower() for name in specification.split(',') if name.strip()]
+    if not names or names == ['auto']: return MemberCacheFlags.from_intents(intents)
+    if names == ['none']: return MemberCacheFlags.none()
+    if names == ['all']: return MemberCacheFlags.all()
+    flags: MemberCacheFlags = MemberCacheFlags.none()
+    for name in names:
+        if name not in MemberCacheFlags.VALID_FLAGS: raise GatewayConfigurationError(f"Unknown member cache flag '{name}'; expected one of {', '.join(sorted(MemberCacheFlags.VALID_FLAGS))}")
+        # discord.py refuses to cache members it would never be told about
+        required: str = REQUIRED_INTENTS.get(name, name)
+        if not getattr(intents, required, False): raise GatewayConfigurationError(f"Caching '{name}' members requires the '{required}' intent")
+        setattr(flags, name, True)
+    return flags
+
+
+class GatewayConfigurationError(Exception):
+    def __init__(self, message: str, exception: Exception = None):
+        self._message = message
+        self._inner_exception = exception
+
+    def __str__(self) -> str:
+        return self._message
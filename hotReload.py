@@ -0,0 +1,117 @@
+"""
+Reloads components whose source files change, without restarting the bot.
+
+The reloader polls the modification times of the component modules. A module is
+reloaded once it has stopped changing for one polling interval, so editors that write a
+file in several steps don't trigger a reload of a half-written module. Only the changed
+module is re-imported; modules it imports, such as components/models, are not.
+
+Hot reload needs the component loader (loader = eager or lazy).
+"""
+
+import asyncio
+import logging
+import time
+from asyncio import Task
+from collections import deque
+from datetime import datetime, timezone
+from logging import Logger
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from commandHandler import CommandHandler
+from loader import ComponentLoader
+from responseCache import RESPONSES
+
+log: Logger = logging.getLogger(__name__)
+
+
+class ReloadRecord():
+    """
+    The outcome of reloading a single module.
+    """
+
+    def __init__(self, module: str, elapsed: float, error: Optional[Exception] = None) -> None:
+        self.module: str = module
+        self.elapsed: float = elapsed
+        self.error: Optional[Exception] = error
+        self.timestamp: datetime = datetime.now(tz=timezone.utc)
+
+
+class HotReloader():
+    """
+    Watches the components directory and reloads changed modules.
+    """
+
+    def __init__(self, loader: ComponentLoader, handler: CommandHandler, *, directory: Path, interval: float = 1.0, history: int = 20) -> None:
+        self._loader: ComponentLoader = loader
+        self._handler: CommandHandler = handler
+        self._directory: Path = directory.resolve()
+        self._interval: float = interval
+        # the modification times of the modules as last loaded
+        self._mtimes: Dict[Path, int] = self.__snapshot__()
+        # the modification times of changed modules, seen one interval ago
+        self._pending: Dict[Path, Optional[int]] = dict()
+        self._history: Deque[ReloadRecord] = deque(maxlen=history)
+        self._task: Optional[Task] = None
+
+    @property
+    def history(self) -> List[ReloadRecord]:
+        """
+        The most recent reloads, oldest first.
+        """
+        return list(self._history)
+
+    def start(self) -> None:
+        if self._task: return
+        self._task = asyncio.create_task(self.__run__(), name='hot-reload')
+        log.info('Watching %s for component changes', self._directory)
+
+    def stop(self) -> None:
+        if self._task: self._task.cancel()
+        self._task = None
+
+    async def reload(self, reference: Path) -> ReloadRecord:
+        """
+        Reloads a module and re-registers the commands of every component.
+        """
+        start: float = time.perf_counter()
+        try:
+            await self._loader.reload(reference)
+            # rebuild the command lookup; the index only re-reads the reloaded package
+            self._handler.attach(self._loader)
+            # responses built from the previous component are stale
+            RESPONSES.invalidate()
+            record: ReloadRecord = ReloadRecord(reference.stem, time.perf_counter() - start)
+            log.info('Reloaded %s in %.1f ms', reference.name, record.elapsed * 1000)
+        except Exception as error:
+            record = ReloadRecord(reference.stem, time.perf_counter() - start, error)
+            log.error('Could not reload %s; keeping the previous version: %s', reference.name, error)
+        self._history.append(record)
+        return record
+
+    def __snapshot__(self) -> Dict[Path, int]:
+        return {reference: reference.stat().st_mtime_ns for reference in self._directory.glob('*.py') if not reference.stem.startswith('_')}
+
+    async def __run__(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                current: Dict[Path, int] = self.__snapshot__()
+            except OSError as error:
+                log.warning('Could not read %s: %s', self._directory, error)
+                continue
+            for reference in sorted(set(current) | set(self._mtimes)):
+                mtime: Optional[int] = current.get(reference)
+                if mtime == self._mtimes.get(reference):
+                    self._pending.pop(reference, None)
+                    continue
+                # wait until the file has stopped changing for an interval
+                if reference not in self._pending or self._pending[reference] != mtime:
+                    self._pending[reference] = mtime
+                    continue
+                del self._pending[reference]
+                # record the version even if it fails, so a broken file isn't retried until it changes again
+                if mtime is None: self._mtimes.pop(reference, None)
+                else: self._mtimes[reference] = mtime
+                await self.reload(reference)
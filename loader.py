@@ -0,0 +1,641 @@
+"""
+Loads components without the router, either eagerly or lazily.
+
+The components directory is first scanned with ast, which registers every component's
+commands without importing anything. In lazy mode, a component's module is imported and
+the component instantiated the first time one of its commands is invoked; in eager mode,
+every component is imported and instantiated up front. Either way, the time spent scanning,
+importing and initializing each component is recorded in a StartupReport.
+"""
+
+import ast
+import asyncio
+import importlib.util
+import inspect
+import logging
+import sys
+import time
+import typing
+from importlib.machinery import ModuleSpec
+from logging import Logger
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from router import HandlerError
+
+import scheduler
+import singleflight
+from dispatch import ArgumentError, convert, split_arguments
+
+log: Logger = logging.getLogger(__name__)
+
+MODES: List[str] = ['router', 'eager', 'lazy']
+"""The available component loading modes"""
+
+
+class ParameterSignature():
+    """
+    A keyword parameter of a command, read from its source.
+    """
+
+    def __init__(self, name: str, annotation: Optional[str], required: bool) -> None:
+        self._name: str = name
+        self._annotation: Optional[str] = annotation
+        self._required: bool = required
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def annotation(self) -> Optional[str]:
+        return self._annotation
+
+    @property
+    def required(self) -> bool:
+        return self._required
+
+
+class CommandSignature():
+    """
+    A command's name, documentation, parameters and decorators, read from its source.
+    """
+
+    def __init__(self, name: str, doc: Optional[str], parameters: List[ParameterSignature], decorators: List[ast.expr]) -> None:
+        self._name: str = name
+        self._doc: Optional[str] = doc
+        self._parameters: List[ParameterSignature] = parameters
+        self._decorators: List[ast.expr] = decorators
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def doc(self) -> Optional[str]:
+        return self._doc
+
+    @property
+    def parameters(self) -> List[ParameterSignature]:
+        return self._parameters
+
+    @property
+    def decorators(self) -> List[ast.expr]:
+        """
+        The unevaluated decorator expressions applied to the command.
+        """
+        return self._decorators
+
+    @property
+    def cost(self) -> Optional[str]:
+        """
+        The lane declared by the command's cost decorator, if any.
+        """
+        return _decorator_argument(self._decorators, 'cost')
+
+    @property
+    def coalesce(self) -> Optional[str]:
+        """
+        The scope declared by the command's coalesce decorator, if any.
+        """
+        return _decorator_argument(self._decorators, 'coalesce')
+
+
+class ComponentSignature():
+    """
+    A component class and its commands, read from its source.
+    """
+
+    def __init__(self, name: str, doc: Optional[str], commands: List[CommandSignature], decorators: List[ast.expr]) -> None:
+        self._name: str = name
+        self._doc: Optional[str] = doc
+        self._commands: List[CommandSignature] = commands
+        self._decorators: List[ast.expr] = decorators
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def doc(self) -> Optional[str]:
+        return self._doc
+
+    @property
+    def commands(self) -> List[CommandSignature]:
+        return self._commands
+
+    @property
+    def decorators(self) -> List[ast.expr]:
+        return self._decorators
+
+    @property
+    def cost(self) -> Optional[str]:
+        """
+        The lane declared by the component's cost decorator, if any.
+        """
+        return _decorator_argument(self._decorators, 'cost')
+
+
+class ModuleSignature():
+    """
+    A component module and its components, read from its source.
+    """
+
+    def __init__(self, reference: Path, doc: Optional[str], components: List[ComponentSignature]) -> None:
+        self._reference: Path = reference
+        self._doc: Optional[str] = doc
+        self._components: List[ComponentSignature] = components
+
+    @property
+    def reference(self) -> Path:
+        return self._reference
+
+    @property
+    def name(self) -> str:
+        return self._reference.stem
+
+    @property
+    def doc(self) -> Optional[str]:
+        return self._doc
+
+    @property
+    def components(self) -> List[ComponentSignature]:
+        return self._components
+
+
+class ComponentScanner():
+    """
+    Reads component signatures from source files without importing them.
+
+    A component is a top-level class with at least one public async method;
+    each public async method is a command.
+    """
+
+    def scan(self, directory: Path, extension: str = 'py') -> List[ModuleSignature]:
+        """
+        Scans every module in the directory.
+        """
+        modules: List[ModuleSignature] = list()
+        for reference in sorted(directory.glob(f'*.{extension}')):
+            # skip private modules such as __init__.py
+            if reference.stem.startswith('_'): continue
+            try:
+                modules.append(self.scan_module(reference))
+            except SyntaxError as error:
+                log.error('Could not scan %s: %s', reference.name, error)
+        return modules
+
+    def scan_module(self, reference: Path) -> ModuleSignature:
+        """
+        Scans a single module.
+        """
+        tree: ast.Module = ast.parse(reference.read_text(encoding='utf-8'), filename=str(reference))
+        components: List[ComponentSignature] = list()
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef): continue
+            commands: List[CommandSignature] = [self.__command__(child) for child in node.body if isinstance(child, ast.AsyncFunctionDef) and not child.name.startswith('_')]
+            if not commands: continue
+            components.append(ComponentSignature(node.name, ast.get_docstring(node), commands, node.decorator_list))
+        return ModuleSignature(reference, ast.get_docstring(tree), components)
+
+    def __command__(self, node: ast.AsyncFunctionDef) -> CommandSignature:
+        """
+        Reads a command's signature from its definition.
+        """
+        # keyword-only parameters without a default are required
+        parameters: List[ParameterSignature] = list()
+        for argument, default in zip(node.args.kwonlyargs, node.args.kw_defaults):
+            # parameters with a leading underscore are supplied by the handler, not the user
+            if argument.arg.startswith('_'): continue
+            annotation: Optional[str] = ast.unparse(argument.annotation) if argument.annotation else None
+            parameters.append(ParameterSignature(argument.arg, annotation, default is None))
+        return CommandSignature(node.name, ast.get_docstring(node), parameters, node.decorator_list)
+
+
+class ComponentTiming():
+    """
+    The startup cost of a single component.
+    """
+
+    def __init__(self, module: str, component: str) -> None:
+        self.module: str = module
+        self.component: str = component
+        self.scan: float = 0.0
+        self.imported: Optional[float] = None
+        self.initialized: Optional[float] = None
+
+
+class StartupReport():
+    """
+    Records how long each component took to scan, import and initialize.
+    """
+
+    def __init__(self, mode: str) -> None:
+        self._mode: str = mode
+        self._timings: Dict[str, ComponentTiming] = dict()
+        self._total: float = 0.0
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def timings(self) -> List[ComponentTiming]:
+        return list(self._timings.values())
+
+    @property
+    def total(self) -> float:
+        """
+        The number of seconds spent loading components at startup.
+        """
+        return self._total
+
+    @total.setter
+    def total(self, value: float) -> None:
+        self._total = value
+
+    def timing(self, module: str, component: str) -> ComponentTiming:
+        """
+        Returns the timing record for the component, creating it if needed.
+        """
+        key: str = f'{module}.{component}'
+        try:
+            return self._timings[key]
+        except KeyError:
+            timing: ComponentTiming = ComponentTiming(module, component)
+            self._timings[key] = timing
+            return timing
+
+    def __str__(self) -> str:
+        def milliseconds(value: Optional[float]) -> str:
+            return f'{value * 1000:.1f}' if value is not None else '-'
+        lines: List[str] = [f'{"component":<24}{"scan ms":>10}{"import ms":>11}{"init ms":>10}']
+        for timing in sorted(self._timings.values(), key=lambda timing: -((timing.imported or 0.0) + (timing.initialized or 0.0))):
+            lines.append(f'{timing.component:<24}{milliseconds(timing.scan):>10}{milliseconds(timing.imported):>11}{milliseconds(timing.initialized):>10}')
+        lines.append(f'{self._mode} startup: {self._total * 1000:.1f} ms')
+        return '\n'.join(lines)
+
+
+class LazyModule():
+    """
+    A component module, imported on first use.
+    """
+
+    def __init__(self, signature: ModuleSignature, package: str) -> None:
+        self._signature: ModuleSignature = signature
+        self._name: str = f'{package}.{signature.name}'
+        self._module: Optional[ModuleType] = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self.elapsed: float = 0.0
+
+    @property
+    def module(self) -> Optional[ModuleType]:
+        return self._module
+
+    def load(self) -> ModuleType:
+        """
+        Imports the module if it hasn't been imported yet.
+        """
+        if self._module: return self._module
+        start: float = time.perf_counter()
+        spec: Optional[ModuleSpec] = importlib.util.spec_from_file_location(self._name, self._signature.reference)
+        if not spec or not spec.loader: raise ComponentLoadError(self._signature.name, ImportError(f'Cannot import {self._signature.reference}'))
+        module: ModuleType = importlib.util.module_from_spec(spec)
+        # keep the module being reloaded, in case the new version fails to import
+        previous: Optional[ModuleType] = sys.modules.get(self._name)
+        sys.modules[self._name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception as error:
+            if previous: sys.modules[self._name] = previous
+            else: del sys.modules[self._name]
+            raise ComponentLoadError(self._signature.name, error)
+        self.elapsed = time.perf_counter() - start
+        self._module = module
+        return module
+
+    async def load_async(self) -> ModuleType:
+        """
+        Imports the module on a worker thread, so heavy imports don't stall the event loop.
+        """
+        if self._module: return self._module
+        async with self._lock:
+            if self._module: return self._module
+            return await asyncio.get_running_loop().run_in_executor(None, self.load)
+
+
+class LazyComponent(dict):
+    """
+    A component whose commands are registered from its signature and whose
+    instance is created the first time one of its commands is invoked.
+    Mirrors the router's Component, mapping command names to commands.
+    """
+
+    def __init__(self, signature: ComponentSignature, module: LazyModule, timing: ComponentTiming, parameter_prefix: str, **kwargs) -> None:
+        super().__init__()
+        self._signature: ComponentSignature = signature
+        self._module: LazyModule = module
+        self._timing: ComponentTiming = timing
+        self._kwargs: Dict[str, Any] = kwargs
+        self._instance: Optional[Any] = None
+        for command in signature.commands: self[command.name] = LazyCommand(command, self, parameter_prefix)
+
+    @property
+    def name(self) -> str:
+        return self._signature.name
+
+    @property
+    def doc(self) -> Optional[str]:
+        return self._signature.doc
+
+    @property
+    def instance(self) -> Optional[Any]:
+        """
+        The component instance, or None if it hasn't been created yet.
+        """
+        return self._instance
+
+    def create(self, module: ModuleType) -> Any:
+        """
+        Instantiates the component from its imported module.
+        """
+        if self._instance is not None: return self._instance
+        start: float = time.perf_counter()
+        try:
+            component_type: Any = getattr(module, self._signature.name)
+            self._instance = component_type(**self._kwargs)
+        except Exception as error:
+            raise ComponentLoadError(self._signature.name, error)
+        self._timing.imported = self._module.elapsed
+        self._timing.initialized = time.perf_counter() - start
+        log.info('Loaded %s in %.1f ms', self._signature.name, (self._timing.imported + self._timing.initialized) * 1000)
+        return self._instance
+
+    async def resolve(self) -> Any:
+        """
+        Returns the component instance, importing and instantiating it on first use.
+        """
+        if self._instance is not None: return self._instance
+        module: ModuleType = await self._module.load_async()
+        # components may schedule tasks when instantiated, so create them on the event loop
+        return self.create(module)
+
+
+class LazyCommand():
+    """
+    A command registered from its signature. Mirrors the router's Command.
+    """
+
+    def __init__(self, signature: CommandSignature, component: LazyComponent, parameter_prefix: str) -> None:
+        self._signature: CommandSignature = signature
+        self._component: LazyComponent = component
+        self._parameter_prefix: str = parameter_prefix
+        self._parameters: Dict[str, ParameterSignature] = {parameter.name: parameter for parameter in signature.parameters}
+
+    @property
+    def name(self) -> str:
+        return self._signature.name
+
+    @property
+    def doc(self) -> Optional[str]:
+        return self._signature.doc
+
+    @property
+    def signature(self) -> CommandSignature:
+        return self._signature
+
+    @property
+    def component(self) -> LazyComponent:
+        return self._component
+
+    def parse(self, message: str) -> Dict[str, str]:
+        """
+        Parses the command's raw keyword arguments from a message with its prefix removed.
+        """
+        try:
+            # remove the command name
+            arguments: Dict[str, str] = split_arguments(message[len(self._signature.name):], self._parameter_prefix)
+        except ArgumentError as error:
+            raise self.__syntax_error__(error)
+        # reject parameters the command doesn't take
+        if any(name not in self._parameters for name in arguments): raise self.__syntax_error__()
+        # require every parameter without a default
+        if any(parameter.required and parameter.name not in arguments for parameter in self._parameters.values()): raise self.__syntax_error__()
+        return arguments
+
+    async def invoke(self, message: str, context: Any) -> Any:
+        """
+        Parses the message and invokes the command, loading its component if needed.
+        """
+        arguments: Dict[str, str] = self.parse(message)
+        instance: Any = await self._component.resolve()
+        command: Callable[..., Any] = getattr(instance, self._signature.name)
+        # convert the values with the command's own annotations, now that its module is loaded
+        annotations: Dict[str, Any] = self.__hints__(command)
+        try:
+            converted: Dict[str, Any] = {name: convert(annotations.get(name), value) for name, value in arguments.items()}
+        except ArgumentError as error:
+            raise self.__syntax_error__(error)
+        result: Any = command(context, **converted)
+        return await result if inspect.isawaitable(result) else result
+
+    def __hints__(self, command: Callable[..., Any]) -> Dict[str, Any]:
+        """
+        Returns the command's parameter annotations, evaluated.
+        """
+        try:
+            return typing.get_type_hints(command)
+        except Exception:
+            # annotations that can't be evaluated are treated as strings
+            return dict()
+
+    def __syntax_error__(self, exception: Optional[Exception] = None) -> HandlerError:
+        # imported here since the command handler imports this module
+        from commandHandler import CommandSyntaxError
+        return CommandSyntaxError(self._signature.name, [parameter.name for parameter in self._signature.parameters], exception)
+
+
+class LazyPackage(dict):
+    """
+    A component module mirroring the router's Package, mapping component names to components.
+    """
+
+    def __init__(self, signature: ModuleSignature, module: LazyModule) -> None:
+        super().__init__()
+        self._reference: Path = signature.reference
+        self._signature: ModuleSignature = signature
+        self._module: LazyModule = module
+
+    @property
+    def doc(self) -> Optional[str]:
+        return self._signature.doc
+
+
+class ComponentLoader():
+    """
+    Loads the components in a directory without the router.
+    """
+
+    def __init__(self, directory: Path, *, mode: Literal['eager', 'lazy'] = 'lazy', parameter_prefix: str = '-', **kwargs) -> None:
+        if mode not in ('eager', 'lazy'): raise ValueError(f"Unknown loading mode '{mode}'; expected 'eager' or 'lazy'")
+        self._directory: Path = directory.resolve()
+        self._mode: str = mode
+        self._parameter_prefix: str = parameter_prefix
+        self._kwargs: Dict[str, Any] = kwargs
+        self._scanner: ComponentScanner = ComponentScanner()
+        self._packages: Dict[str, LazyPackage] = dict()
+        self._report: StartupReport = StartupReport(mode)
+
+    @property
+    def packages(self) -> Dict[str, LazyPackage]:
+        return self._packages
+
+    @property
+    def report(self) -> StartupReport:
+        return self._report
+
+    def load(self) -> Dict[str, LazyPackage]:
+        """
+        Registers every component in the directory, instantiating them if loading eagerly.
+        """
+        start: float = time.perf_counter()
+        # make the components directory importable as a package
+        parent: str = str(self._directory.parent)
+        if parent not in sys.path: sys.path.insert(0, parent)
+
+        packages: Dict[str, LazyPackage] = dict()
+        for reference in sorted(self._directory.glob('*.py')):
+            if reference.stem.startswith('_'): continue
+            try:
+                package: Optional[LazyPackage] = self.__build__(reference)
+            except SyntaxError as error:
+                log.error('Could not scan %s: %s', reference.name, error)
+                continue
+            if package: packages[reference.stem] = package
+
+        if self._mode == 'eager':
+            for name, package in list(packages.items()):
+                try:
+                    loaded: ModuleType = package._module.load()
+                    for component in package.values(): component.create(loaded)
+                except ComponentLoadError as error:
+                    log.error(error)
+                    del packages[name]
+
+        self._packages = packages
+        self._report.total = time.perf_counter() - start
+        log.info('Loaded %d components in %s mode:\n%s', sum(len(package) for package in packages.values()), self._mode, self._report)
+        return packages
+
+    async def reload(self, reference: Path) -> None:
+        """
+        Re-imports a changed module and replaces its components, or removes them if the module was deleted.
+
+        Components that were instantiated are instantiated again straight away, and the old instance's
+        __export_state__() result is passed to the new instance's __import_state__(), if they define them.
+        The old instance's __unload__() is called once the new components are in place.
+        If the module fails to scan, import or initialize, the old components are kept, and any
+        new instances already created are unloaded.
+        """
+        previous: Optional[LazyPackage] = self._packages.get(reference.stem)
+        package: Optional[LazyPackage] = None
+        if reference.exists():
+            try:
+                package = self.__build__(reference)
+            except SyntaxError as error:
+                raise ComponentLoadError(reference.stem, error)
+
+        if package:
+            # instantiate the new components if loading eagerly, or if their predecessors were in use
+            running: Dict[str, Any] = {name: component.instance for name, component in (previous.items() if previous else []) if component.instance is not None}
+            if self._mode == 'eager' or running:
+                module: ModuleType = await package._module.load_async()
+                created: List[LazyComponent] = list()
+                try:
+                    # create every new instance before handing any state over, so a failure leaves the old set running
+                    for name, component in package.items():
+                        if self._mode != 'eager' and name not in running: continue
+                        component.create(module)
+                        created.append(component)
+                    # hand each predecessor's state to its new instance before it runs
+                    for component in created:
+                        if component.name in running and hasattr(running[component.name], '__export_state__') and hasattr(component.instance, '__import_state__'):
+                            component.instance.__import_state__(running[component.name].__export_state__())
+                except Exception:
+                    # release the new instances, which may have started tasks of their own
+                    for component in created: self.__unload__(component)
+                    raise
+
+        # swap in the new components, then release the old ones
+        if package: self._packages[reference.stem] = package
+        else: self._packages.pop(reference.stem, None)
+        for component in (previous.values() if previous else []):
+            self.__unload__(component)
+            # forget the declarations of components that no longer exist
+            if not package or component.name not in package: self.__forget__(component.name)
+
+    def __forget__(self, component: str) -> None:
+        """
+        Removes the declarations made for a component's commands.
+        """
+        scheduler.forget(component)
+        singleflight.forget(component)
+
+    def __unload__(self, component: LazyComponent) -> None:
+        """
+        Calls the component instance's __unload__(), if it was created and defines one.
+        """
+        if component.instance is None or not hasattr(component.instance, '__unload__'): return
+        try:
+            component.instance.__unload__()
+        except Exception as error:
+            log.error('Could not unload %s: %s', component.name, error)
+
+    def __build__(self, reference: Path) -> Optional[LazyPackage]:
+        """
+        Registers the components in a module without importing it.
+        Returns None if the module has no components.
+        """
+        scan_start: float = time.perf_counter()
+        signature: ModuleSignature = self._scanner.scan_module(reference)
+        scan: float = time.perf_counter() - scan_start
+        if not signature.components: return None
+
+        module: LazyModule = LazyModule(signature, self._directory.name)
+        package: LazyPackage = LazyPackage(signature, module)
+        for component_signature in signature.components:
+            # drop the declarations of the component's previous version, so removed decorators take effect
+            self.__forget__(component_signature.name)
+            # declare command lanes now, since lazy modules aren't imported until first use
+            for command_signature in component_signature.commands:
+                lane: Optional[str] = command_signature.cost or component_signature.cost
+                if lane: scheduler.declare(component_signature.name, command_signature.name, lane)
+                if command_signature.coalesce: singleflight.declare(component_signature.name, command_signature.name, command_signature.coalesce)
+            timing: ComponentTiming = self._report.timing(signature.name, component_signature.name)
+            timing.scan = scan / len(signature.components)
+            package[component_signature.name] = LazyComponent(component_signature, module, timing, self._parameter_prefix, **self._kwargs)
+        return package
+
+
+def _decorator_argument(decorators: List[ast.expr], decorator_name: str) -> Optional[str]:
+    """
+    Reads the argument of a decorator written as cost(HEAVY), scheduler.cost(HEAVY) or cost('heavy').
+    """
+    for decorator in decorators:
+        if not isinstance(decorator, ast.Call) or not decorator.args: continue
+        function: ast.expr = decorator.func
+        name: Optional[str] = function.id if isinstance(function, ast.Name) else function.attr if isinstance(function, ast.Attribute) else None
+        if name != decorator_name: continue
+        argument: ast.expr = decorator.args[0]
+        if isinstance(argument, ast.Constant) and isinstance(argument.value, str): return argument.value
+        # lane and scope constants are named after their value
+        if isinstance(argument, ast.Name): return argument.id.lower()
+        if isinstance(argument, ast.Attribute): return argument.attr.lower()
+    return None
+
+
+class ComponentLoadError(HandlerError):
+    def __init__(self, component_name: str, exception: Optional[Exception] = None):
+        message: str = f'Component \'{component_name}\' could not be loaded: {exception}'
+        super().__init__(message, exception)
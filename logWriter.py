@@ -0,0 +1,178 @@
+import logging
+import queue
+import time
+from collections import OrderedDict
+from logging import Logger
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from discord import Message
+
+log: Logger = logging.getLogger(__name__)
+
+Mentions = Tuple[Tuple[str, str], ...]
+"""Pairs of mention strings and the names they are shown as"""
+
+
+class MessageLogWriter():
+    """
+    Writes per-channel message logs from a single background thread.
+
+    The fields of each message are read on the event loop, where discord.py's models are
+    safe to read, and queued without touching the filesystem; the writer thread formats
+    them, batches the writes and keeps a bounded LRU of open log files.
+    """
+
+    def __init__(self, directory: Path, *, capacity: int = 10000, max_open: int = 64, batch_size: int = 256) -> None:
+        # resolve the log directory
+        self._directory: Path = directory.resolve()
+        # create the log directory once, up front
+        if not self._directory.exists(): self._directory.mkdir(parents=True, exist_ok=True)
+        # set the maximum number of simultaneously open log files
+        self._max_open: int = max_open
+        # set the maximum number of messages written per batch
+        self._batch_size: int = batch_size
+        # create the bounded message queue
+        self._queue: Queue = Queue(maxsize=capacity)
+        # create the open file LRU, owned by the writer thread
+        self._files: OrderedDict[int, TextIO] = OrderedDict()
+        # count messages dropped because the queue was full
+        self._dropped: int = 0
+        # create the writer thread
+        self._thread: Thread = Thread(target=self.__run__, name='MessageLogWriter', daemon=True)
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of messages waiting to be written.
+        """
+        return self._queue.qsize()
+
+    @property
+    def open_files(self) -> int:
+        """
+        The number of currently open log files.
+        """
+        return len(self._files)
+
+    @property
+    def dropped(self) -> int:
+        """
+        The number of messages dropped because the queue was full.
+        """
+        return self._dropped
+
+    def start(self) -> None:
+        """
+        Starts the writer thread.
+        """
+        if not self._thread.is_alive(): self._thread.start()
+
+    def write(self, message: Message) -> bool:
+        """
+        Queues a message to be written to its channel's log without blocking.
+        Returns False if the queue was full and the message was dropped.
+        """
+        # read the message on the event loop; the writer thread only formats what it is given
+        author: str = f'{message.author.name}#{message.author.discriminator}'
+        try:
+            self._queue.put_nowait((message.channel.id, time.time(), author, message.content, self.__mentions__(message)))
+            return True
+        except queue.Full:
+            self._dropped += 1
+            return False
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Flushes the queued messages and stops the writer thread.
+        """
+        if not self._thread.is_alive(): return
+        # the sentinel is queued behind every pending message
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+    def __run__(self) -> None:
+        """
+        The writer thread's loop.
+        """
+        running: bool = True
+        while running:
+            # wait for the next message
+            item: Optional[Tuple[int, float, str, str, Mentions]] = self._queue.get()
+            batch: List[Tuple[int, float, str, str, Mentions]] = list()
+            # drain up to a batch worth of queued messages
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self._batch_size: break
+                try: item = self._queue.get_nowait()
+                except queue.Empty: break
+            # a sentinel ends the loop after the batch is written
+            if item is None: running = False
+            try:
+                self.__write__(batch)
+            except Exception as error:
+                log.error('Could not write message logs: %s', error)
+
+        # close every open file
+        for file in self._files.values(): file.close()
+        self._files.clear()
+
+    def __write__(self, batch: List[Tuple[int, float, str, str, Mentions]]) -> None:
+        """
+        Formats a batch of messages and appends them to their channels' logs.
+        """
+        # group the formatted lines by channel, preserving order
+        lines: Dict[int, List[str]] = dict()
+        for channel_id, created, author, content, mentions in batch:
+            lines.setdefault(channel_id, list()).append(self.__line__(created, author, content, mentions))
+        # write each channel's lines in a single call
+        for channel_id, channel_lines in lines.items():
+            file: TextIO = self.__open__(channel_id)
+            file.write(''.join(channel_lines))
+            file.flush()
+
+    def __mentions__(self, message: Message) -> Mentions:
+        """
+        Pairs each mention string in the message with the name it is shown as.
+        """
+        mentions: List[Tuple[str, str]] = list()
+        for member in message.mentions:
+            mentions.append((f'<@{member.id}>', f'@{member.display_name}'))
+            mentions.append((f'<@!{member.id}>', f'@{member.display_name}'))
+        for role in message.role_mentions: mentions.append((f'<@&{role.id}>', f'@{role.name}'))
+        for channel in message.channel_mentions: mentions.append((f'<#{channel.id}>', f'#{channel.name}'))
+        return tuple(mentions)
+
+    def __line__(self, created: float, author: str, content: str, mentions: Mentions) -> str:
+        """
+        Formats a message as a log line, cleaning its content like Message.clean_content.
+        """
+        timestamp: str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))
+        milliseconds: int = int((created - int(created)) * 1000)
+        # replace mention strings with the names they are shown as
+        for mention, name in mentions: content = content.replace(mention, name)
+        # defuse mass mentions
+        content = content.replace('@everyone', '@\u200beveryone').replace('@here', '@\u200bhere')
+        return f'[{timestamp},{milliseconds:03d}] {author} -> {content}\n'
+
+    def __open__(self, channel_id: int) -> TextIO:
+        """
+        Returns the open log file for the channel, opening it and evicting the least recently used file if needed.
+        """
+        try:
+            # mark the file as most recently used
+            self._files.move_to_end(channel_id)
+            return self._files[channel_id]
+        except KeyError:
+            pass
+        # evict the least recently used file
+        if len(self._files) >= self._max_open:
+            _, evicted = self._files.popitem(last=False)
+            evicted.close()
+        # open the channel's log file for appending
+        file: TextIO = self._directory.joinpath(f'{channel_id}.log').open('a', encoding='utf-8')
+        self._files[channel_id] = file
+        return file
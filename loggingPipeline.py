@@ -0,0 +1,161 @@
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging import FileHandler, Filter, Formatter, Handler, Logger, LogRecord, StreamHandler
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from settings.logs import LoggingSettings
+
+log: Logger = logging.getLogger(__name__)
+
+
+class RateLimitFilter(Filter):
+    """
+    Limits the DEBUG and INFO records emitted per second by individual loggers.
+    WARNING and above always pass. The number of suppressed records is attached
+    to the next record that passes as its `suppressed` attribute.
+    """
+
+    def __init__(self, limits: Dict[str, float]) -> None:
+        super().__init__()
+        # set the records per second allowed for each logger
+        self._limits: Dict[str, float] = limits
+        # create the token buckets, keyed by logger name
+        self._buckets: Dict[str, Tuple[float, float]] = dict()
+        # create the suppressed record counters, keyed by logger name
+        self._suppressed: Dict[str, int] = dict()
+        # loggers may emit from several threads
+        self._lock: threading.Lock = threading.Lock()
+
+    def filter(self, record: LogRecord) -> bool:
+        # always pass warnings and errors
+        if record.levelno >= logging.WARNING: return True
+        # get the rate for the logger, if it is limited
+        rate: Optional[float] = self._limits.get(record.name)
+        if rate is None: return True
+
+        with self._lock:
+            now: float = time.monotonic()
+            # hold at most one second of records, but always room for one so rates below 1 still pass records
+            capacity: float = max(rate, 1.0)
+            # refill the logger's bucket
+            tokens, updated = self._buckets.get(record.name, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            # if the bucket is empty, suppress the record
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now)
+                self._suppressed[record.name] = self._suppressed.get(record.name, 0) + 1
+                return False
+            self._buckets[record.name] = (tokens - 1, now)
+            # attach the number of records suppressed since the last one passed
+            suppressed: int = self._suppressed.pop(record.name, 0)
+            if suppressed: record.suppressed = suppressed
+            return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    A queue handler that leaves message formatting to the listener thread
+    and drops records instead of blocking when the queue is full.
+    """
+
+    def __init__(self, queue: Queue) -> None:
+        super().__init__(queue)
+        self.dropped: int = 0
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # formatting happens in the listener thread
+        return record
+
+    def enqueue(self, record: LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(Formatter):
+    """
+    Formats records as text, noting how many records were suppressed before it.
+    """
+
+    def format(self, record: LogRecord) -> str:
+        message: str = super().format(record)
+        suppressed: Optional[int] = getattr(record, 'suppressed', None)
+        return f'{message} (+{suppressed} suppressed)' if suppressed else message
+
+
+class JsonFormatter(Formatter):
+    """
+    Formats records as single-line JSON objects.
+    """
+
+    def format(self, record: LogRecord) -> str:
+        document: Dict[str, Any] = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        suppressed: Optional[int] = getattr(record, 'suppressed', None)
+        if suppressed: document['suppressed'] = suppressed
+        if record.exc_info: document['exception'] = self.formatException(record.exc_info)
+        return json.dumps(document, ensure_ascii=False, default=str)
+
+
+def configure(settings: LoggingSettings, *, capacity: int = 10000, file: Optional[Path] = None) -> QueueListener:
+    """
+    Routes every log record through a bounded queue to a listener thread
+    that owns the console and file handlers. Returns the started listener,
+    which should be stopped on exit to flush the queue.
+    The file overrides the configured log file.
+    """
+    root: Logger = logging.getLogger()
+
+    # set the short level names
+    logging.addLevelName(logging.DEBUG, "DBG")
+    logging.addLevelName(logging.INFO, "INF")
+    logging.addLevelName(logging.WARN, "WRN")
+    logging.addLevelName(logging.ERROR, "ERR")
+    logging.addLevelName(logging.FATAL, "FTL")
+
+    # create the output formatter
+    formatter: Formatter = JsonFormatter() if settings.json else TextFormatter('[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
+
+    # create the console handler
+    stdoutHandler: StreamHandler = StreamHandler(sys.stdout)
+    stdoutHandler.setFormatter(formatter)
+    stdoutHandler.setLevel(settings.console)
+
+    # create the file handler
+    fileHandler: FileHandler = FileHandler(file if file else settings.file, encoding="utf-8")
+    fileHandler.setFormatter(formatter)
+    fileHandler.setLevel(logging.DEBUG)
+
+    # create the queue handler, sampling hot loggers before records are queued
+    records: Queue = Queue(maxsize=capacity)
+    queueHandler: DeferredQueueHandler = DeferredQueueHandler(records)
+    queueHandler.addFilter(RateLimitFilter(settings.limits))
+
+    # replace any existing root handlers with the queue handler
+    handlers: List[Handler] = list(root.handlers)
+    for handler in handlers: root.removeHandler(handler)
+    root.addHandler(queueHandler)
+
+    # set the configured levels
+    root.setLevel(settings.level)
+    for name, level in settings.levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    # start the listener thread
+    listener: QueueListener = QueueListener(records, stdoutHandler, fileHandler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from asyncio import AbstractEventLoop, Task
+from datetime import datetime, timezone
+from logging import Logger
+from pathlib import Path
+from threading import Event, Thread
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+log: Logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog():
+    """
+    Measures event loop lag from a background thread.
+
+    The thread posts a heartbeat to the loop every interval and measures how long it waits
+    to run. If a heartbeat is still waiting after the threshold, the loop is stalled: the
+    loop thread's stack and the command being run by the current task are written to the
+    stall log while the loop is still blocked.
+    """
+
+    def __init__(self, loop: AbstractEventLoop, running: Dict[Task, Tuple[Any, Any]], *, interval: float = 0.25, threshold: float = 1.0, file: Path = Path('./stalls.log')) -> None:
+        # set the monitored loop
+        self._loop: AbstractEventLoop = loop
+        # set the running commands, keyed by task; maintained by the command handler
+        self._running: Dict[Task, Tuple[Any, Any]] = running
+        # set the time between heartbeats
+        self._interval: float = interval
+        # set the lag after which the loop is considered stalled
+        self._threshold: float = threshold
+        # set the stall log
+        self._file: Path = file
+        # the time the pending heartbeat was posted, or None if it has run
+        self._pending: Optional[float] = None
+        # the length of a stall that ended but hasn't been logged yet
+        self._ended: Optional[float] = None
+        # whether the pending heartbeat has been reported as a stall
+        self._stalled: bool = False
+        # guards the heartbeat state shared between the thread and the loop
+        self._lock: threading.Lock = threading.Lock()
+        # the identifier of the loop's thread, recorded by the first heartbeat
+        self._loop_thread: Optional[int] = None
+        # the most recently measured lag
+        self._lag: float = 0.0
+        # the largest measured lag
+        self._max_lag: float = 0.0
+        # count the stalls
+        self._stalls: int = 0
+        # the total time the loop spent stalled
+        self._stalled_time: float = 0.0
+        # create the watchdog thread
+        self._stopped: Event = Event()
+        self._thread: Thread = Thread(target=self.__run__, name='LoopWatchdog', daemon=True)
+
+    @property
+    def lag(self) -> float:
+        """
+        The most recently measured loop lag, in seconds.
+        """
+        return self._lag
+
+    @property
+    def max_lag(self) -> float:
+        return self._max_lag
+
+    @property
+    def stalls(self) -> int:
+        return self._stalls
+
+    @property
+    def stalled_time(self) -> float:
+        return self._stalled_time
+
+    @property
+    def pending(self) -> float:
+        """
+        How long the pending heartbeat has been waiting, in seconds; nonzero while the loop is blocked.
+        """
+        pending: Optional[float] = self._pending
+        return time.monotonic() - pending if pending is not None else 0.0
+
+    def start(self) -> None:
+        if not self._thread.is_alive(): self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+    def __run__(self) -> None:
+        """
+        The watchdog thread's loop.
+        """
+        while not self._stopped.wait(self._interval):
+            now: float = time.monotonic()
+            # log the end of the last stall off the loop
+            ended: Optional[float] = self._ended
+            if ended is not None:
+                self._ended = None
+                self.__append__([f'[{self.__timestamp__()}] stall ended after {ended:.3f}s\n'])
+            with self._lock:
+                pending: Optional[float] = self._pending
+                # post a heartbeat if the last one has run
+                if pending is None:
+                    self._pending = now
+                    try: self._loop.call_soon_threadsafe(self.__beat__, now)
+                    except RuntimeError: return
+                    continue
+                # report the stall once, while the loop is still blocked
+                if self._stalled or now - pending < self._threshold: continue
+                self._stalled = True
+                self._stalls += 1
+            try:
+                self.__capture__(now - pending)
+            except Exception as error:
+                log.error('Could not record the stall: %s', error)
+
+    def __beat__(self, posted: float) -> None:
+        """
+        Runs on the loop and records how long the heartbeat waited.
+        """
+        lag: float = time.monotonic() - posted
+        self._loop_thread = threading.get_ident()
+        with self._lock:
+            self._lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            stalled: bool = self._stalled
+            self._pending = None
+            self._stalled = False
+        if not stalled: return
+        self._stalled_time += lag
+        self._ended = lag
+
+    def __capture__(self, lag: float) -> None:
+        """
+        Writes the loop thread's stack and the current command to the stall log.
+        """
+        lines: List[str] = [f'[{self.__timestamp__()}] stall #{self._stalls}: loop blocked for {lag:.3f}s\n']
+        # get the task the loop is running
+        task: Optional[Task] = asyncio.current_task(self._loop)
+        lines.append(f'task: {task!r}\n')
+        # describe the command being run by the task, if any
+        command: Optional[Tuple[Any, Any]] = self._running.get(task) if task else None
+        if command:
+            invocation, context = command
+            message: Any = context.message
+            lines.append(f'command: {invocation.prefix}{invocation.name}\n')
+            lines.append(f'context: guild={message.guild.id if message.guild else None} channel={message.channel.id} author={message.author.id} message={message.id}\n')
+            lines.append(f'content: {message.content!r}\n')
+        # capture the loop thread's stack
+        frame: Optional[FrameType] = sys._current_frames().get(self._loop_thread) if self._loop_thread else None
+        lines.append('stack:\n')
+        lines.extend(traceback.format_stack(frame) if frame else ['  unavailable\n'])
+        lines.append('\n')
+        self.__append__(lines)
+        log.warning('Event loop blocked for %.3fs in %s', lag, command[0].name if command else repr(task))
+
+    def __append__(self, lines: List[str]) -> None:
+        with self._file.open('a', encoding='utf-8') as file: file.write(''.join(lines))
+
+    def __timestamp__(self) -> str:
+        return datetime.now(tz=timezone.utc).isoformat()
@@ -0,0 +1,170 @@
+"""
+Estimates how much of the process's resident memory each of the bot's caches holds.
+
+Python can't attribute resident memory to the objects that use it, so each cache is
+estimated from a sample of its entries: the shallow size of an entry, plus the strings,
+numbers and containers it holds directly, multiplied by the number of entries. Objects
+shared between caches (such as the user behind a member) are counted by the cache that
+owns them. The sqlite page caches live outside Python's heap, so only their upper bound
+is reported.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import sys
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from logging import Logger
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from discord import Client
+
+from database.profile import PROFILES
+from logWriter import MessageLogWriter
+from providers.channelArchive import ChannelArchive
+from providers.clientArchive import ClientArchive
+from rateLimiter import RateLimiter
+from responseCache import RESPONSES
+
+log: Logger = logging.getLogger(__name__)
+
+SAMPLE: int = 200
+"""The number of entries sized per cache"""
+
+_LEAVES = (str, bytes, int, float, tuple, list, dict, set, frozenset, datetime)
+"""The attribute types counted as part of the object holding them"""
+
+
+class CacheUsage():
+    """
+    The estimated memory held by a single cache.
+    """
+
+    def __init__(self, name: str, entries: int, size: Optional[int], *, bound: bool = False, note: str = '') -> None:
+        self.name: str = name
+        self.entries: int = entries
+        self.size: Optional[int] = size
+        # whether the size is an upper bound rather than an estimate
+        self.bound: bool = bound
+        self.note: str = note
+
+
+class MemoryReport():
+    """
+    A breakdown of resident memory by cache.
+    """
+
+    def __init__(self, resident: Optional[int], caches: List[CacheUsage], *, peak: bool = False) -> None:
+        self.resident: Optional[int] = resident
+        # whether the resident size is the peak rather than the current size
+        self.peak: bool = peak
+        self.caches: List[CacheUsage] = caches
+
+    @classmethod
+    def collect(cls, client: Client, *, archive: Optional[ClientArchive] = None, limiter: Optional[RateLimiter] = None, writer: Optional[MessageLogWriter] = None) -> MemoryReport:
+        resident, peak = _resident()
+        caches: List[CacheUsage] = list()
+
+        # members and users cached by discord.py
+        members: int = sum(len(guild.members) for guild in client.guilds)
+        caches.append(CacheUsage('members', members, _estimate(_sample_members(client), members)))
+        users: Sequence[Any] = client.users
+        caches.append(CacheUsage('users', len(users), _estimate(users, len(users))))
+        messages: Sequence[Any] = client.cached_messages
+        caches.append(CacheUsage('messages', len(messages), _estimate(messages, len(messages))))
+
+        # archive connections keep a page cache each, outside the python heap
+        if archive is not None:
+            connections: int = sum(len(guild) for guild in archive.values())
+            caches.append(CacheUsage('archive', connections, connections * PROFILES[ChannelArchive.PROFILE].cache_bytes, bound=True, note='connections'))
+
+        # open log files each keep a write buffer; queued messages keep their message alive
+        if writer is not None:
+            caches.append(CacheUsage('log writer', writer.open_files, writer.open_files * 8192, note=f'open files, {writer.depth} queued'))
+
+        # a deque per author, holding a timestamp per message
+        if limiter is not None:
+            size: int = limiter.tracked * (sys.getsizeof(deque()) + 64) + limiter.entries * sys.getsizeof(datetime.min)
+            caches.append(CacheUsage('rate limiter', limiter.entries, size, note=f'timestamps, {limiter.tracked} authors'))
+
+        caches.append(CacheUsage('responses', len(RESPONSES), None, note='cached responses'))
+        return cls(resident, caches, peak=peak)
+
+    def __str__(self) -> str:
+        lines: List[str] = [f'{"cache":<14}{"entries":>9}{"size":>12}']
+        for cache in self.caches:
+            size: str = ('≤' if cache.bound else '~') + _format(cache.size) if cache.size is not None else '-'
+            lines.append(f'{cache.name:<14}{cache.entries:>9}{size:>12}  {cache.note}'.rstrip())
+        estimated: int = sum(cache.size for cache in self.caches if cache.size is not None and not cache.bound)
+        lines.append('')
+        lines.append(f'{"estimated":<23}{"~" + _format(estimated):>12}')
+        if self.resident is not None:
+            lines.append(f'{"resident (peak)" if self.peak else "resident":<23}{_format(self.resident):>12}')
+        return '\n'.join(lines)
+
+
+def _resident() -> Tuple[Optional[int], bool]:
+    """
+    Returns the resident set size in bytes, and whether it is the peak size.
+    """
+    # the current size is only available from procfs
+    try:
+        for line in Path('/proc/self/status').read_text().splitlines():
+            if line.startswith('VmRSS:'): return int(line.split()[1]) * 1024, False
+    except (OSError, ValueError, IndexError):
+        pass
+    # fall back to the peak size; ru_maxrss is in KiB on linux and bytes on macOS
+    try:
+        import resource
+        peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024, True
+    except (ImportError, OSError, ValueError):
+        return None, False
+
+
+def _sample_members(client: Client) -> List[Any]:
+    # take members evenly from each guild, so one large guild doesn't dominate the sample
+    guilds: List[Any] = [guild for guild in client.guilds if guild.members]
+    if not guilds: return list()
+    share: int = max(SAMPLE // len(guilds), 1)
+    return [member for guild in guilds for member in islice(guild.members, share)]
+
+
+def _estimate(entries: Sequence[Any], count: int) -> int:
+    """
+    Estimates the size of a cache from a random sample of its entries.
+    """
+    if not count or not entries: return 0
+    sample: Iterable[Any] = random.sample(list(entries), SAMPLE) if len(entries) > SAMPLE else entries
+    sizes: List[int] = [_size(entry) for entry in sample]
+    return int(sum(sizes) / len(sizes) * count)
+
+
+def _size(value: Any) -> int:
+    """
+    Returns the shallow size of an object plus the leaf values it references directly.
+    """
+    size: int = sys.getsizeof(value)
+    for attribute in _attributes(value):
+        if isinstance(attribute, _LEAVES): size += sys.getsizeof(attribute)
+    return size
+
+
+def _attributes(value: Any) -> Iterable[Any]:
+    # discord.py models use __slots__; fall back to the instance dictionary
+    for cls in type(value).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            try: yield getattr(value, slot)
+            except AttributeError: continue
+    yield from getattr(value, '__dict__', {}).values()
+
+
+def _format(size: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024: return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
@@ -0,0 +1,337 @@
+"""
+A process-wide metrics registry rendered in the Prometheus text exposition format.
+
+Modules declare their metrics at import time, the same way they declare loggers:
+
+    MESSAGES: Counter = metrics.counter('discord_messages_total', 'Messages received')
+
+Declaring a metric that already exists returns the existing metric, so modules can be reloaded.
+Gauges may be given a function that is evaluated when the metrics are rendered, which is used
+for queue depths owned by other objects.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from logging import Logger
+from types import TracebackType
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+log: Logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""The default histogram buckets, in seconds"""
+
+
+class Metric():
+    """
+    The base of every metric type.
+    """
+
+    TYPE: str = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self._name: str = name
+        self._help: str = help
+        self._labels: Tuple[str, ...] = tuple(labels)
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def help(self) -> str:
+        return self._help
+
+    @property
+    def labels(self) -> Tuple[str, ...]:
+        return self._labels
+
+    def __key__(self, labels: Dict[str, str]) -> LabelValues:
+        """
+        Returns the label values in declaration order.
+        """
+        try:
+            return tuple(str(labels[label]) for label in self._labels)
+        except KeyError as error:
+            raise ValueError(f'Metric {self._name} requires label {error}')
+
+    def __format_labels__(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs: List[Tuple[str, str]] = list(zip(self._labels, values))
+        if extra: pairs.append(extra)
+        if not pairs: return ''
+        escaped: List[str] = [f'{name}="{_escape(value)}"' for name, value in pairs]
+        return '{' + ','.join(escaped) + '}'
+
+    def samples(self) -> Iterator[str]:
+        """
+        Yields the metric's sample lines.
+        """
+        return iter(())
+
+    def render(self) -> str:
+        lines: List[str] = [f'# HELP {self._name} {self._help}', f'# TYPE {self._name} {self.TYPE}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    A value that only increases.
+    """
+
+    TYPE: str = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = dict()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key: LabelValues = self.__key__(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self.__key__(labels), 0.0)
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock: return dict(self._values)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.values().items():
+            yield f'{self._name}{self.__format_labels__(key)} {_number(value)}'
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down, or that is read from a function when rendered.
+    A function may return a single value, or a dictionary of values keyed by label values.
+    """
+
+    TYPE: str = 'gauge'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = None) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = dict()
+        self._function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = function
+
+    def set_function(self, function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]]) -> None:
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        key: LabelValues = self.__key__(labels)
+        with self._lock: self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key: LabelValues = self.__key__(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def values(self) -> Dict[LabelValues, float]:
+        if not self._function:
+            with self._lock: return dict(self._values)
+        try:
+            result: Union[float, Dict[LabelValues, float]] = self._function()
+        except Exception as error:
+            log.debug('Could not read gauge %s: %s', self._name, error)
+            return dict()
+        return result if isinstance(result, dict) else {(): float(result)}
+
+    def value(self, **labels: str) -> float:
+        return self.values().get(self.__key__(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.values().items():
+            yield f'{self._name}{self.__format_labels__(key)} {_number(value)}'
+
+
+class Histogram(Metric):
+    """
+    Counts observations in cumulative buckets.
+    """
+
+    TYPE: str = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self._buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # per label values: bucket counts (the last counts observations above every bound), sum
+        self._counts: Dict[LabelValues, List[int]] = dict()
+        self._sums: Dict[LabelValues, float] = dict()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key: LabelValues = self.__key__(labels)
+        index: int = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            counts: List[int] = self._counts.setdefault(key, [0] * (len(self._buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def time(self, **labels: str) -> 'Timer':
+        """
+        Returns a context manager that observes the time spent in its body.
+        """
+        return Timer(self, labels)
+
+    def keys(self) -> List[LabelValues]:
+        with self._lock: return list(self._counts)
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self.__key__(labels), ()))
+
+    def sum(self, **labels: str) -> float:
+        return self._sums.get(self.__key__(labels), 0.0)
+
+    def quantile(self, quantile: float, **labels: str) -> Optional[float]:
+        """
+        Estimates a quantile by interpolating within its bucket.
+        Returns None if nothing has been observed.
+        """
+        with self._lock: counts: List[int] = list(self._counts.get(self.__key__(labels), ()))
+        total: int = sum(counts)
+        if not total: return None
+        rank: float = quantile * total
+        cumulative: int = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower: float = self._buckets[index - 1] if index > 0 else 0.0
+                # observations above the last bound are reported as the last bound
+                if index >= len(self._buckets): return self._buckets[-1]
+                upper: float = self._buckets[index]
+                return lower + (upper - lower) * ((rank - cumulative) / count)
+            cumulative += count
+        return self._buckets[-1]
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            counts: Dict[LabelValues, List[int]] = {key: list(value) for key, value in self._counts.items()}
+            sums: Dict[LabelValues, float] = dict(self._sums)
+        for key, bucket_counts in counts.items():
+            cumulative: int = 0
+            for bound, count in zip(self._buckets, bucket_counts):
+                cumulative += count
+                yield f'{self._name}_bucket{self.__format_labels__(key, ("le", _number(bound)))} {cumulative}'
+            cumulative += bucket_counts[-1]
+            yield f'{self._name}_bucket{self.__format_labels__(key, ("le", "+Inf"))} {cumulative}'
+            yield f'{self._name}_sum{self.__format_labels__(key)} {_number(sums.get(key, 0.0))}'
+            yield f'{self._name}_count{self.__format_labels__(key)} {cumulative}'
+
+
+class Timer():
+    """
+    Observes the time spent in its body in a histogram.
+    """
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]) -> None:
+        self._histogram: Histogram = histogram
+        self._labels: Dict[str, str] = labels
+        self._start: float = 0.0
+
+    def __enter__(self) -> 'Timer':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, type: Optional[Type[BaseException]], value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+class Registry():
+    """
+    A collection of uniquely named metrics.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = dict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Adds the metric, or returns the existing metric with the same name and type.
+        """
+        with self._lock:
+            existing: Optional[Metric] = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labels != metric.labels: raise ValueError(f'Metric {metric.name} is already registered with a different type or labels')
+        return existing
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        with self._lock: metrics: List[Metric] = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY: Registry = Registry()
+"""The process-wide registry"""
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labels))
+
+def gauge(name: str, help: str, labels: Sequence[str] = (), function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = None) -> Gauge:
+    metric: Gauge = REGISTRY.register(Gauge(name, help, labels, function))
+    # a redeclared gauge reads from the newest function
+    if function: metric.set_function(function)
+    return metric
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+CACHE_REQUESTS: Counter = counter('cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+"""Shared by every cache, labelled with the cache name and hit or miss"""
+
+def cache_hit(cache: str) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result='hit')
+
+def cache_miss(cache: str) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result='miss')
+
+
+class MetricsServer():
+    """
+    Serves the registry over HTTP at /metrics.
+    """
+
+    def __init__(self, registry: Registry, *, host: str = '127.0.0.1', port: int = 9464) -> None:
+        self._registry: Registry = registry
+        self._host: str = host
+        self._port: int = port
+        self._runner = None
+
+    async def start(self) -> None:
+        from aiohttp import web
+        application: web.Application = web.Application()
+        application.router.add_get('/metrics', self.__handle__)
+        self._runner = web.AppRunner(application, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        log.info('Serving metrics at http://%s:%d/metrics', self._host, self._port)
+
+    async def stop(self) -> None:
+        if self._runner: await self._runner.cleanup()
+        self._runner = None
+
+    async def __handle__(self, request):
+        from aiohttp import web
+        return web.Response(text=self._registry.render(), content_type='text/plain', charset='utf-8', headers={'X-Content-Type-Options': 'nosniff'})
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _number(value: float) -> str:
+    if math.isinf(value): return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
@@ -0,0 +1,271 @@
+"""
+Sends messages and reactions in order per channel, paced against Discord's rate limits.
+
+Each channel has its own queue, so a long reply in one channel never holds up another,
+while the segments of a reply always arrive in order. Requests are spaced to fit the
+route buckets Discord documents, instead of being sent at once and retried after a 429:
+
+    messages:  5 per channel every 5 seconds
+    reactions: 1 per channel every 0.25 seconds
+    global:    50 every second
+
+Long text is packed into as few messages as fit the 2,000 character limit, breaking at
+line ends where possible.
+"""
+
+import asyncio
+import logging
+import time
+from asyncio import Future, Queue, Task
+from collections import deque
+from logging import Logger
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Literal, Optional, Tuple
+
+from discord import Message
+from discord.abc import Messageable
+
+import metrics
+from metrics import Counter, Histogram
+
+log: Logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_SIZE: Literal[2000] = 2000
+"""
+The maximum amount of characters
+permitted in a Discord message
+"""
+
+MESSAGE: str = 'message'
+"""POST /channels/{channel_id}/messages"""
+REACTION: str = 'reaction'
+"""PUT /channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me"""
+
+ROUTES: Dict[str, Tuple[int, float]] = {
+    MESSAGE: (5, 5.0),
+    REACTION: (1, 0.25),
+}
+"""The number of requests allowed per channel, and the period they are counted over, by route"""
+
+GLOBAL: Tuple[int, float] = (50, 1.0)
+"""The number of requests allowed across every route, and the period they are counted over"""
+
+BLOCK_TAG: str = '```'
+
+OUTBOUND_WAIT: Histogram = metrics.histogram('outbound_wait_seconds', 'Time outbound requests spent queued and paced before being sent', ('route', ))
+OUTBOUND_REQUESTS: Counter = metrics.counter('outbound_requests_total', 'Outbound requests sent', ('route', ))
+
+
+def pack(text: str, *, limit: int = MAX_MESSAGE_SIZE, block: bool = False) -> List[str]:
+    """
+    Splits text into as few messages as possible, each at most limit characters long.
+    Messages break at line ends, then at spaces, and only split words longer than a message.
+    If block is set, each message is wrapped in a code block.
+    """
+    # leave room for the code block tags around each message
+    overhead: int = len(f'{BLOCK_TAG}\n\n{BLOCK_TAG}') if block else 0
+    capacity: int = limit - overhead
+    if capacity <= 0: raise ValueError(f'A limit of {limit} leaves no room for text')
+
+    segments: List[str] = list()
+    current: str = ''
+    for line in text.splitlines(keepends=True):
+        # split lines longer than a message at the last space that fits, filling the current message first
+        if len(line) > capacity:
+            while len(current) + len(line) > capacity:
+                available: int = capacity - len(current)
+                cut: int = line.rfind(' ', 0, available) + 1 or (0 if current else available)
+                # nothing fits after the current message; start a new one
+                if not cut:
+                    segments.append(current)
+                    current = ''
+                    continue
+                segments.append(current + line[:cut])
+                current = ''
+                line = line[cut:]
+        # start a new message once the line doesn't fit
+        elif len(current) + len(line) > capacity:
+            segments.append(current)
+            current = ''
+        current += line
+    if current: segments.append(current)
+
+    # drop the line breaks at the edges of each message; indentation is kept for code
+    segments = [segment.strip('\n') for segment in segments]
+    return [f'{BLOCK_TAG}\n{segment}\n{BLOCK_TAG}' if block else segment for segment in segments if segment]
+
+
+async def _gather(futures: List[Future]) -> List[Any]:
+    # wait for every request, so a failure doesn't leave later results unretrieved, then raise the first failure
+    results: List[Any] = await asyncio.gather(*futures, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException): raise result
+    return results
+
+
+class Window():
+    """
+    Spaces calls so that no more than count start in any period.
+    """
+
+    def __init__(self, count: int, period: float) -> None:
+        self._count: int = count
+        self._period: float = period
+        # the start times of the calls in the current period
+        self._starts: Deque[float] = deque()
+
+    @property
+    def count(self) -> int:
+        return self._count
+    @count.setter
+    def count(self, value: int) -> None:
+        self._count = max(value, 1)
+
+    @property
+    def used(self) -> int:
+        """
+        The number of calls started in the current period.
+        """
+        self.__prune__()
+        return len(self._starts)
+
+    def delay(self, headroom: int = 0) -> float:
+        """
+        The number of seconds until another call may start, leaving headroom calls unused.
+        """
+        self.__prune__()
+        allowed: int = max(self._count - headroom, 1)
+        if len(self._starts) < allowed: return 0.0
+        # wait for enough of the oldest calls to leave the period
+        return max(self._starts[len(self._starts) - allowed] + self._period - time.monotonic(), 0.0)
+
+    async def acquire(self, headroom: int = 0) -> None:
+        while self.delay(headroom) > 0: await asyncio.sleep(self.delay(headroom))
+        self._starts.append(time.monotonic())
+
+    def __prune__(self) -> None:
+        expiry: float = time.monotonic() - self._period
+        while self._starts and self._starts[0] <= expiry: self._starts.popleft()
+
+
+class Request():
+    """
+    A queued outbound request.
+    """
+
+    def __init__(self, route: str, factory: Callable[[], Awaitable[Any]], future: Future) -> None:
+        self.route: str = route
+        self.factory: Callable[[], Awaitable[Any]] = factory
+        self.future: Future = future
+        self.queued: float = time.perf_counter()
+
+
+class ChannelQueue():
+    """
+    The pending requests and rate windows of a single channel.
+    """
+
+    def __init__(self, routes: Dict[str, Tuple[int, float]]) -> None:
+        self.queue: Queue = Queue()
+        self.windows: Dict[str, Window] = {route: Window(count, period) for route, (count, period) in routes.items()}
+        self.task: Optional[Task] = None
+
+
+class Outbox():
+    """
+    Queues outbound requests per channel and sends them as fast as the rate limits allow.
+    """
+
+    def __init__(self, *, routes: Optional[Dict[str, Tuple[int, float]]] = None, idle: float = 10.0) -> None:
+        self._routes: Dict[str, Tuple[int, float]] = routes if routes else ROUTES
+        # a channel's worker stops once its queue has been empty this long
+        self._idle: float = idle
+        self._channels: Dict[int, ChannelQueue] = dict()
+        self._global: Window = Window(*GLOBAL)
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of requests waiting to be sent.
+        """
+        return sum(channel.queue.qsize() for channel in self._channels.values())
+
+    def submit(self, channel_id: int, route: str, factory: Callable[[], Awaitable[Any]]) -> Future:
+        """
+        Queues a request behind the channel's earlier requests.
+        Returns a future for the request's result.
+        """
+        if route not in self._routes: raise ValueError(f"Unknown route '{route}'; expected one of {', '.join(self._routes)}")
+        channel: Optional[ChannelQueue] = self._channels.get(channel_id)
+        if not channel:
+            channel = ChannelQueue(self._routes)
+            self._channels[channel_id] = channel
+        future: Future = asyncio.get_running_loop().create_future()
+        channel.queue.put_nowait(Request(route, factory, future))
+        if not channel.task: channel.task = asyncio.create_task(self.__run__(channel_id, channel), name=f'outbox-{channel_id}')
+        return future
+
+    async def send(self, channel: Messageable, content: Optional[str] = None, **kwargs) -> Message:
+        """
+        Sends a message to the channel after the channel's earlier requests.
+        """
+        return await self.submit(channel.id, MESSAGE, lambda: channel.send(content, **kwargs))
+
+    async def reply(self, message: Message, text: str, *, block: bool = False, chain: bool = True) -> List[Message]:
+        """
+        Packs the text into as few messages as possible and sends them in order as replies.
+        If chain is set, each message replies to the one before it.
+        """
+        sent: List[Message] = list()
+
+        async def __reply__(segment: str) -> Message:
+            # reply to the previous segment; it was sent first since the channel's requests run in order
+            reference: Message = sent[-1] if chain and sent else message
+            response: Message = await reference.reply(segment)
+            sent.append(response)
+            return response
+
+        futures: List[Future] = [self.submit(message.channel.id, MESSAGE, lambda segment=segment: __reply__(segment)) for segment in pack(text, block=block)]
+        return await _gather(futures)
+
+    async def react(self, message: Message, *emoji: str) -> None:
+        """
+        Adds the reactions to the message in order.
+        """
+        futures: List[Future] = [self.submit(message.channel.id, REACTION, lambda reaction=reaction: message.add_reaction(reaction)) for reaction in emoji]
+        await _gather(futures)
+
+    def close(self) -> None:
+        """
+        Stops every channel's worker and cancels the requests still waiting.
+        """
+        for channel in self._channels.values():
+            if channel.task: channel.task.cancel()
+            while not channel.queue.empty():
+                request: Request = channel.queue.get_nowait()
+                request.future.cancel()
+        self._channels.clear()
+
+    async def __run__(self, channel_id: int, channel: ChannelQueue) -> None:
+        while True:
+            try:
+                request: Request = await asyncio.wait_for(channel.queue.get(), self._idle)
+            except asyncio.TimeoutError:
+                # nothing was queued between the timeout and here, since nothing awaited in between
+                if channel.queue.empty():
+                    del self._channels[channel_id]
+                    return
+                continue
+            # the caller stopped waiting for the request
+            if request.future.done(): continue
+            await channel.windows[request.route].acquire()
+            await self._global.acquire()
+            OUTBOUND_WAIT.observe(time.perf_counter() - request.queued, route=request.route)
+            OUTBOUND_REQUESTS.inc(route=request.route)
+            try:
+                result: Any = await request.factory()
+                if not request.future.done(): request.future.set_result(result)
+            except asyncio.CancelledError:
+                request.future.cancel()
+                raise
+            except Exception as error:
+                if not request.future.done(): request.future.set_exception(error)
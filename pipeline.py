@@ -0,0 +1,172 @@
+"""
+Runs each received message through an ordered list of stages.
+
+A stage is a function, plain or async, that takes the message's envelope. Stages run
+from the lowest order to the highest, in one of two modes:
+
+    SYNC:  the pipeline waits for the stage; returning False stops the message there
+    ASYNC: the stage is started as a task and the pipeline moves on at once
+
+An ASYNC stage must be a coroutine function, and must not block: the task still runs on
+the event loop, so blocking work such as disk writes belongs in a thread it hands off to.
+
+The client registers its own stages:
+
+    100  log       ASYNC  queue the message for the channel log writer
+    200  archive   ASYNC  queue the message for the archive writer
+    300  author    SYNC   stop messages sent by the bot
+    400  command   SYNC   stop messages that don't invoke a command
+    500  admit     SYNC   refuse or defer expensive commands while overloaded
+    900  dispatch  SYNC   run the command in its scheduler lane
+
+Components receive the pipeline as kwargs['pipeline'] and may add their own stages:
+
+    kwargs['pipeline'].add('filter', self.__filter__, order=350)
+
+Adding a stage under an existing name replaces it, so a reloaded component replaces its
+stages. Lazily loaded components only add their stages once first used.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from asyncio import Task
+from logging import Logger
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from discord import Message
+
+import metrics
+from context import Context
+from dispatch import Invocation
+from metrics import Counter, Histogram
+
+log: Logger = logging.getLogger(__name__)
+
+SYNC: str = 'sync'
+"""The pipeline waits for the stage, which may stop the message"""
+ASYNC: str = 'async'
+"""The stage runs in the background while the pipeline moves on"""
+
+STAGE_LATENCY: Histogram = metrics.histogram('pipeline_stage_seconds', 'Time taken by each message pipeline stage', ('stage', ))
+STAGE_ERRORS: Counter = metrics.counter('pipeline_stage_errors_total', 'Message pipeline stages that raised an error', ('stage', ))
+STAGE_STOPS: Counter = metrics.counter('pipeline_stops_total', 'Messages stopped by each message pipeline stage', ('stage', ))
+
+
+class Envelope():
+    """
+    A message passing through the pipeline, and what earlier stages learned about it.
+    """
+
+    def __init__(self, message: Message) -> None:
+        self.message: Message = message
+        # the guild's command prefix
+        self.prefix: Optional[str] = None
+        # the command the message invokes
+        self.invocation: Optional[Invocation] = None
+        # the context the command runs with
+        self.context: Optional[Context] = None
+        # values shared between stages added by components
+        self.data: Dict[str, Any] = dict()
+
+
+class Stage():
+    """
+    A named step of the pipeline.
+    """
+
+    def __init__(self, name: str, function: Callable[[Envelope], Any], *, order: int, mode: str) -> None:
+        self.name: str = name
+        self.function: Callable[[Envelope], Any] = function
+        self.order: int = order
+        self.mode: str = mode
+
+
+class Pipeline():
+    """
+    The ordered stages every received message passes through.
+    """
+
+    def __init__(self) -> None:
+        self._stages: List[Stage] = list()
+        # hold references to background stages so they aren't collected while running
+        self._tasks: Set[Task] = set()
+
+    @property
+    def stages(self) -> List[Stage]:
+        """
+        The stages in the order they run.
+        """
+        return list(self._stages)
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of background stages still running.
+        """
+        return len(self._tasks)
+
+    def add(self, name: str, function: Callable[[Envelope], Any], *, order: int = 500, mode: str = SYNC) -> None:
+        """
+        Adds a stage, replacing any stage with the same name.
+        Stages with the same order run in the order they were added.
+        """
+        if mode not in (SYNC, ASYNC): raise ValueError(f"Unknown stage mode '{mode}'; expected '{SYNC}' or '{ASYNC}'")
+        # a plain function would run to completion on the event loop anyway, just later
+        if mode == ASYNC and not inspect.iscoroutinefunction(function): raise ValueError(f"Stage '{name}' must be a coroutine function to run in '{ASYNC}' mode")
+        self.remove(name)
+        stage: Stage = Stage(name, function, order=order, mode=mode)
+        # insert after every stage of the same or lower order
+        index: int = next((index for index, other in enumerate(self._stages) if other.order > order), len(self._stages))
+        self._stages.insert(index, stage)
+        log.debug('Added %s stage %s at %d', mode, name, order)
+
+    def remove(self, name: str) -> None:
+        """
+        Removes the stage with the name, if there is one.
+        """
+        self._stages = [stage for stage in self._stages if stage.name != name]
+
+    async def run(self, envelope: Envelope) -> bool:
+        """
+        Passes the envelope through each stage.
+        Returns False if a stage stopped it. Errors from synchronous stages are raised.
+        """
+        # a stage added or removed mid-message takes effect from the next message
+        for stage in list(self._stages):
+            if stage.mode == ASYNC:
+                task: Task = asyncio.create_task(self.__background__(stage, envelope), name=f'pipeline-{stage.name}')
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                continue
+            if await self.__invoke__(stage, envelope) is False:
+                STAGE_STOPS.inc(stage=stage.name)
+                return False
+        return True
+
+    def close(self) -> None:
+        """
+        Cancels the background stages still running.
+        """
+        for task in list(self._tasks): task.cancel()
+
+    async def __invoke__(self, stage: Stage, envelope: Envelope) -> Any:
+        start: float = time.perf_counter()
+        try:
+            result: Any = stage.function(envelope)
+            if inspect.isawaitable(result): result = await result
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            STAGE_ERRORS.inc(stage=stage.name)
+            raise
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage.name)
+
+    async def __background__(self, stage: Stage, envelope: Envelope) -> None:
+        try:
+            await self.__invoke__(stage, envelope)
+        except Exception as error:
+            log.error('Stage %s failed for message %s: %s', stage.name, envelope.message.id, error)
@@ -0,0 +1,341 @@
+"""
+Streaming NDJSON export and import of message archives.
+
+An export is laid out as one directory per guild and channel:
+
+    <directory>/<guild id>/<channel id>/manifest.json
+    <directory>/<guild id>/<channel id>/authors.ndjson.gz
+    <directory>/<guild id>/<channel id>/000000.ndjson.gz
+    <directory>/<guild id>/<channel id>/000001.ndjson.gz
+
+Each chunk is a gzip compressed file with one JSON message record per line.
+The authors file holds one JSON author record per line and is rewritten by every export.
+The manifest lists every completed chunk with its ID range and SHA-256 checksum,
+which allows interrupted exports and imports to resume where they stopped.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from logging import Logger
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from providers.channelArchive import ChannelArchive
+from providers.clientArchive import ClientArchive
+from providers.guildArchive import GuildArchive
+from providers.messageEntry import AttachmentEntry, AuthorEntry, MessageEntry
+
+log: Logger = logging.getLogger(__name__)
+
+MANIFEST: str = 'manifest.json'
+"""The name of the manifest file in each channel directory"""
+
+IMPORTED: str = 'imported.json'
+"""The name of the import progress file in each channel directory"""
+
+EXTENSION: str = '.ndjson.gz'
+"""The file extension used for chunk files"""
+
+AUTHORS: str = 'authors' + EXTENSION
+"""The name of the authors file in each channel directory"""
+
+
+class ArchiveExporter():
+    """
+    Writes archives to compressed NDJSON chunks.
+    """
+
+    def __init__(self, directory: Path, *, chunk_size: int = 10000, batch_size: int = 1000) -> None:
+        # resolve the export directory
+        self._directory: Path = directory.resolve()
+        # set the maximum number of messages per chunk
+        self._chunk_size: int = chunk_size
+        # set the number of messages read from the archive at a time
+        self._batch_size: int = min(batch_size, chunk_size)
+
+    async def export(self, archive: ClientArchive) -> int:
+        """
+        Exports every guild archive of the client archive.
+        Returns the number of exported messages.
+        """
+        count: int = 0
+        for guild_archive in archive.values():
+            count += await self.export_guild(guild_archive)
+        return count
+
+    async def export_guild(self, archive: GuildArchive) -> int:
+        """
+        Exports every channel archive of the guild archive.
+        Returns the number of exported messages.
+        """
+        count: int = 0
+        for channel_archive in archive.values():
+            count += await self.export_channel(archive._guild.id, channel_archive)
+        return count
+
+    async def export_channel(self, guild_id: int, archive: ChannelArchive) -> int:
+        """
+        Exports the channel archive, resuming after the last chunk recorded in the manifest.
+        Returns the number of exported messages.
+        """
+        # get the channel's export directory
+        directory: Path = self._directory.joinpath(str(guild_id), str(archive._channel.id))
+        # create the directory if it doesn't exist
+        if not directory.exists(): directory.mkdir(parents=True, exist_ok=True)
+        # load the manifest
+        manifest: Dict[str, Any] = _read(directory.joinpath(MANIFEST), {'guild': guild_id, 'channel': archive._channel.id, 'chunks': []})
+        # get the list of completed chunks
+        chunks: List[Dict[str, Any]] = manifest['chunks']
+        # resume after the last exported message
+        after: Optional[int] = chunks[-1]['last'] if chunks else None
+
+        count: int = 0
+        # annotate the batches iterator
+        batches: Iterator[List[MessageEntry]] = archive.stream(after=after, size=self._batch_size)
+        while True:
+            # get the path of the next chunk
+            path: Path = directory.joinpath(f'{len(chunks):06d}{EXTENSION}')
+            # write the next chunk
+            chunk: Optional[Dict[str, Any]] = self.__write_chunk__(path, batches)
+            # stop when the archive is exhausted
+            if not chunk: break
+            # record the chunk in the manifest
+            chunks.append(chunk)
+            _write(directory.joinpath(MANIFEST), manifest)
+            count += chunk['count']
+            log.debug('Exported %s messages to %s', chunk['count'], path)
+            # yield to the event loop between chunks
+            await asyncio.sleep(0)
+
+        # rewrite the authors file so it reflects the latest recorded names and avatars
+        manifest['authors'] = self.__write_authors__(directory.joinpath(AUTHORS), archive)
+        _write(directory.joinpath(MANIFEST), manifest)
+
+        return count
+
+    def __write_authors__(self, path: Path, archive: ChannelArchive) -> Dict[str, Any]:
+        """
+        Writes every recorded author of the archive to the path.
+        Returns the manifest record of the authors file.
+        """
+        temporary: Path = path.with_name(path.name + '.tmp')
+        count: int = 0
+        with gzip.open(temporary, 'wt', encoding='utf-8') as file:
+            for author in archive.authors():
+                file.write(json.dumps({'id': author.id, 'name': author.name, 'avatar': author.avatar}, ensure_ascii=False))
+                file.write('\n')
+                count += 1
+        os.replace(temporary, path)
+        return {'file': path.name, 'count': count, 'sha256': _checksum(path)}
+
+    def __write_chunk__(self, path: Path, batches: Iterator[List[MessageEntry]]) -> Optional[Dict[str, Any]]:
+        """
+        Writes up to one chunk worth of batches to the path.
+        Returns the manifest record of the chunk, or None if no messages remained.
+        """
+        # write to a temporary file so partial chunks are never mistaken for complete ones
+        temporary: Path = path.with_name(path.name + '.tmp')
+
+        first: Optional[int] = None
+        last: Optional[int] = None
+        count: int = 0
+        with gzip.open(temporary, 'wt', encoding='utf-8') as file:
+            for batch in batches:
+                for entry in batch:
+                    file.write(json.dumps(_record(entry), ensure_ascii=False))
+                    file.write('\n')
+                first = first if first is not None else batch[0].id
+                last = batch[-1].id
+                count += len(batch)
+                # stop once the chunk is full
+                if count >= self._chunk_size: break
+
+        # if nothing was written, discard the temporary file
+        if not count:
+            temporary.unlink()
+            return None
+
+        # move the completed chunk into place
+        os.replace(temporary, path)
+        return {'file': path.name, 'first': first, 'last': last, 'count': count, 'sha256': _checksum(path)}
+
+
+class ArchiveImporter():
+    """
+    Reads compressed NDJSON chunks into archives through the bulk insert path.
+    """
+
+    def __init__(self, directory: Path, *, batch_size: int = 1000) -> None:
+        # resolve the export directory
+        self._directory: Path = directory.resolve()
+        # set the number of messages inserted at a time
+        self._batch_size: int = batch_size
+
+    async def restore(self, archive: ClientArchive) -> int:
+        """
+        Imports every exported guild that has a matching guild archive.
+        Returns the number of inserted messages.
+        """
+        count: int = 0
+        for guild_id, guild_archive in archive.items():
+            if self._directory.joinpath(str(guild_id)).exists():
+                count += await self.restore_guild(guild_archive)
+        return count
+
+    async def restore_guild(self, archive: GuildArchive) -> int:
+        """
+        Imports every exported channel that has a matching channel archive.
+        Returns the number of inserted messages.
+        """
+        # get the guild's export directory
+        directory: Path = self._directory.joinpath(str(archive._guild.id))
+        if not directory.exists(): raise ArchiveTransferError(f'No export found for guild {archive._guild.id}')
+
+        count: int = 0
+        for channel_directory in sorted(path for path in directory.iterdir() if path.is_dir()):
+            try:
+                channel_archive: ChannelArchive = archive[int(channel_directory.name)]
+            except (KeyError, ValueError):
+                log.warning('Skipping %s: no matching channel archive', channel_directory)
+                continue
+            count += await self.restore_channel(channel_archive, channel_directory)
+        return count
+
+    async def restore_channel(self, archive: ChannelArchive, directory: Path) -> int:
+        """
+        Imports the chunks listed in the directory's manifest,
+        skipping chunks recorded as already imported.
+        Returns the number of inserted messages.
+        """
+        # load the manifest
+        manifest: Dict[str, Any] = _read(directory.joinpath(MANIFEST), None)
+        if manifest is None: raise ArchiveTransferError(f'No manifest found in {directory}')
+        # load the import progress
+        progress: Dict[str, Any] = _read(directory.joinpath(IMPORTED), {'chunks': []})
+        # get the set of imported chunks
+        imported: Set[str] = set(progress['chunks'])
+
+        # record the exported authors, if the export has any
+        authors: Optional[Dict[str, Any]] = manifest.get('authors')
+        if authors: self.__read_authors__(archive, directory.joinpath(authors['file']), authors['sha256'])
+
+        count: int = 0
+        for chunk in manifest['chunks']:
+            # skip chunks that were already imported
+            if chunk['file'] in imported: continue
+            # get the chunk's path
+            path: Path = directory.joinpath(chunk['file'])
+            # verify the chunk before inserting anything from it
+            checksum: str = _checksum(path)
+            if checksum != chunk['sha256']: raise ChecksumMismatchError(path, chunk['sha256'], checksum)
+            # insert the chunk's records
+            count += self.__read_chunk__(archive, path)
+            # record the chunk as imported
+            progress['chunks'].append(chunk['file'])
+            _write(directory.joinpath(IMPORTED), progress)
+            log.debug('Imported %s from %s', chunk['file'], directory)
+            # yield to the event loop between chunks
+            await asyncio.sleep(0)
+
+        return count
+
+    def __read_authors__(self, archive: ChannelArchive, path: Path, expected: str) -> None:
+        """
+        Streams the records of an authors file into the archive in batches.
+        """
+        # verify the file before recording anything from it
+        checksum: str = _checksum(path)
+        if checksum != expected: raise ChecksumMismatchError(path, expected, checksum)
+
+        batch: List[AuthorEntry] = list()
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                record: Dict[str, Any] = json.loads(line)
+                batch.append(AuthorEntry(record['id'], record['name'], record['avatar']))
+                if len(batch) >= self._batch_size:
+                    archive.record(batch)
+                    batch = list()
+        if batch: archive.record(batch)
+
+    def __read_chunk__(self, archive: ChannelArchive, path: Path) -> int:
+        """
+        Streams the records of a chunk into the archive in batches.
+        Returns the number of inserted messages.
+        """
+        count: int = 0
+        batch: List[MessageEntry] = list()
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                batch.append(_entry(json.loads(line)))
+                if len(batch) >= self._batch_size:
+                    count += archive.insert(batch)
+                    batch = list()
+        if batch: count += archive.insert(batch)
+        return count
+
+
+def _record(entry: MessageEntry) -> Dict[str, Any]:
+    """
+    Converts a message entry to an NDJSON record.
+    """
+    return {
+        'id': entry.id,
+        'author_id': entry.author_id,
+        'content': entry.content,
+        'timestamp': str(entry.timestamp) if entry.timestamp is not None else None,
+        'attachments': [{'id': attachment.id, 'url': attachment.url} for attachment in entry.attachments],
+    }
+
+def _entry(record: Dict[str, Any]) -> MessageEntry:
+    """
+    Converts an NDJSON record to a message entry.
+    """
+    entry: MessageEntry = MessageEntry(record['id'], record['author_id'], record['content'], record['timestamp'])
+    entry._attachments = [AttachmentEntry(attachment['id'], attachment['url']) for attachment in record['attachments']]
+    return entry
+
+def _checksum(path: Path) -> str:
+    """
+    Calculates the SHA-256 checksum of a file without loading it into memory.
+    """
+    digest = hashlib.sha256()
+    with path.open('rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read(path: Path, default: Any) -> Any:
+    """
+    Reads a JSON file, returning the default if it doesn't exist.
+    """
+    if not path.exists(): return default
+    return json.loads(path.read_text(encoding='utf-8'))
+
+def _write(path: Path, value: Any) -> None:
+    """
+    Atomically writes a JSON file.
+    """
+    temporary: Path = path.with_name(path.name + '.tmp')
+    temporary.write_text(json.dumps(value, indent=2), encoding='utf-8')
+    os.replace(temporary, path)
+
+
+class ArchiveTransferError(Exception):
+    """Base exception class for archive transfer related errors."""
+
+    def __init__(self, message: str, exception: Optional[Exception] = None):
+        self._message = message
+        self._inner_exception = exception
+
+    def __str__(self) -> str:
+        return self._message
+
+
+class ChecksumMismatchError(ArchiveTransferError):
+    def __init__(self, path: Path, expected: str, actual: str, exception: Optional[Exception] = None):
+        message: str = f'Checksum mismatch for {path.name}: expected {expected}, found {actual}'
+        super().__init__(message, exception)
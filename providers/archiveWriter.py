@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+from asyncio import AbstractEventLoop
+from collections import OrderedDict
+from logging import Logger
+from pathlib import Path
+from queue import Queue
+from sqlite3 import Connection
+from threading import Thread
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from database.profile import connect
+from providers.messageEntry import AuthorEntry, MessageEntry
+
+if TYPE_CHECKING:
+    from providers.channelArchive import ChannelArchive
+
+log: Logger = logging.getLogger(__name__)
+
+
+class ArchiveWriter():
+    """
+    Writes received messages to their channel archives from a single background thread.
+
+    Messages are converted to entries on the event loop, where discord.py's models are
+    safe to read, and queued; the writer thread owns its own connections to the channel
+    databases and inserts each batch in one transaction per channel. Archives use WAL
+    journaling, so the event loop's connections keep reading while the writer writes.
+    """
+
+    def __init__(self, *, capacity: int = 10000, max_open: int = 64, batch_size: int = 256) -> None:
+        # set the maximum number of simultaneously open connections
+        self._max_open: int = max_open
+        # set the maximum number of messages written per batch
+        self._batch_size: int = batch_size
+        # create the bounded entry queue
+        self._queue: Queue = Queue(maxsize=capacity)
+        # create the open connection LRU, owned by the writer thread
+        self._connections: OrderedDict[Path, Connection] = OrderedDict()
+        # count messages dropped because the queue was full
+        self._dropped: int = 0
+        # the event loop archives are notified of writes on
+        self._loop: Optional[AbstractEventLoop] = None
+        # create the writer thread
+        self._thread: Thread = Thread(target=self.__run__, name='ArchiveWriter', daemon=True)
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of messages waiting to be written.
+        """
+        return self._queue.qsize()
+
+    @property
+    def dropped(self) -> int:
+        """
+        The number of messages dropped because the queue was full.
+        """
+        return self._dropped
+
+    def start(self) -> None:
+        """
+        Starts the writer thread. Must be called from the event loop.
+        """
+        self._loop = asyncio.get_running_loop()
+        if not self._thread.is_alive(): self._thread.start()
+
+    def write(self, archive: ChannelArchive, entry: MessageEntry, authors: List[AuthorEntry]) -> bool:
+        """
+        Queues a message to be written to its channel's archive without blocking.
+        Returns False if the queue was full and the message was dropped.
+        """
+        try:
+            self._queue.put_nowait((archive, entry, authors))
+            return True
+        except queue.Full:
+            self._dropped += 1
+            return False
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Flushes the queued messages and stops the writer thread.
+        """
+        if not self._thread.is_alive(): return
+        # the sentinel is queued behind every pending message
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+    def __run__(self) -> None:
+        """
+        The writer thread's loop.
+        """
+        running: bool = True
+        while running:
+            # wait for the next message
+            item: Optional[Tuple[ChannelArchive, MessageEntry, List[AuthorEntry]]] = self._queue.get()
+            batch: List[Tuple[ChannelArchive, MessageEntry, List[AuthorEntry]]] = list()
+            # drain up to a batch worth of queued messages
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self._batch_size: break
+                try: item = self._queue.get_nowait()
+                except queue.Empty: break
+            # a sentinel ends the loop after the batch is written
+            if item is None: running = False
+            self.__write__(batch)
+
+        # close every open connection
+        for connection in self._connections.values(): connection.close()
+        self._connections.clear()
+
+    def __write__(self, batch: List[Tuple[ChannelArchive, MessageEntry, List[AuthorEntry]]]) -> None:
+        """
+        Writes a batch of messages, in one transaction per channel.
+        """
+        # group the entries by archive, preserving order
+        groups: Dict[Path, Tuple[ChannelArchive, List[MessageEntry], List[AuthorEntry]]] = dict()
+        for archive, entry, authors in batch:
+            group = groups.setdefault(archive.reference, (archive, list(), list()))
+            group[1].append(entry)
+            group[2].extend(authors)
+        for reference, (archive, entries, authors) in groups.items():
+            try:
+                count: int = archive.store(self.__open__(archive), entries, authors)
+            except Exception as error:
+                log.error('Could not archive %d messages to %s: %s', len(entries), reference.name, error)
+                continue
+            # tell the archive it changed on the event loop, where it is read
+            if count and self._loop: self._loop.call_soon_threadsafe(archive.touch)
+
+    def __open__(self, archive: ChannelArchive) -> Connection:
+        """
+        Returns the writer's connection to the archive, opening it and closing the least recently used connection if needed.
+        """
+        try:
+            # mark the connection as most recently used
+            self._connections.move_to_end(archive.reference)
+            return self._connections[archive.reference]
+        except KeyError:
+            pass
+        # close the least recently used connection
+        if len(self._connections) >= self._max_open:
+            _, evicted = self._connections.popitem(last=False)
+            evicted.close()
+        # connect with the archive's storage profile
+        connection: Connection = connect(archive.reference, archive.profile)
+        self._connections[archive.reference] = connection
+        return connection
@@ -0,0 +1,260 @@
+"""
+Content-addressed local storage for archived message attachments.
+
+Attachment bytes are stored once per SHA-256 digest:
+
+    <directory>/<digest[0:2]>/<digest[2:4]>/<digest>
+
+An index database maps attachment IDs to digests and records the
+bytes referenced by each guild so per-guild quotas can be enforced.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+from asyncio import Queue, Task
+from logging import Logger
+from pathlib import Path
+from sqlite3 import Connection, Cursor
+from typing import Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from database.profile import connect
+
+log: Logger = logging.getLogger(__name__)
+
+
+class BlobStore():
+    """
+    Downloads attachments through a bounded pool of async workers
+    and stores them in a deduplicated, content-addressed directory.
+    """
+
+    PROFILE: str = 'archive'
+    """The storage profile applied to the index connection"""
+
+    def __init__(self, directory: Path, *, workers: int = 4, queue_size: int = 1000, max_size: int = 8 << 20, quota: int = 1 << 30, index: str = 'index.db') -> None:
+        # resolve the blob directory
+        self._directory: Path = directory.resolve()
+        # create the blob directory if it doesn't exist
+        if not self._directory.exists(): self._directory.mkdir(parents=True, exist_ok=True)
+        # set the number of download workers
+        self._workers: int = workers
+        # set the largest attachment size to store
+        self._max_size: int = max_size
+        # set the maximum number of bytes stored per guild
+        self._quota: int = quota
+        # create the bounded download queue
+        self._queue: Queue = Queue(maxsize=queue_size)
+        # create the worker task list
+        self._tasks: List[Task] = list()
+        # create the set of queued attachment IDs
+        self._pending: Set[int] = set()
+        # create the per-guild usage cache
+        self._usage: Dict[int, int] = dict()
+        # create the per-guild count of bytes queued or downloading
+        self._reserved: Dict[int, int] = dict()
+        # the HTTP session is created when the workers start
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # connect to the index database
+        self._connection: Connection = connect(self._directory.joinpath(index), self.PROFILE)
+        # set the connection's row factory
+        self._connection.row_factory = sqlite3.Row
+        # create the tables
+        self.__create_attachments__()
+
+
+    def __create_attachments__(self) -> None:
+        # create the database cursor
+        self._cursor: Cursor = self._connection.cursor()
+        # assemble query
+        query: str = '''
+        CREATE TABLE IF NOT EXISTS Attachments (
+            ID INTEGER UNIQUE PRIMARY KEY,
+            GuildID INTEGER,
+            Hash TEXT,
+            Size INTEGER
+        )
+        '''
+        # assemble query parameters
+        parameters: Tuple = ()
+        # execute the query with parameters
+        self._cursor.execute(query, parameters)
+
+
+    def start(self) -> None:
+        """
+        Starts the download workers. Must be called from a running event loop.
+        """
+        if self._tasks: return
+        self._session = aiohttp.ClientSession()
+        self._tasks = [asyncio.create_task(self.__work__()) for _ in range(self._workers)]
+
+    async def close(self) -> None:
+        """
+        Stops the download workers and closes the index.
+        """
+        for task in self._tasks: task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = list()
+        if self._session: await self._session.close()
+        self._connection.close()
+
+    def submit(self, guild_id: int, attachment_id: int, url: str, size: int) -> bool:
+        """
+        Queues an attachment for download without waiting.
+        Returns False if the attachment was rejected by the size cap, the guild's quota or a full queue.
+        """
+        # skip attachments that are queued or already stored
+        if attachment_id in self._pending or self.path(attachment_id): return False
+        # skip attachments larger than the size cap
+        if size > self._max_size: return False
+        # skip attachments that would exceed the guild's quota, counting downloads not yet stored
+        if self.usage(guild_id) + self._reserved.get(guild_id, 0) + size > self._quota:
+            log.debug('Quota exceeded for guild %s; skipping attachment %s', guild_id, attachment_id)
+            return False
+        try:
+            self._queue.put_nowait((guild_id, attachment_id, url, size))
+            self._pending.add(attachment_id)
+            # reserve the attachment's bytes until its download completes or fails
+            self._reserved[guild_id] = self._reserved.get(guild_id, 0) + size
+            return True
+        except asyncio.QueueFull:
+            log.debug('Download queue is full; skipping attachment %s', attachment_id)
+            return False
+
+    def path(self, attachment_id: int) -> Optional[Path]:
+        """
+        Returns the local path of a stored attachment, or None if it isn't stored.
+        """
+        # assemble query
+        query: str = '''
+        SELECT Hash FROM Attachments
+        WHERE ID = ?
+        '''
+        # execute the select statement with parameter injection
+        row: Optional[sqlite3.Row] = self._cursor.execute(query, (attachment_id, )).fetchone()
+        # if the attachment is not stored, return None
+        if row is None: return None
+        # get the blob path from the digest
+        path: Path = self.__blob__(row['Hash'])
+        return path if path.exists() else None
+
+    def usage(self, guild_id: int) -> int:
+        """
+        Returns the number of attachment bytes stored for the guild.
+        """
+        if guild_id not in self._usage:
+            # assemble query
+            query: str = '''
+            SELECT COALESCE(SUM(Size), 0) AS Usage FROM Attachments
+            WHERE GuildID = ?
+            '''
+            self._usage[guild_id] = self._cursor.execute(query, (guild_id, )).fetchone()['Usage']
+        return self._usage[guild_id]
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of attachments waiting to be downloaded.
+        """
+        return self._queue.qsize()
+
+
+    def __blob__(self, digest: str) -> Path:
+        return self._directory.joinpath(digest[0:2], digest[2:4], digest)
+
+    async def __work__(self) -> None:
+        """
+        A download worker. Takes attachments from the queue until cancelled.
+        """
+        while True:
+            guild_id, attachment_id, url, size = await self._queue.get()
+            try:
+                await self.__download__(guild_id, attachment_id, url, size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                log.warning('Could not store attachment %s: %s', attachment_id, error)
+            finally:
+                self._pending.discard(attachment_id)
+                self.__release__(guild_id, size)
+                self._queue.task_done()
+
+    def __release__(self, guild_id: int, size: int) -> None:
+        # release the bytes reserved for a finished download
+        reserved: int = self._reserved.get(guild_id, 0) - size
+        if reserved > 0: self._reserved[guild_id] = reserved
+        else: self._reserved.pop(guild_id, None)
+
+    async def __download__(self, guild_id: int, attachment_id: int, url: str, reserved: int) -> None:
+        """
+        Streams an attachment to a temporary file while hashing it,
+        then moves it to its content address unless an identical blob exists.
+        """
+        temporary: Path = self._directory.joinpath(f'{attachment_id}.tmp')
+        digest = hashlib.sha256()
+        size: int = 0
+        try:
+            async with self._session.get(url) as response:
+                response.raise_for_status()
+                with temporary.open('wb') as file:
+                    async for block in response.content.iter_chunked(1 << 16):
+                        size += len(block)
+                        # abort downloads that exceed the size cap
+                        if size > self._max_size: raise BlobTooLargeError(attachment_id, self._max_size)
+                        # abort downloads that outgrow their reservation past the guild's quota
+                        if size > reserved and self.usage(guild_id) + self._reserved.get(guild_id, 0) - reserved + size > self._quota: raise BlobQuotaError(attachment_id, guild_id, self._quota)
+                        digest.update(block)
+                        file.write(block)
+
+            # get the blob path from the digest
+            path: Path = self.__blob__(digest.hexdigest())
+            # store the blob unless an identical one already exists
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temporary, path)
+        finally:
+            if temporary.exists(): temporary.unlink()
+
+        # assemble query
+        query: str = '''
+        INSERT OR IGNORE INTO Attachments VALUES (
+            ?,
+            ?,
+            ?,
+            ?
+        )
+        '''
+        # execute the insert statement with parameter injection
+        inserted: int = self._cursor.execute(query, (attachment_id, guild_id, digest.hexdigest(), size)).rowcount
+        # save changes
+        self._connection.commit()
+        # update the guild's cached usage
+        if inserted and guild_id in self._usage: self._usage[guild_id] += size
+
+
+class BlobStoreError(Exception):
+    """Base exception class for blob store related errors."""
+
+    def __init__(self, message: str, exception: Optional[Exception] = None):
+        self._message = message
+        self._inner_exception = exception
+
+    def __str__(self) -> str:
+        return self._message
+
+
+class BlobTooLargeError(BlobStoreError):
+    def __init__(self, attachment_id: int, max_size: int, exception: Optional[Exception] = None):
+        message: str = f'Attachment {attachment_id} exceeds the {max_size} byte size cap'
+        super().__init__(message, exception)
+
+
+class BlobQuotaError(BlobStoreError):
+    def __init__(self, attachment_id: int, guild_id: int, quota: int, exception: Optional[Exception] = None):
+        message: str = f'Attachment {attachment_id} would exceed the {quota} byte quota of guild {guild_id}'
+        super().__init__(message, exception)
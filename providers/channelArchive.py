@@ -5,19 +5,43 @@ from datetime import datetime
 from logging import Logger
 from pathlib import Path
 from sqlite3 import Connection, Cursor, IntegrityError
-from typing import Iterator, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import discord
 from discord import Message, TextChannel
 
-from providers.messageEntry import AttachmentEntry, MessageEntry
+import metrics
+from database.profile import connect
+from metrics import Histogram
+from providers.archiveWriter import ArchiveWriter
+from providers.messageEntry import AttachmentEntry, AuthorEntry, MessageEntry
+from restBudget import background
 
 log: Logger = logging.getLogger(__name__)
 
+WRITE_LATENCY: Histogram = metrics.histogram('archive_write_seconds', 'Time taken to archive a single message')
+
 
 class ChannelArchive(collections.abc.MutableMapping):
 
-    def __init__(self, directory: Path, channel: TextChannel) -> None:
+    PROFILE: str = 'archive'
+    """The storage profile applied to channel archive connections"""
+
+    AUTHOR_UPSERT: str = '''
+    INSERT INTO Authors VALUES (
+        ?,
+        ?,
+        ?
+    )
+    ON CONFLICT(ID) DO UPDATE SET
+        Name = excluded.Name,
+        Avatar = excluded.Avatar
+    WHERE Name IS NOT excluded.Name
+    OR Avatar IS NOT excluded.Avatar
+    '''
+    """Inserts an author, or updates its name and avatar if they changed"""
+
+    def __init__(self, directory: Path, channel: TextChannel, *, profile: Optional[str] = None, writer: Optional[ArchiveWriter] = None) -> None:
         # set channel
         self._channel: TextChannel = channel
         # resolve the directory path
@@ -25,14 +49,49 @@ class ChannelArchive(collections.abc.MutableMapping):
         # create the channel database if it doesn't exist
         if not self._directory.exists(): self._directory.touch(exist_ok=True)
         
-        # connect to the database
-        self._connection: Connection = sqlite3.connect(self._directory)
+        # connect to the database with the storage profile
+        self._profile: str = profile if profile else self.PROFILE
+        self._connection: Connection = connect(self._directory, self._profile)
         # set the connection's row factory
         self._connection.row_factory = sqlite3.Row
         # create the tables
         self.__create_messages__()
         self.__create_attachments__()
-        
+        self.__create_authors__()
+        # cache the last recorded name and avatar of each author
+        self._authors: Dict[int, Tuple[str, Optional[str]]] = dict()
+        # count the writes, so cached responses built from the archive can tell it changed
+        self._version: int = 0
+        # the optional writer received messages are saved through, off the event loop
+        self._writer: Optional[ArchiveWriter] = writer
+
+    @property
+    def version(self) -> int:
+        """
+        Increases every time messages are written to or deleted from the archive.
+        """
+        return self._version
+
+    @property
+    def reference(self) -> Path:
+        """
+        The path of the channel's database.
+        """
+        return self._directory
+
+    @property
+    def profile(self) -> str:
+        """
+        The name of the storage profile the database is opened with.
+        """
+        return self._profile
+
+    def touch(self) -> None:
+        """
+        Marks the archive as changed by a write made through another connection.
+        """
+        self._version += 1
+
 
     def __setitem__(self, key: int, value: MessageEntry):
         # assemble query
@@ -57,6 +116,7 @@ class ChannelArchive(collections.abc.MutableMapping):
             self._cursor.execute(query, parameters)
             # save changes
             self._connection.commit()
+            self._version += 1
         # catch integrity errors (UNIQUE constraints, etc.)
         except IntegrityError:
             raise
@@ -141,6 +201,7 @@ class ChannelArchive(collections.abc.MutableMapping):
             self._cursor.execute(query, parameters)
             # save changes
             self._connection.commit()
+            self._version += 1
         # catch integrity errors (UNIQUE constraints, etc.)
         except IntegrityError:
             raise
@@ -219,32 +280,226 @@ class ChannelArchive(collections.abc.MutableMapping):
         self._cursor.execute(query, parameters)
 
 
+    def insert(self, entries: Iterable[MessageEntry]) -> int:
+        """
+        Bulk inserts the provided entries in a single transaction.
+        Entries that already exist in the archive are ignored.
+        Returns the number of messages inserted.
+        """
+        # materialize the entries so they can be iterated twice
+        entries = list(entries)
+        # assemble query
+        query: str = '''
+        INSERT OR IGNORE INTO Messages VALUES (
+            ?,
+            ?,
+            ?,
+            ?
+        )
+        '''
+        # assemble query parameters
+        parameters: List[Tuple] = [(entry.id, entry.author_id, entry.content, entry.timestamp) for entry in entries]
+        # assemble query
+        query_a: str = '''
+        INSERT OR IGNORE INTO Attachments VALUES (
+            ?,
+            ?,
+            ?
+        )
+        '''
+        # assemble query parameters
+        parameters_a: List[Tuple] = [(attachment.id, entry.id, attachment.url) for entry in entries for attachment in entry.attachments]
+        # create a dedicated cursor for the transaction
+        cursor: Cursor = self._connection.cursor()
+        try:
+            # execute the insert statements with parameter injection
+            cursor.executemany(query, parameters)
+            # get the number of inserted messages
+            count: int = cursor.rowcount
+            # execute the insert statements with parameter injection
+            cursor.executemany(query_a, parameters_a)
+            # save changes
+            self._connection.commit()
+            if count: self._version += 1
+            # return the number of inserted messages
+            return count
+        except:
+            # discard the partial transaction
+            self._connection.rollback()
+            raise
+
+    def stream(self, *, after: Optional[int] = None, size: int = 1000) -> Iterator[List[MessageEntry]]:
+        """
+        Yields the archived messages in ascending ID order as batches of at most `size` entries.
+        Uses keyset pagination so only a single batch is held in memory at a time.
+
+        Parameters:
+            - after: only yield messages with an ID greater than this value
+            - size: the maximum number of entries per batch
+        """
+        # assemble query
+        query: str = '''
+        SELECT * FROM Messages
+        WHERE ID > ?
+        ORDER BY ID ASC
+        LIMIT ?
+        '''
+        # assemble query
+        query_a: str = '''
+        SELECT * FROM Attachments
+        WHERE MessageID BETWEEN ? AND ?
+        '''
+        # create a dedicated cursor so other queries can run between batches
+        cursor: Cursor = self._connection.cursor()
+        # start from the provided ID or the beginning of the archive
+        watermark: int = after if after is not None else -1
+        while True:
+            # fetch the next batch of rows
+            rows: List[sqlite3.Row] = cursor.execute(query, (watermark, size)).fetchall()
+            # stop when the archive is exhausted
+            if not rows: return
+            # create entries from the rows
+            entries: List[MessageEntry] = [MessageEntry(row['ID'], row['AuthorID'], row['Content'], row['Timestamp']) for row in rows]
+            # index the entries by ID
+            lookup: Dict[int, MessageEntry] = {entry.id: entry for entry in entries}
+            # fetch the attachments belonging to the batch
+            for attachment in cursor.execute(query_a, (entries[0].id, entries[-1].id)).fetchall():
+                # add the attachment to its entry
+                lookup[attachment['MessageID']]._attachments.append(AttachmentEntry.fromRow(attachment))
+            # advance the watermark
+            watermark = entries[-1].id
+            # yield the batch
+            yield entries
+
+
+    def __create_authors__(self) -> None:
+        # create the database cursor
+        self._cursor = self._connection.cursor()
+        # assemble query
+        query: str = '''
+        CREATE TABLE IF NOT EXISTS Authors (
+            ID INTEGER UNIQUE PRIMARY KEY,
+            Name TEXT,
+            Avatar TEXT
+        )
+        '''
+        # assemble query parameters
+        parameters: Tuple = ()
+        # execute the query with parameters
+        self._cursor.execute(query, parameters)
+
+
+    def record(self, entries: Iterable[AuthorEntry]) -> None:
+        """
+        Records the display name and avatar hash of each author,
+        writing only the authors that changed since they were last recorded.
+        """
+        changed: List[AuthorEntry] = self.__changed__(entries)
+        if not changed: return
+        # execute the upsert statement with parameter injection
+        self._connection.executemany(self.AUTHOR_UPSERT, [(entry.id, entry.name, entry.avatar) for entry in changed])
+        # save changes
+        self._connection.commit()
+
+    def store(self, connection: Connection, entries: List[MessageEntry], authors: List[AuthorEntry]) -> int:
+        """
+        Inserts the entries and upserts the authors through the provided connection, in a single transaction.
+        Used by the archive writer, which owns its own connections. Entries that already exist are ignored.
+        Returns the number of messages inserted.
+        """
+        with WRITE_LATENCY.time():
+            try:
+                cursor: Cursor = connection.cursor()
+                cursor.executemany('''
+                INSERT OR IGNORE INTO Messages VALUES (
+                    ?,
+                    ?,
+                    ?,
+                    ?
+                )
+                ''', [(entry.id, entry.author_id, entry.content, entry.timestamp) for entry in entries])
+                count: int = cursor.rowcount
+                cursor.executemany('''
+                INSERT OR IGNORE INTO Attachments VALUES (
+                    ?,
+                    ?,
+                    ?
+                )
+                ''', [(attachment.id, entry.id, attachment.url) for entry in entries for attachment in entry.attachments])
+                cursor.executemany(self.AUTHOR_UPSERT, [(entry.id, entry.name, entry.avatar) for entry in authors])
+                connection.commit()
+                return count
+            except:
+                # discard the partial transaction
+                connection.rollback()
+                raise
+
+    def __changed__(self, entries: Iterable[AuthorEntry]) -> List[AuthorEntry]:
+        """
+        Returns the authors that changed since they were last recorded, and marks them as recorded.
+        """
+        entries = list(entries)
+        changed: List[AuthorEntry] = [entry for entry in entries if self._authors.get(entry.id) != (entry.name, entry.avatar)]
+        metrics.CACHE_REQUESTS.inc(len(entries) - len(changed), cache='authors', result='hit')
+        metrics.CACHE_REQUESTS.inc(len(changed), cache='authors', result='miss')
+        # update the cache
+        for entry in changed: self._authors[entry.id] = (entry.name, entry.avatar)
+        return changed
+
+    def authors(self) -> Iterator[AuthorEntry]:
+        """
+        Yields every recorded author.
+        """
+        # assemble query
+        query: str = '''
+        SELECT * FROM Authors
+        '''
+        for row in self._connection.execute(query):
+            yield AuthorEntry.fromRow(row)
+
+
     def save(self, message: Message) -> None:
-        entry = MessageEntry(message.id, message.author.id, message.content, message.created_at, message.attachments)
-        self.__setitem__(message.id, entry)
+        # read the message's models here, on the event loop
+        entry, authors = self.__entries__(message)
+        # queue the write for the writer thread
+        if self._writer and self._writer.write(self, entry, authors): return
+        # write directly if there is no writer, or its queue is full
+        self.__save__(entry, authors)
+
+    def __entries__(self, message: Message) -> Tuple[MessageEntry, List[AuthorEntry]]:
+        entry: MessageEntry = MessageEntry(message.id, message.author.id, message.content, message.created_at, message.attachments)
+        return entry, self.__changed__([AuthorEntry.fromUser(message.author)])
+
+    def __save__(self, entry: MessageEntry, authors: List[AuthorEntry]) -> None:
+        with WRITE_LATENCY.time():
+            self.__setitem__(entry.id, entry)
+            if not authors: return
+            self._connection.executemany(self.AUTHOR_UPSERT, [(author.id, author.name, author.avatar) for author in authors])
+            self._connection.commit()
 
     async def fetch(self) -> None:
         try:
             # annotate message type
             message: Message
+            # backfill at background priority, so command replies keep their share of the rate limits
+            with background():
+                # for each message in the channel history before the oldest recorded message 
+                async for message in self._channel.history(limit=None, before=self.oldest, oldest_first=False):
+                    log.debug('Writing message %s to %s', message.id, self._directory.name)
+                    try:
+                        # write the message directly, so a backfill never overflows the writer's queue
+                        self.__save__(*self.__entries__(message))
+                    except IntegrityError:
+                        pass
 
-            # for each message in the channel history before the oldest recorded message 
-            async for message in self._channel.history(limit=None, before=self.oldest, oldest_first=False):
-                logging.debug('Writing message %s to %s', message.id, self._directory.name)
-                try:
-                    # write the message
-                    self.save(message)
-                except IntegrityError:
-                    pass
-
-            # for each message in the channel history after the newest recorded message 
-            async for message in self._channel.history(limit=None, after=self.newest, oldest_first=True):
-                logging.debug('Writing message %s to %s', message.id, self._directory.name)
-                try:
-                    # write the message
-                    self.save(message)
-                except IntegrityError:
-                    pass
+                # for each message in the channel history after the newest recorded message 
+                async for message in self._channel.history(limit=None, after=self.newest, oldest_first=True):
+                    log.debug('Writing message %s to %s', message.id, self._directory.name)
+                    try:
+                        # write the message directly, so a backfill never overflows the writer's queue
+                        self.__save__(*self.__entries__(message))
+                    except IntegrityError:
+                        pass
         except discord.Forbidden:
             raise
 
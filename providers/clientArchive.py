@@ -7,6 +7,8 @@ from typing import Dict, Iterator, Optional
 import discord
 from discord import Client, Guild, Message
 
+from providers.archiveWriter import ArchiveWriter
+from providers.blobStore import BlobStore
 from providers.channelArchive import ChannelArchive
 from providers.guildArchive import GuildArchive
 
@@ -15,16 +17,20 @@ log: Logger = logging.getLogger(__name__)
 
 class ClientArchive(collections.abc.MutableMapping):
     
-    def __init__(self, directory: Path, client: Client) -> None:
+    def __init__(self, directory: Path, client: Client, blobs: Optional[BlobStore] = None, writer: Optional[ArchiveWriter] = None) -> None:
         # set client
         self._client: Client = client
+        # set the optional attachment blob store
+        self._blobs: Optional[BlobStore] = blobs
+        # set the optional writer received messages are saved through
+        self._writer: Optional[ArchiveWriter] = writer
         # resolve the provided directory path and append client directory
         self._directory: Path = directory.resolve().joinpath(str(self._client.user.id))
         # if the provided directory doesn't exist
         if not self._directory.exists(): self._directory.mkdir(parents=True, exist_ok=True)
 
         # initialize the archives directory
-        self._archives: Dict[int, GuildArchive] = {guild.id: GuildArchive(self._directory, guild) for guild in self._client.guilds}
+        self._archives: Dict[int, GuildArchive] = {guild.id: GuildArchive(self._directory, guild, writer=self._writer) for guild in self._client.guilds}
 
         
     def __setitem__(self, key: int, value: GuildArchive) -> None:
@@ -46,9 +52,14 @@ class ClientArchive(collections.abc.MutableMapping):
         return self._archives.__str__()
 
 
+    @property
+    def blobs(self) -> Optional[BlobStore]:
+        return self._blobs
+
+
     def add(self, guild: Guild) -> None:
         # add the guild archive by ID
-        self._archives[guild.id] = GuildArchive(self._directory, guild)
+        self._archives[guild.id] = GuildArchive(self._directory, guild, writer=self._writer)
     
     def remove(self, guild: Guild) -> None:
         # remove the guild archive by ID
@@ -59,6 +70,10 @@ class ClientArchive(collections.abc.MutableMapping):
         guild: Optional[Guild] = message.guild
         # save the message
         if guild: self._archives[guild.id].save(message)
+        # queue the message's attachments for local storage
+        if guild and self._blobs:
+            for attachment in message.attachments:
+                self._blobs.submit(guild.id, attachment.id, attachment.url, attachment.size)
 
     async def fetch(self) -> None:
         for archive in self._archives.values():
@@ -0,0 +1,190 @@
+"""
+Columnar (Arrow IPC or Parquet) export of message archives for offline analytics.
+
+An export is partitioned by guild, channel and month:
+
+    <directory>/guild=<guild id>/channel=<channel id>/month=<YYYY-MM>/part-<first message id>.parquet
+
+Exports are incremental: the ID of the newest exported message of each channel
+is recorded in a watermark file, and later exports only write newer messages.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from logging import Logger
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utilities.snowflake import Snowflake
+
+from providers.channelArchive import ChannelArchive
+from providers.clientArchive import ClientArchive
+from providers.guildArchive import GuildArchive
+from providers.messageEntry import MessageEntry
+
+log: Logger = logging.getLogger(__name__)
+
+WATERMARKS: str = 'watermarks.json'
+"""The name of the file recording the newest exported message per channel"""
+
+FORMATS: Dict[str, str] = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+"""The supported output formats and their file extensions"""
+
+
+class ColumnarExporter():
+    """
+    Streams archives from sqlite into partitioned columnar files.
+    """
+
+    def __init__(self, directory: Path, *, format: str = 'parquet', batch_size: int = 10000) -> None:
+        if format not in FORMATS: raise ValueError(f"Unknown format '{format}'; expected one of {', '.join(FORMATS)}")
+        # resolve the export directory
+        self._directory: Path = directory.resolve()
+        # create the directory if it doesn't exist
+        if not self._directory.exists(): self._directory.mkdir(parents=True, exist_ok=True)
+        # set the output format
+        self._format: str = format
+        # set the number of messages read from the archive at a time
+        self._batch_size: int = batch_size
+        # load the watermarks
+        path: Path = self._directory.joinpath(WATERMARKS)
+        self._watermarks: Dict[str, int] = json.loads(path.read_text(encoding='utf-8')) if path.exists() else dict()
+
+    async def export(self, archive: ClientArchive) -> int:
+        """
+        Exports every guild archive of the client archive.
+        Returns the number of exported messages.
+        """
+        count: int = 0
+        for guild_archive in archive.values():
+            count += await self.export_guild(guild_archive)
+        return count
+
+    async def export_guild(self, archive: GuildArchive) -> int:
+        """
+        Exports every channel archive of the guild archive.
+        Returns the number of exported messages.
+        """
+        count: int = 0
+        for channel_archive in archive.values():
+            count += await self.export_channel(archive._guild.id, channel_archive)
+        return count
+
+    async def export_channel(self, guild_id: int, archive: ChannelArchive) -> int:
+        """
+        Exports the messages of the channel archive newer than its watermark.
+        Returns the number of exported messages.
+        """
+        import pyarrow
+
+        # get the channel's key in the watermarks
+        key: str = str(archive._channel.id)
+        # get the channel's partition directory
+        directory: Path = self._directory.joinpath(f'guild={guild_id}', f'channel={archive._channel.id}')
+
+        count: int = 0
+        part: Optional[Part] = None
+        month: Optional[str] = None
+        for batch in archive.stream(after=self._watermarks.get(key), size=self._batch_size):
+            # group the batch by month; the batch is ordered by ID, so months are contiguous
+            for partition, entries in self.__partition__(batch):
+                # when the month changes, finish the current partition file
+                if partition != month:
+                    if part: self.__close__(part, key)
+                    part = self.__open__(directory.joinpath(f'month={partition}'), entries[0].id)
+                    month = partition
+                # write the entries as a record batch
+                part.writer.write_batch(pyarrow.RecordBatch.from_pydict(self.__columns__(entries), schema=self._schema))
+                part.last = entries[-1].id
+                count += len(entries)
+            # yield to the event loop between batches
+            await asyncio.sleep(0)
+
+        if part: self.__close__(part, key)
+        if count: log.debug('Exported %s messages to %s', count, directory)
+        return count
+
+    @property
+    def _schema(self) -> Any:
+        import pyarrow
+        return pyarrow.schema([
+            ('id', pyarrow.int64()),
+            ('author_id', pyarrow.int64()),
+            ('content', pyarrow.string()),
+            ('timestamp', pyarrow.timestamp('ms', tz='UTC')),
+            ('attachments', pyarrow.list_(pyarrow.string())),
+        ])
+
+    def __partition__(self, entries: List[MessageEntry]) -> List[Tuple[str, List[MessageEntry]]]:
+        """
+        Splits ID ordered entries into contiguous (month, entries) groups.
+        """
+        groups: List[Tuple[str, List[MessageEntry]]] = list()
+        for entry in entries:
+            month: str = datetime.fromtimestamp(Snowflake(entry.id).timestamp / 1000, tz=timezone.utc).strftime('%Y-%m')
+            if not groups or groups[-1][0] != month: groups.append((month, list()))
+            groups[-1][1].append(entry)
+        return groups
+
+    def __columns__(self, entries: List[MessageEntry]) -> Dict[str, List[Any]]:
+        """
+        Converts entries to a mapping of column names to values.
+        """
+        return {
+            'id': [entry.id for entry in entries],
+            'author_id': [entry.author_id for entry in entries],
+            'content': [entry.content for entry in entries],
+            'timestamp': [Snowflake(entry.id).timestamp for entry in entries],
+            'attachments': [[attachment.url for attachment in entry.attachments] for entry in entries],
+        }
+
+    def __open__(self, directory: Path, first: int) -> 'Part':
+        """
+        Opens a writer for a new part file in the partition directory.
+        """
+        # create the partition directory if it doesn't exist
+        if not directory.exists(): directory.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file so partial parts are never picked up by readers
+        path: Path = directory.joinpath(f'part-{first}{FORMATS[self._format]}')
+        temporary: Path = path.with_name(path.name + '.tmp')
+
+        if self._format == 'parquet':
+            import pyarrow.parquet
+            writer = pyarrow.parquet.ParquetWriter(str(temporary), self._schema)
+        else:
+            import pyarrow.ipc
+            writer = pyarrow.ipc.new_file(str(temporary), self._schema)
+
+        return Part(writer, path, temporary)
+
+    def __close__(self, part: 'Part', key: str) -> None:
+        """
+        Finishes a part file and advances the channel's watermark past it.
+        """
+        part.writer.close()
+        os.replace(part.temporary, part.path)
+        # record the newest exported message
+        self._watermarks[key] = part.last
+        # atomically write the watermarks
+        path: Path = self._directory.joinpath(WATERMARKS)
+        temporary: Path = path.with_name(path.name + '.tmp')
+        temporary.write_text(json.dumps(self._watermarks, indent=2), encoding='utf-8')
+        os.replace(temporary, path)
+
+
+class Part():
+    """
+    An open part file being written to a partition.
+    """
+
+    def __init__(self, writer: Any, path: Path, temporary: Path) -> None:
+        self.writer: Any = writer
+        self.path: Path = path
+        self.temporary: Path = temporary
+        self.last: Optional[int] = None
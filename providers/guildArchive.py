@@ -8,6 +8,7 @@ import discord
 from discord import DMChannel, GroupChannel, Guild, Message, TextChannel
 from discord.abc import GuildChannel, Messageable
 
+from providers.archiveWriter import ArchiveWriter
 from providers.clientArchive import ChannelArchive
 
 log: Logger = logging.getLogger(__name__)
@@ -15,16 +16,18 @@ log: Logger = logging.getLogger(__name__)
 
 class GuildArchive(collections.abc.MutableMapping):
 
-    def __init__(self, directory: Path, guild: Guild) -> None:
+    def __init__(self, directory: Path, guild: Guild, *, writer: Optional[ArchiveWriter] = None) -> None:
         # set guild
         self._guild: Guild = guild
+        # set the optional writer received messages are saved through
+        self._writer: Optional[ArchiveWriter] = writer
         # resolve the provided directory path and append guild directory
         self._directory: Path = directory.resolve().joinpath(str(self._guild.id))
         # create the guild folder if it doesn't exist
         if not self._directory.exists(): self._directory.mkdir(parents=True, exist_ok=True)
 
         # create the archives dictionary
-        self._archives: Dict[int, ChannelArchive] = {channel.id: ChannelArchive(self._directory, channel) for channel in self._guild.text_channels}
+        self._archives: Dict[int, ChannelArchive] = {channel.id: ChannelArchive(self._directory, channel, writer=self._writer) for channel in self._guild.text_channels}
 
 
     def __setitem__(self, key: int, value: ChannelArchive) -> None:
@@ -51,7 +54,7 @@ class GuildArchive(collections.abc.MutableMapping):
         if not isinstance(channel, Messageable):
             raise ValueError('Channel to archive must be Messageable.')
         # add the guild archive by ID
-        self._archives[channel.id] = ChannelArchive(self._directory, channel)
+        self._archives[channel.id] = ChannelArchive(self._directory, channel, writer=self._writer)
     
     def remove(self, channel: GuildChannel) -> None:
         # remove the guild archive by ID
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from datetime import datetime
 from sqlite3 import Row
-from typing import Any, List, Tuple, Type
+from typing import Any, List, Optional, Tuple, Type, Union
 
-from discord import Attachment, Message
+from discord import Attachment, Member, Message, User
 from database.column import ColumnBuilder
 
 from database.storable import Storable, TStorable
@@ -34,6 +34,40 @@ class AttachmentEntry():
         return self._url
         
 
+class AuthorEntry():
+
+    @classmethod
+    def fromUser(cls, user: Union[User, Member]) -> AuthorEntry:
+        return cls(user.id, user.display_name, user.avatar)
+
+    @classmethod
+    def fromRow(cls, row: Row) -> AuthorEntry:
+        return cls(row['ID'], row['Name'], row['Avatar'])
+
+    def __init__(self, id: int, name: str, avatar: Optional[str]) -> None:
+        self._id: int = id
+        self._name: str = name
+        self._avatar: Optional[str] = avatar
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def avatar(self) -> Optional[str]:
+        return self._avatar
+
+    @property
+    def avatar_url(self) -> str:
+        if not self._avatar: return f'https://cdn.discordapp.com/embed/avatars/0.png'
+        extension: str = 'gif' if self._avatar.startswith('a_') else 'png'
+        return f'https://cdn.discordapp.com/avatars/{self._id}/{self._avatar}.{extension}'
+
+
 class MessageEntry(Storable):
 
     def __init__(self, messageID: int, authorID: int, content: str, timestamp: datetime, attachments: List[Attachment] = list()) -> None:
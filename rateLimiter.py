@@ -16,6 +16,20 @@ class RateLimiter():
         self._settings: Settings = settings
         self._history: Dict[int, deque] = dict()
 
+    @property
+    def tracked(self) -> int:
+        '''
+        The number of authors with a message history.
+        '''
+        return len(self._history)
+
+    @property
+    def entries(self) -> int:
+        '''
+        The number of message timestamps held across every author's history.
+        '''
+        return sum(len(queue) for queue in self._history.values())
+
     def check(self, message: Message) -> None:
         '''
         Checks if the message meets the rate limit policy.
@@ -0,0 +1,109 @@
+"""
+Caches the responses of idempotent, read-only commands.
+
+A command builds its response in a method marked idempotent, and sends a copy of the result:
+
+    @idempotent(ttl=300.0, key=lambda context: context.message.author.id)
+    async def __build_age__(self, context: Context) -> Embed: ...
+
+Responses are keyed by the builder, its arguments, the key function's result and the
+version function's result, so a response is rebuilt when the data it was built from changes.
+Entries expire after their TTL, the least recently used entries are evicted beyond the cache's
+capacity, and every entry is discarded when components are loaded or reloaded.
+Cached values are shared between callers and must be copied before they are modified.
+"""
+
+import functools
+import logging
+import time
+from collections import OrderedDict
+from logging import Logger
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple, TypeVar
+
+import metrics
+
+log: Logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class ResponseCache():
+    """
+    A least recently used cache whose entries expire.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self._capacity: int = capacity
+        # map each key to its expiry time and value, least recently used first
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        # increases every time the cache is invalidated
+        self._generation: int = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value, or None if it is missing or expired.
+        """
+        entry: Optional[Tuple[float, Any]] = self._entries.get(key)
+        if entry is None: return None
+        expiry, value = entry
+        if expiry < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        # evict the least recently used entries
+        while len(self._entries) > self._capacity: self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """
+        Discards every entry.
+        """
+        self._entries.clear()
+        self._generation += 1
+        log.debug('Invalidated cached responses (generation %d)', self._generation)
+
+
+RESPONSES: ResponseCache = ResponseCache()
+"""The process-wide response cache"""
+
+
+def idempotent(*, ttl: float, key: Optional[Callable[..., Hashable]] = None, version: Optional[Callable[..., Hashable]] = None) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Caches the result of an async response builder taking (self, context, **kwargs).
+
+    Parameters:
+        - ttl: the number of seconds a response stays cached
+        - key: returns the parts of the context the response depends on, such as the channel or author
+        - version: returns the version of the data the response was built from, such as an archive's version
+    """
+    def decorator(function: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        name: str = function.__qualname__
+        @functools.wraps(function)
+        async def wrapper(self, context, **kwargs) -> T:
+            cache_key: Hashable = (
+                name,
+                tuple(sorted(kwargs.items())),
+                key(context) if key else None,
+                version(context) if version else None,
+            )
+            value: Optional[T] = RESPONSES.get(cache_key)
+            if value is not None:
+                metrics.cache_hit('responses')
+                return value
+            metrics.cache_miss('responses')
+            value = await function(self, context, **kwargs)
+            RESPONSES.set(cache_key, value, ttl)
+            return value
+        return wrapper
+    return decorator
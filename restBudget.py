@@ -0,0 +1,212 @@
+"""
+Shares Discord's REST rate limits between interactive replies and background work.
+
+Every REST call made through the client's HTTP client is classified as interactive or
+background. Calls are interactive unless made inside background():
+
+    with background():
+        async for message in channel.history(limit=None): ...
+
+Background calls are held back so interactive calls always have headroom:
+
+- globally, background calls may only use part of the requests allowed per second;
+- per bucket, background calls stop once the bucket's remaining requests, read from the
+  X-RateLimit headers of the last response, fall to the reserved share of its limit, and
+  resume when the bucket resets;
+- after a 429, background calls pause for the retry period, and the global share given
+  to background calls is halved; it grows back by one request per second of calls that
+  aren't rate limited.
+
+Interactive calls are only held to the global limit.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from logging import Logger
+from math import ceil
+from typing import Any, Awaitable, Callable, Dict, Iterator, Mapping, Optional
+
+from aiohttp import ClientSession, TraceConfig, TraceRequestEndParams
+
+import metrics
+from metrics import Counter, Histogram
+from outbound import GLOBAL, Window
+
+log: Logger = logging.getLogger(__name__)
+
+INTERACTIVE: str = 'interactive'
+"""Calls a user is waiting on, such as command replies"""
+BACKGROUND: str = 'background'
+"""Calls nobody is waiting on, such as history backfills"""
+
+_PRIORITY: ContextVar[str] = ContextVar('rest_priority', default=INTERACTIVE)
+"""The priority of REST calls made by the current task"""
+_BUCKET: ContextVar[Optional[str]] = ContextVar('rest_bucket', default=None)
+"""The bucket of the REST call in flight, so the response's headers can be attributed to it"""
+
+REST_WAIT: Histogram = metrics.histogram('rest_wait_seconds', 'Time REST calls were held back by the budget', ('priority', ))
+REST_REQUESTS: Counter = metrics.counter('rest_requests_total', 'REST calls made', ('priority', ))
+REST_RATE_LIMITED: Counter = metrics.counter('rest_rate_limited_total', 'REST calls answered with a 429', ('scope', ))
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """
+    Marks the REST calls made inside the block, and by tasks it starts, as background work.
+    """
+    token: Token = _PRIORITY.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def priority() -> str:
+    """
+    Returns the priority of REST calls made by the current task.
+    """
+    return _PRIORITY.get()
+
+
+class BucketState():
+    """
+    The rate limit of a bucket, as of its last response.
+    """
+
+    def __init__(self, limit: int, remaining: int, reset: float) -> None:
+        self.limit: int = limit
+        self.remaining: int = remaining
+        # the monotonic time the bucket resets at
+        self.reset: float = reset
+
+
+class RestBudget():
+    """
+    Holds background REST calls back so interactive calls keep headroom.
+    """
+
+    def __init__(self, *, reserve: float = 0.4, rate: int = GLOBAL[0], period: float = GLOBAL[1]) -> None:
+        # the share of each limit kept free for interactive calls
+        self._reserve: float = min(max(reserve, 0.0), 0.9)
+        self._rate: int = rate
+        self._period: float = period
+        self._global: Window = Window(rate, period)
+        # the most background calls may use of the global limit; lowered after a 429
+        self._background: Window = Window(self.__background_rate__(), period)
+        self._buckets: Dict[str, BucketState] = dict()
+        # background calls wait until this monotonic time after a 429
+        self._paused: float = 0.0
+        # the last time the background share grew back
+        self._recovered: float = time.monotonic()
+
+    @property
+    def background_rate(self) -> int:
+        """
+        The number of background calls currently allowed per period.
+        """
+        return self._background.count
+
+    def install(self, http: Any) -> None:
+        """
+        Routes the HTTP client's requests through the budget.
+        """
+        request: Callable[..., Awaitable[Any]] = http.request
+
+        async def __request__(route: Any, **kwargs) -> Any:
+            await self.acquire(route.bucket)
+            token: Token = _BUCKET.set(route.bucket)
+            try:
+                return await request(route, **kwargs)
+            finally:
+                _BUCKET.reset(token)
+
+        http.request = __request__
+
+    def trace(self) -> TraceConfig:
+        """
+        Returns a trace config that reads the rate limit headers of every response.
+        """
+        config: TraceConfig = TraceConfig()
+        config.on_request_end.append(self.__on_request_end__)
+        return config
+
+    def attach(self, session: Optional[ClientSession]) -> bool:
+        """
+        Adds the trace config to a session that has already been created.
+        Returns False if the session can't be traced, leaving the budget to the global limits.
+        """
+        configs: Optional[list] = getattr(session, '_trace_configs', None)
+        if configs is None: return False
+        config: TraceConfig = self.trace()
+        config.freeze()
+        configs.append(config)
+        return True
+
+    async def acquire(self, bucket: Optional[str] = None) -> None:
+        """
+        Waits until a call may be made in the current priority.
+        """
+        start: float = time.perf_counter()
+        current: str = _PRIORITY.get()
+        if current == BACKGROUND:
+            while True:
+                delay: float = self.__background_delay__(bucket)
+                if delay <= 0: break
+                await asyncio.sleep(delay)
+            await self._background.acquire()
+            # leave the reserved share of the global limit for interactive calls
+            await self._global.acquire(headroom=ceil(self._rate * self._reserve))
+        else:
+            await self._global.acquire()
+        REST_WAIT.observe(time.perf_counter() - start, priority=current)
+        REST_REQUESTS.inc(priority=current)
+
+    def observe(self, bucket: Optional[str], status: int, headers: Mapping[str, str]) -> None:
+        """
+        Updates the budget from a response's rate limit headers.
+        """
+        now: float = time.monotonic()
+        try:
+            if bucket and 'X-RateLimit-Limit' in headers:
+                # forget buckets that have reset once there are many, such as one per channel
+                if len(self._buckets) >= 1024: self._buckets = {key: state for key, state in self._buckets.items() if state.reset > now}
+                self._buckets[bucket] = BucketState(
+                    int(headers['X-RateLimit-Limit']),
+                    int(headers.get('X-RateLimit-Remaining', 0)),
+                    now + float(headers.get('X-RateLimit-Reset-After', 0)),
+                )
+            if status == 429:
+                scope: str = 'global' if headers.get('X-RateLimit-Global') else headers.get('X-RateLimit-Scope', 'user')
+                REST_RATE_LIMITED.inc(scope=scope)
+                retry_after: float = float(headers.get('Retry-After', 1))
+                self._paused = max(self._paused, now + retry_after)
+                self._background.count = self._background.count // 2
+                self._recovered = now
+                log.info('Rate limited (%s); pausing background calls for %.1fs at %d per period', scope, retry_after, self._background.count)
+                return
+        except ValueError as error:
+            log.debug('Could not read rate limit headers: %s', error)
+            return
+        # grow the background share back by one call for every period without a 429
+        periods: int = int((now - self._recovered) / self._period)
+        if periods:
+            self._background.count = min(self._background.count + periods, self.__background_rate__())
+            self._recovered = now
+
+    def __background_rate__(self) -> int:
+        return max(self._rate - ceil(self._rate * self._reserve), 1)
+
+    def __background_delay__(self, bucket: Optional[str]) -> float:
+        now: float = time.monotonic()
+        if self._paused > now: return self._paused - now
+        state: Optional[BucketState] = self._buckets.get(bucket) if bucket else None
+        if not state or state.reset <= now: return 0.0
+        # keep the reserved share of the bucket for interactive calls, but always allow one call per reset
+        headroom: int = min(ceil(state.limit * self._reserve), state.limit - 1)
+        return state.reset - now if state.remaining <= headroom else 0.0
+
+    async def __on_request_end__(self, session: ClientSession, context: Any, params: TraceRequestEndParams) -> None:
+        self.observe(_BUCKET.get(), params.response.status, params.response.headers)
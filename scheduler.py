@@ -0,0 +1,281 @@
+"""
+Runs commands in cost lanes, so bursts of expensive commands can't starve cheap ones.
+
+Each lane has its own workers and a bounded queue. Queued commands are grouped by guild
+and taken round-robin across guilds, and each guild may only run a limited number of
+commands in a lane at once.
+
+Commands declare their lane with the cost decorator, on the command or on its component:
+
+    @cost(HEAVY)
+    async def compile(self, context: Context): ...
+
+Undeclared commands run in the light lane. Lanes are recorded per component, so commands
+with the same name in different components may run in different lanes.
+"""
+
+import asyncio
+import logging
+import time
+from asyncio import Condition, Future, Task
+from collections import deque
+from logging import Logger
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import metrics
+from metrics import Counter, Histogram
+
+log: Logger = logging.getLogger(__name__)
+
+LIGHT: str = 'light'
+"""Cheap commands that reply from memory or a single query"""
+HEAVY: str = 'heavy'
+"""CPU or disk heavy commands, such as model builds, rendering and exports"""
+EXTERNAL: str = 'external'
+"""Commands that wait on an external API"""
+
+LANES: Tuple[str, ...] = (LIGHT, HEAVY, EXTERNAL)
+
+COSTS: Dict[Tuple[str, str], str] = dict()
+"""The declared lane of each command, keyed by (component, command) name"""
+
+QUEUE_WAIT: Histogram = metrics.histogram('scheduler_queue_wait_seconds', 'Time commands spent queued before running', ('lane', ))
+REJECTED: Counter = metrics.counter('scheduler_rejected_total', 'Commands rejected because their queue was full', ('lane', ))
+
+T = TypeVar('T')
+
+
+def cost(lane: str) -> Callable[[T], T]:
+    """
+    Declares the lane of a command, or of every command of a component class.
+    Commands declared individually keep their own lane.
+    """
+    if lane not in LANES: raise ValueError(f"Unknown lane '{lane}'; expected one of {', '.join(LANES)}")
+    def decorator(target: T) -> T:
+        if isinstance(target, type):
+            # assign rather than keep earlier entries, so a reloaded class replaces its previous lanes
+            for name, member in vars(target).items():
+                if not name.startswith('_') and asyncio.iscoroutinefunction(member): COSTS[(target.__name__, name)] = getattr(member, '__cost__', lane)
+        else:
+            # remember the command's own lane for the class decorator, which runs after it
+            setattr(target, '__cost__', lane)
+            # a method's qualified name is Component.command
+            component, _, name = getattr(target, '__qualname__').rpartition('.')
+            COSTS[(component.rpartition('.')[2], name)] = lane
+        return target
+    return decorator
+
+
+def declare(component: str, name: str, lane: str) -> None:
+    """
+    Declares the lane of a component's command by name, for commands whose module hasn't been imported.
+    """
+    if lane in LANES: COSTS[(component, name)] = lane
+
+
+def forget(component: str) -> None:
+    """
+    Removes the lanes declared for a component's commands, before it is declared again or removed.
+    """
+    for key in [key for key in COSTS if key[0] == component]: del COSTS[key]
+
+
+def lane_of(command: Tuple[str, str]) -> str:
+    """
+    Returns the lane the (component, command) runs in.
+    """
+    return COSTS.get(command, LIGHT)
+
+
+class Job():
+    """
+    A queued command.
+    """
+
+    def __init__(self, guild_id: int, factory: Callable[[], Awaitable[Any]], future: Future) -> None:
+        self.guild_id: int = guild_id
+        self.factory: Callable[[], Awaitable[Any]] = factory
+        self.future: Future = future
+        self.queued: float = time.perf_counter()
+
+
+class Lane():
+    """
+    A pool of workers running queued commands, fairly across guilds.
+    """
+
+    def __init__(self, name: str, *, workers: int, capacity: int, concurrency: int) -> None:
+        # set the lane name
+        self._name: str = name
+        # set the number of workers
+        self._workers: int = workers
+        # set the maximum number of queued commands
+        self._capacity: int = capacity
+        # set the maximum number of commands each guild may run at once
+        self._concurrency: int = concurrency
+        # create the per-guild queues
+        self._queues: Dict[int, Deque[Job]] = dict()
+        # create the guild rotation, holding each guild with queued commands once
+        self._rotation: Deque[int] = deque()
+        # count the commands each guild is running
+        self._running: Dict[int, int] = dict()
+        # count the queued commands
+        self._depth: int = 0
+        self._condition: Optional[Condition] = None
+        self._tasks: List[Task] = list()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of queued commands.
+        """
+        return self._depth
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def running(self) -> int:
+        """
+        The number of running commands.
+        """
+        return sum(self._running.values())
+
+    def start(self) -> None:
+        """
+        Starts the lane's workers on the running loop.
+        """
+        if self._tasks: return
+        self._condition = Condition()
+        self._tasks = [asyncio.create_task(self.__work__(), name=f'{self._name}-{index}') for index in range(self._workers)]
+
+    def stop(self) -> None:
+        for task in self._tasks: task.cancel()
+        self._tasks.clear()
+
+    async def submit(self, guild_id: int, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Queues the command and waits for its result.
+        Raises a LaneFullError if the lane's queue is full.
+        """
+        if not self._condition: self.start()
+        if self._depth >= self._capacity:
+            REJECTED.inc(lane=self._name)
+            raise LaneFullError(self._name)
+        job: Job = Job(guild_id, factory, asyncio.get_running_loop().create_future())
+        async with self._condition:
+            # add the guild to the rotation when it gets its first queued command
+            queue: Optional[Deque[Job]] = self._queues.get(guild_id)
+            if not queue:
+                queue = deque()
+                self._queues[guild_id] = queue
+                self._rotation.append(guild_id)
+            queue.append(job)
+            self._depth += 1
+            self._condition.notify()
+        return await job.future
+
+    def __take__(self) -> Optional[Job]:
+        """
+        Takes the next command from the first guild in the rotation that is under its concurrency cap.
+        """
+        for _ in range(len(self._rotation)):
+            guild_id: int = self._rotation[0]
+            self._rotation.rotate(-1)
+            if self._running.get(guild_id, 0) >= self._concurrency: continue
+            queue: Deque[Job] = self._queues[guild_id]
+            job: Job = queue.popleft()
+            # remove the guild from the rotation once its queue is empty
+            if not queue:
+                del self._queues[guild_id]
+                self._rotation.remove(guild_id)
+            self._depth -= 1
+            self._running[guild_id] = self._running.get(guild_id, 0) + 1
+            return job
+        return None
+
+    async def __work__(self) -> None:
+        """
+        A worker's loop.
+        """
+        while True:
+            async with self._condition:
+                job: Optional[Job] = self.__take__()
+                while job is None:
+                    await self._condition.wait()
+                    job = self.__take__()
+            QUEUE_WAIT.observe(time.perf_counter() - job.queued, lane=self._name)
+            try:
+                # skip commands whose caller stopped waiting
+                if not job.future.done(): job.future.set_result(await job.factory())
+            except asyncio.CancelledError:
+                if not job.future.done(): job.future.cancel()
+                raise
+            except Exception as error:
+                if not job.future.done(): job.future.set_exception(error)
+            finally:
+                async with self._condition:
+                    self._running[job.guild_id] -= 1
+                    if not self._running[job.guild_id]: del self._running[job.guild_id]
+                    # a guild under its cap again may have queued commands
+                    self._condition.notify_all()
+
+
+class Scheduler():
+    """
+    Routes commands to the lane they declared.
+    """
+
+    def __init__(self, lanes: Dict[str, Lane]) -> None:
+        self._lanes: Dict[str, Lane] = lanes
+
+    @property
+    def lanes(self) -> Dict[str, Lane]:
+        return self._lanes
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of commands queued across every lane.
+        """
+        return sum(lane.depth for lane in self._lanes.values())
+
+    def lane(self, command: Tuple[str, str]) -> Lane:
+        """
+        Returns the lane the (component, command) runs in.
+        """
+        return self._lanes[lane_of(command)]
+
+    async def submit(self, command: Tuple[str, str], guild_id: int, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs the command in its lane and returns its result.
+        """
+        return await self.lane(command).submit(guild_id, factory)
+
+    def stop(self) -> None:
+        for lane in self._lanes.values(): lane.stop()
+
+
+class SchedulerError(Exception):
+    def __init__(self, message: str, exception: Optional[Exception] = None):
+        self._message = message
+        self._inner_exception = exception
+
+    def __str__(self) -> str:
+        return self._message
+
+
+class LaneFullError(SchedulerError):
+    def __init__(self, lane: str, exception: Optional[Exception] = None):
+        self._lane: str = lane
+        message: str = f'Too many {lane} commands are queued; try again shortly.'
+        super().__init__(message, exception)
+
+    @property
+    def lane(self) -> str:
+        return self._lane
@@ -0,0 +1,57 @@
+import logging
+from logging import Logger
+from pathlib import Path
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class BlobSettings(SettingsSection):
+
+    @property
+    def enabled(self) -> bool:
+        key: str = "enabled"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value else False
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        key: str = "enabled"
+        self[key] = str(value)
+
+    @property
+    def directory(self) -> Optional[Path]:
+        key: str = "directory"
+        return self.get_path(key)
+    @directory.setter
+    def directory(self, reference: Path) -> None:
+        key: str = "directory"
+        self[key] = str(reference)
+
+    @property
+    def workers(self) -> Optional[int]:
+        key: str = "workers"
+        return self.get_integer(key)
+    @workers.setter
+    def workers(self, value: int) -> None:
+        key: str = "workers"
+        self[key] = str(value)
+
+    @property
+    def max_size(self) -> Optional[int]:
+        key: str = "max_size"
+        return self.get_integer(key)
+    @max_size.setter
+    def max_size(self, value: int) -> None:
+        key: str = "max_size"
+        self[key] = str(value)
+
+    @property
+    def quota(self) -> Optional[int]:
+        key: str = "quota"
+        return self.get_integer(key)
+    @quota.setter
+    def quota(self, value: int) -> None:
+        key: str = "quota"
+        self[key] = str(value)
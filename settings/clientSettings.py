@@ -4,8 +4,18 @@ from pathlib import Path
 from typing import cast
 
 from router.configuration import Configuration
+from settings.blobs import BlobSettings
 from settings.data import DataSettings
+from settings.executors import ExecutorSettings
+from settings.gateway import GatewaySettings
+from settings.logs import LoggingSettings
+from settings.metrics import MetricsSettings
+from settings.rest import RestSettings
+from settings.scheduler import SchedulerSettings
+from settings.sharding import ShardingSettings
+from settings.shedding import SheddingSettings
 from settings.token import TokenSettings
+from settings.watchdog import WatchdogSettings
 
 log: Logger = logging.getLogger(__name__)
 
@@ -15,6 +25,16 @@ class ClientSettings(Configuration):
         super().__init__(reference)
         self['TOKENS'] = TokenSettings('TOKENS', self._parser, self._reference)
         self['DATA'] = DataSettings('DATA', self._parser, self._reference)
+        self['BLOBS'] = BlobSettings('BLOBS', self._parser, self._reference)
+        self['LOGGING'] = LoggingSettings('LOGGING', self._parser, self._reference)
+        self['SHARDING'] = ShardingSettings('SHARDING', self._parser, self._reference)
+        self['EXECUTORS'] = ExecutorSettings('EXECUTORS', self._parser, self._reference)
+        self['WATCHDOG'] = WatchdogSettings('WATCHDOG', self._parser, self._reference)
+        self['METRICS'] = MetricsSettings('METRICS', self._parser, self._reference)
+        self['SCHEDULER'] = SchedulerSettings('SCHEDULER', self._parser, self._reference)
+        self['SHEDDING'] = SheddingSettings('SHEDDING', self._parser, self._reference)
+        self['GATEWAY'] = GatewaySettings('GATEWAY', self._parser, self._reference)
+        self['REST'] = RestSettings('REST', self._parser, self._reference)
 
     @property
     def data(self) -> DataSettings:
@@ -22,4 +42,44 @@ class ClientSettings(Configuration):
 
     @property
     def token(self) -> TokenSettings:
-        return cast(TokenSettings, self['TOKENS'])
\ No newline at end of file
+        return cast(TokenSettings, self['TOKENS'])
+
+    @property
+    def blobs(self) -> BlobSettings:
+        return cast(BlobSettings, self['BLOBS'])
+
+    @property
+    def logging(self) -> LoggingSettings:
+        return cast(LoggingSettings, self['LOGGING'])
+
+    @property
+    def sharding(self) -> ShardingSettings:
+        return cast(ShardingSettings, self['SHARDING'])
+
+    @property
+    def executors(self) -> ExecutorSettings:
+        return cast(ExecutorSettings, self['EXECUTORS'])
+
+    @property
+    def watchdog(self) -> WatchdogSettings:
+        return cast(WatchdogSettings, self['WATCHDOG'])
+
+    @property
+    def metrics(self) -> MetricsSettings:
+        return cast(MetricsSettings, self['METRICS'])
+
+    @property
+    def scheduler(self) -> SchedulerSettings:
+        return cast(SchedulerSettings, self['SCHEDULER'])
+
+    @property
+    def shedding(self) -> SheddingSettings:
+        return cast(SheddingSettings, self['SHEDDING'])
+
+    @property
+    def gateway(self) -> GatewaySettings:
+        return cast(GatewaySettings, self['GATEWAY'])
+
+    @property
+    def rest(self) -> RestSettings:
+        return cast(RestSettings, self['REST'])
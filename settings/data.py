@@ -26,4 +26,43 @@ class DataSettings(SettingsSection):
     @owner.setter
     def owner(self, value: int) -> None:
         key: str = "owner"
-        self[key] = str(value)
\ No newline at end of file
+        self[key] = str(value)
+
+    @property
+    def loader(self) -> str:
+        """
+        How components are loaded: 'router', 'eager' or 'lazy'.
+        """
+        key: str = "loader"
+        value: Optional[str] = self.get_string(key)
+        return value.lower() if value else 'router'
+    @loader.setter
+    def loader(self, value: str) -> None:
+        key: str = "loader"
+        self[key] = value
+
+    @property
+    def hot_reload(self) -> bool:
+        """
+        Whether changed component modules are reloaded without restarting. Requires the eager or lazy loader.
+        """
+        key: str = "hot_reload"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value is not None else False
+    @hot_reload.setter
+    def hot_reload(self, value: bool) -> None:
+        key: str = "hot_reload"
+        self[key] = str(value)
+
+    @property
+    def reload_interval(self) -> float:
+        """
+        The number of seconds between checks for changed component modules.
+        """
+        key: str = "reload_interval"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 1.0
+    @reload_interval.setter
+    def reload_interval(self, value: float) -> None:
+        key: str = "reload_interval"
+        self[key] = str(value)
@@ -0,0 +1,64 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class ExecutorSettings(SettingsSection):
+
+    @property
+    def io_workers(self) -> Optional[int]:
+        key: str = "io_workers"
+        return self.get_integer(key)
+    @io_workers.setter
+    def io_workers(self, value: int) -> None:
+        key: str = "io_workers"
+        self[key] = str(value)
+
+    @property
+    def cpu_workers(self) -> Optional[int]:
+        key: str = "cpu_workers"
+        return self.get_integer(key)
+    @cpu_workers.setter
+    def cpu_workers(self, value: int) -> None:
+        key: str = "cpu_workers"
+        self[key] = str(value)
+
+    @property
+    def process_workers(self) -> Optional[int]:
+        key: str = "process_workers"
+        return self.get_integer(key)
+    @process_workers.setter
+    def process_workers(self, value: int) -> None:
+        key: str = "process_workers"
+        self[key] = str(value)
+
+    @property
+    def io_limit(self) -> Optional[int]:
+        key: str = "io_limit"
+        return self.get_integer(key)
+    @io_limit.setter
+    def io_limit(self, value: int) -> None:
+        key: str = "io_limit"
+        self[key] = str(value)
+
+    @property
+    def cpu_limit(self) -> Optional[int]:
+        key: str = "cpu_limit"
+        return self.get_integer(key)
+    @cpu_limit.setter
+    def cpu_limit(self, value: int) -> None:
+        key: str = "cpu_limit"
+        self[key] = str(value)
+
+    @property
+    def process_limit(self) -> Optional[int]:
+        key: str = "process_limit"
+        return self.get_integer(key)
+    @process_limit.setter
+    def process_limit(self, value: int) -> None:
+        key: str = "process_limit"
+        self[key] = str(value)
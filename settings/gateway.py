@@ -0,0 +1,62 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class GatewaySettings(SettingsSection):
+
+    @property
+    def intents(self) -> str:
+        """
+        The gateway intents, as a preset and/or intent names; e.g. 'default, -typing'.
+        """
+        key: str = "intents"
+        value: Optional[str] = self.get_string(key)
+        return value if value else 'default'
+    @intents.setter
+    def intents(self, value: str) -> None:
+        key: str = "intents"
+        self[key] = value
+
+    @property
+    def member_cache(self) -> str:
+        """
+        Which members are cached: 'auto', 'none', 'all', or member cache flag names.
+        """
+        key: str = "member_cache"
+        value: Optional[str] = self.get_string(key)
+        return value if value else 'auto'
+    @member_cache.setter
+    def member_cache(self, value: str) -> None:
+        key: str = "member_cache"
+        self[key] = value
+
+    @property
+    def chunk_guilds(self) -> bool:
+        """
+        Whether every guild's member list is requested at startup. Requires the members intent.
+        """
+        key: str = "chunk_guilds"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value is not None else False
+    @chunk_guilds.setter
+    def chunk_guilds(self, value: bool) -> None:
+        key: str = "chunk_guilds"
+        self[key] = str(value)
+
+    @property
+    def max_messages(self) -> int:
+        """
+        The number of received messages kept in memory; 0 disables the message cache.
+        """
+        key: str = "max_messages"
+        value: Optional[int] = self.get_integer(key)
+        return value if value is not None else 1000
+    @max_messages.setter
+    def max_messages(self, value: int) -> None:
+        key: str = "max_messages"
+        self[key] = str(value)
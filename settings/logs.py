@@ -0,0 +1,85 @@
+import logging
+from logging import Logger
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class LoggingSettings(SettingsSection):
+
+    @property
+    def level(self) -> str:
+        key: str = "level"
+        value: Optional[str] = self.get_string(key)
+        return value.upper() if value else 'DEBUG'
+    @level.setter
+    def level(self, value: str) -> None:
+        key: str = "level"
+        self[key] = value
+
+    @property
+    def console(self) -> str:
+        key: str = "console"
+        value: Optional[str] = self.get_string(key)
+        return value.upper() if value else 'INFO'
+    @console.setter
+    def console(self, value: str) -> None:
+        key: str = "console"
+        self[key] = value
+
+    @property
+    def file(self) -> Path:
+        key: str = "file"
+        value: Optional[str] = self.get_string(key)
+        return Path(value) if value else Path('./.log')
+    @file.setter
+    def file(self, reference: Path) -> None:
+        key: str = "file"
+        self[key] = str(reference)
+
+    @property
+    def json(self) -> bool:
+        key: str = "json"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value else False
+    @json.setter
+    def json(self, value: bool) -> None:
+        key: str = "json"
+        self[key] = str(value)
+
+    @property
+    def levels(self) -> Dict[str, str]:
+        """
+        Per-logger levels, configured as a comma separated list of logger=LEVEL pairs.
+        """
+        key: str = "levels"
+        value: Optional[str] = self.get_string(key)
+        return {name: level.upper() for name, level in self.__pairs__(value if value else 'discord=WARNING, router=INFO')}
+    @levels.setter
+    def levels(self, value: Dict[str, str]) -> None:
+        key: str = "levels"
+        self[key] = ', '.join(f'{name}={level}' for name, level in value.items())
+
+    @property
+    def limits(self) -> Dict[str, float]:
+        """
+        Per-logger limits on DEBUG and INFO records per second,
+        configured as a comma separated list of logger=rate pairs.
+        """
+        key: str = "limits"
+        value: Optional[str] = self.get_string(key)
+        return {name: float(rate) for name, rate in self.__pairs__(value if value else 'providers.channelArchive=10')}
+    @limits.setter
+    def limits(self, value: Dict[str, float]) -> None:
+        key: str = "limits"
+        self[key] = ', '.join(f'{name}={rate}' for name, rate in value.items())
+
+
+    def __pairs__(self, value: str) -> Iterator[Tuple[str, str]]:
+        for pair in value.split(','):
+            if '=' not in pair: continue
+            name, setting = pair.split('=', 1)
+            yield name.strip(), setting.strip()
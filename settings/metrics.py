@@ -0,0 +1,43 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class MetricsSettings(SettingsSection):
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the metrics are served over HTTP.
+        """
+        key: str = "enabled"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value else False
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        key: str = "enabled"
+        self[key] = str(value)
+
+    @property
+    def host(self) -> str:
+        key: str = "host"
+        value: Optional[str] = self.get_string(key)
+        return value if value else '127.0.0.1'
+    @host.setter
+    def host(self, value: str) -> None:
+        key: str = "host"
+        self[key] = value
+
+    @property
+    def port(self) -> int:
+        key: str = "port"
+        value: Optional[int] = self.get_integer(key)
+        return value if value else 9464
+    @port.setter
+    def port(self, value: int) -> None:
+        key: str = "port"
+        self[key] = str(value)
@@ -0,0 +1,46 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class RestSettings(SettingsSection):
+
+    @property
+    def enabled(self) -> bool:
+        key: str = "enabled"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value else False
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        key: str = "enabled"
+        self[key] = str(value)
+
+    @property
+    def reserve(self) -> float:
+        """
+        The share of each rate limit kept free for interactive calls, between 0 and 0.9.
+        """
+        key: str = "reserve"
+        value: Optional[float] = self.get_float(key)
+        return value if value is not None else 0.4
+    @reserve.setter
+    def reserve(self, value: float) -> None:
+        key: str = "reserve"
+        self[key] = str(value)
+
+    @property
+    def rate(self) -> int:
+        """
+        The number of REST calls allowed per second across every route.
+        """
+        key: str = "rate"
+        value: Optional[int] = self.get_integer(key)
+        return value if value else 50
+    @rate.setter
+    def rate(self, value: int) -> None:
+        key: str = "rate"
+        self[key] = str(value)
@@ -0,0 +1,91 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class SchedulerSettings(SettingsSection):
+
+    @property
+    def light_workers(self) -> Optional[int]:
+        key: str = "light_workers"
+        return self.get_integer(key)
+    @light_workers.setter
+    def light_workers(self, value: int) -> None:
+        key: str = "light_workers"
+        self[key] = str(value)
+
+    @property
+    def light_queue(self) -> Optional[int]:
+        key: str = "light_queue"
+        return self.get_integer(key)
+    @light_queue.setter
+    def light_queue(self, value: int) -> None:
+        key: str = "light_queue"
+        self[key] = str(value)
+
+    @property
+    def light_concurrency(self) -> Optional[int]:
+        key: str = "light_concurrency"
+        return self.get_integer(key)
+    @light_concurrency.setter
+    def light_concurrency(self, value: int) -> None:
+        key: str = "light_concurrency"
+        self[key] = str(value)
+
+    @property
+    def heavy_workers(self) -> Optional[int]:
+        key: str = "heavy_workers"
+        return self.get_integer(key)
+    @heavy_workers.setter
+    def heavy_workers(self, value: int) -> None:
+        key: str = "heavy_workers"
+        self[key] = str(value)
+
+    @property
+    def heavy_queue(self) -> Optional[int]:
+        key: str = "heavy_queue"
+        return self.get_integer(key)
+    @heavy_queue.setter
+    def heavy_queue(self, value: int) -> None:
+        key: str = "heavy_queue"
+        self[key] = str(value)
+
+    @property
+    def heavy_concurrency(self) -> Optional[int]:
+        key: str = "heavy_concurrency"
+        return self.get_integer(key)
+    @heavy_concurrency.setter
+    def heavy_concurrency(self, value: int) -> None:
+        key: str = "heavy_concurrency"
+        self[key] = str(value)
+
+    @property
+    def external_workers(self) -> Optional[int]:
+        key: str = "external_workers"
+        return self.get_integer(key)
+    @external_workers.setter
+    def external_workers(self, value: int) -> None:
+        key: str = "external_workers"
+        self[key] = str(value)
+
+    @property
+    def external_queue(self) -> Optional[int]:
+        key: str = "external_queue"
+        return self.get_integer(key)
+    @external_queue.setter
+    def external_queue(self, value: int) -> None:
+        key: str = "external_queue"
+        self[key] = str(value)
+
+    @property
+    def external_concurrency(self) -> Optional[int]:
+        key: str = "external_concurrency"
+        return self.get_integer(key)
+    @external_concurrency.setter
+    def external_concurrency(self, value: int) -> None:
+        key: str = "external_concurrency"
+        self[key] = str(value)
@@ -1,9 +1,10 @@
 import logging
 from logging import Logger
 from pathlib import Path
-from typing import cast
+from typing import Dict, cast
 from discord import Guild
 
+import metrics
 from router.configuration import Configuration
 from settings.clientSettings import ClientSettings
 from settings.guildSettings import GuildSettings
@@ -12,18 +13,33 @@ log: Logger = logging.getLogger(__name__)
 
 class Settings():
 
-    def __init__(self, directory: Path = Path('./config/')) -> None:
+    def __init__(self, directory: Path = Path('./config/'), *, name: str = 'global.ini') -> None:
         # resolve the provided directory
         self._directory: Path = directory.resolve()
         # if the provided directory doesn't exist
         if not self._directory.exists(): self._directory.mkdir(parents=True, exist_ok=True)
 
         # initialize client settings
-        self._client_settings: ClientSettings = ClientSettings(self._directory.joinpath('global.ini'))
+        self._client_settings: ClientSettings = ClientSettings(self._directory.joinpath(name))
+        # create the guild settings cache, keyed by guild ID
+        self._guild_settings: Dict[int, GuildSettings] = dict()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
 
     @property
     def client(self) -> ClientSettings:
         return self._client_settings
 
     def for_guild(self, guild: Guild) -> GuildSettings:
-        return GuildSettings(self._directory, guild)
\ No newline at end of file
+        # load each guild's settings file once; changes are written through the cached instance
+        try:
+            settings: GuildSettings = self._guild_settings[guild.id]
+            metrics.cache_hit('guild_settings')
+            return settings
+        except KeyError:
+            metrics.cache_miss('guild_settings')
+            settings: GuildSettings = GuildSettings(self._directory, guild)
+            self._guild_settings[guild.id] = settings
+            return settings
\ No newline at end of file
@@ -0,0 +1,61 @@
+import logging
+from logging import Logger
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class ShardingSettings(SettingsSection):
+
+    @property
+    def count(self) -> Optional[int]:
+        """
+        The total number of gateway shards. Sharding is disabled if unset.
+        """
+        key: str = "count"
+        return self.get_integer(key)
+    @count.setter
+    def count(self, value: int) -> None:
+        key: str = "count"
+        self[key] = str(value)
+
+    @property
+    def processes(self) -> int:
+        """
+        The number of processes the shards are spread across.
+        """
+        key: str = "processes"
+        value: Optional[int] = self.get_integer(key)
+        return value if value else 1
+    @processes.setter
+    def processes(self, value: int) -> None:
+        key: str = "processes"
+        self[key] = str(value)
+
+    @property
+    def restart_delay(self) -> float:
+        """
+        The number of seconds to wait before restarting a crashed shard process, doubled for each consecutive crash.
+        """
+        key: str = "restart_delay"
+        value: Optional[float] = self.get_float(key)
+        return value if value is not None else 5.0
+    @restart_delay.setter
+    def restart_delay(self, value: float) -> None:
+        key: str = "restart_delay"
+        self[key] = str(value)
+
+    @property
+    def max_restart_delay(self) -> float:
+        """
+        The longest wait before restarting a crashed shard process.
+        """
+        key: str = "max_restart_delay"
+        value: Optional[float] = self.get_float(key)
+        return value if value is not None else 300.0
+    @max_restart_delay.setter
+    def max_restart_delay(self, value: float) -> None:
+        key: str = "max_restart_delay"
+        self[key] = str(value)
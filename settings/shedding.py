@@ -0,0 +1,111 @@
+import logging
+from logging import Logger
+from typing import List, Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class SheddingSettings(SettingsSection):
+
+    @property
+    def enabled(self) -> bool:
+        key: str = "enabled"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value else False
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        key: str = "enabled"
+        self[key] = str(value)
+
+    @property
+    def lag(self) -> float:
+        """
+        The event loop lag, in seconds, above which commands are shed.
+        """
+        key: str = "lag"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 0.5
+    @lag.setter
+    def lag(self, value: float) -> None:
+        key: str = "lag"
+        self[key] = str(value)
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of queued commands above which commands are shed.
+        """
+        key: str = "depth"
+        value: Optional[int] = self.get_integer(key)
+        return value if value else 64
+    @depth.setter
+    def depth(self, value: int) -> None:
+        key: str = "depth"
+        self[key] = str(value)
+
+    @property
+    def recovery(self) -> float:
+        """
+        The fraction of each threshold the lag and depth must fall below before shedding stops.
+        """
+        key: str = "recovery"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 0.5
+    @recovery.setter
+    def recovery(self, value: float) -> None:
+        key: str = "recovery"
+        self[key] = str(value)
+
+    @property
+    def hold(self) -> float:
+        """
+        The number of seconds the lag and depth must stay low before shedding stops.
+        """
+        key: str = "hold"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 10.0
+    @hold.setter
+    def hold(self, value: float) -> None:
+        key: str = "hold"
+        self[key] = str(value)
+
+    @property
+    def lanes(self) -> List[str]:
+        """
+        The scheduler lanes whose commands are shed.
+        """
+        key: str = "lanes"
+        value: Optional[str] = self.get_string(key)
+        return [lane.strip().lower() for lane in value.split(',') if lane.strip()] if value else ['heavy']
+    @lanes.setter
+    def lanes(self, value: List[str]) -> None:
+        key: str = "lanes"
+        self[key] = ', '.join(value)
+
+    @property
+    def action(self) -> str:
+        """
+        Whether shed commands are refused, or deferred until the bot recovers.
+        """
+        key: str = "action"
+        value: Optional[str] = self.get_string(key)
+        return value.lower() if value else 'refuse'
+    @action.setter
+    def action(self, value: str) -> None:
+        key: str = "action"
+        self[key] = value
+
+    @property
+    def defer_timeout(self) -> float:
+        """
+        The number of seconds a deferred command waits for recovery before it is refused.
+        """
+        key: str = "defer_timeout"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 15.0
+    @defer_timeout.setter
+    def defer_timeout(self, value: float) -> None:
+        key: str = "defer_timeout"
+        self[key] = str(value)
@@ -28,3 +28,16 @@ class UXSettings(SettingsSection):
     def verbose(self, value: bool) -> None:
         key: str = "verbose"
         self[key] = str(value)
+
+    @property
+    def typing_delay(self) -> float:
+        """
+        The number of seconds a command may run before a typing indicator is shown.
+        """
+        key: str = "typing_delay"
+        value: Optional[float] = self.get_float(key)
+        return value if value is not None else 1.0
+    @typing_delay.setter
+    def typing_delay(self, value: float) -> None:
+        key: str = "typing_delay"
+        self[key] = str(value)
@@ -0,0 +1,57 @@
+import logging
+from logging import Logger
+from pathlib import Path
+from typing import Optional
+
+from settings.section import SettingsSection
+
+log: Logger = logging.getLogger(__name__)
+
+
+class WatchdogSettings(SettingsSection):
+
+    @property
+    def enabled(self) -> bool:
+        key: str = "enabled"
+        value: Optional[bool] = self.get_boolean(key)
+        return value if value else False
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        key: str = "enabled"
+        self[key] = str(value)
+
+    @property
+    def interval(self) -> float:
+        """
+        The number of seconds between heartbeats.
+        """
+        key: str = "interval"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 0.25
+    @interval.setter
+    def interval(self, value: float) -> None:
+        key: str = "interval"
+        self[key] = str(value)
+
+    @property
+    def threshold(self) -> float:
+        """
+        The loop lag, in seconds, after which a stall is recorded.
+        """
+        key: str = "threshold"
+        value: Optional[float] = self.get_float(key)
+        return value if value else 1.0
+    @threshold.setter
+    def threshold(self, value: float) -> None:
+        key: str = "threshold"
+        self[key] = str(value)
+
+    @property
+    def file(self) -> Path:
+        key: str = "file"
+        value: Optional[str] = self.get_string(key)
+        return Path(value) if value else Path('./stalls.log')
+    @file.setter
+    def file(self, reference: Path) -> None:
+        key: str = "file"
+        self[key] = str(reference)
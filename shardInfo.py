@@ -0,0 +1,52 @@
+from pathlib import Path
+from typing import List
+
+
+class ShardInfo():
+    """
+    Describes the shards owned by one process.
+    """
+
+    def __init__(self, index: int, processes: int, shard_ids: List[int], shard_count: int) -> None:
+        self._index: int = index
+        self._processes: int = processes
+        self._shard_ids: List[int] = shard_ids
+        self._shard_count: int = shard_count
+
+    @property
+    def index(self) -> int:
+        """
+        The index of the process owning the shards.
+        """
+        return self._index
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return self._shard_ids
+
+    @property
+    def shard_count(self) -> int:
+        return self._shard_count
+
+    def scope(self, path: Path) -> Path:
+        """
+        Returns the process's copy of a client-wide file.
+        Paths are unchanged when a single process owns every shard.
+        """
+        if self._processes <= 1: return path
+        return path.with_name(f'{path.stem}.{self._index}{path.suffix}')
+
+    @classmethod
+    def partition(cls, shard_count: int, processes: int) -> List['ShardInfo']:
+        """
+        Splits the shards into contiguous, evenly sized ranges, one per process.
+        """
+        processes = max(1, min(processes, shard_count))
+        return [cls(index, processes, [shard for shard in range(shard_count) if shard * processes // shard_count == index], shard_count) for index in range(processes)]
+
+    def __str__(self) -> str:
+        return f'process {self._index} (shards {self._shard_ids[0]}-{self._shard_ids[-1]} of {self._shard_count})'
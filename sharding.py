@@ -0,0 +1,168 @@
+"""
+Runs the bot as several processes, each owning a contiguous range of gateway shards.
+
+Guild-scoped files (channel archives, guild settings, models, channel logs) are already
+disjoint between processes, since every guild belongs to exactly one shard. Client-wide
+files are scoped per process by ShardInfo.scope, so no two processes write the same file:
+    - config/global.ini is copied to config/global.<index>.ini on every launch;
+      edit global.ini, since the per-process copies are overwritten
+    - archive/audio.db, archive/openai.db and the blob index become <name>.<index>.db
+    - the log file becomes <name>.<index>.<suffix>
+Client-wide databases are therefore partitioned by shard; changing the shard or process
+count moves guilds between partitions.
+"""
+
+import logging
+import multiprocessing
+import shutil
+import sys
+import time
+from logging import Logger
+from logging.handlers import QueueListener
+from multiprocessing.context import SpawnContext, SpawnProcess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from discord import AutoShardedClient
+
+import loggingPipeline
+from core import Core
+from settings import Settings
+from shardInfo import ShardInfo
+
+log: Logger = logging.getLogger(__name__)
+
+
+class ShardedCore(Core, AutoShardedClient):
+    """
+    A Core that connects a range of gateway shards.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, *, shard: ShardInfo) -> None:
+        super().__init__(settings, shard=shard, shard_ids=shard.shard_ids, shard_count=shard.shard_count)
+
+
+def launch(shard: ShardInfo, directory: Path) -> None:
+    """
+    The entry point of a shard process.
+    Exits with a non-zero code if the client stopped because of an error.
+    """
+    # load the process's copy of the client settings
+    settings: Settings = Settings(directory, name=shard.scope(Path('global.ini')).name)
+    # write to the process's own log file
+    listener: QueueListener = loggingPipeline.configure(settings.client.logging, file=shard.scope(settings.client.logging.file))
+    code: int = 0
+
+    client: ShardedCore = ShardedCore(settings, shard=shard)
+    try:
+        log.info('Starting %s', shard)
+        token: Optional[str] = client._settings.client.token.current
+        if not token: raise ValueError('No token was found in the configuration!')
+        client.loop.run_until_complete(client.start(token))
+    except KeyboardInterrupt:
+        client.loop.run_until_complete(client.close())
+    except Exception as error:
+        log.error(error)
+        client.loop.run_until_complete(client.close())
+        code = 1
+    finally:
+        client.loop.close()
+        listener.stop()
+    sys.exit(code)
+
+
+class ShardSupervisor():
+    """
+    Starts a process per shard range and restarts processes that crash,
+    backing off exponentially while a process keeps crashing.
+    """
+
+    def __init__(self, directory: Path, *, shard_count: int, processes: int, delay: float = 5.0, max_delay: float = 300.0, stable: float = 600.0) -> None:
+        # set the settings directory
+        self._directory: Path = directory.resolve()
+        # partition the shards between the processes
+        self._shards: List[ShardInfo] = ShardInfo.partition(shard_count, processes)
+        # set the initial restart delay
+        self._delay: float = delay
+        # set the maximum restart delay
+        self._max_delay: float = max_delay
+        # set the uptime after which a process is no longer considered crashing
+        self._stable: float = stable
+        # spawn fresh interpreters rather than forking a process with running threads
+        self._context: SpawnContext = multiprocessing.get_context('spawn')
+        # create the process table, keyed by process index
+        self._processes: Dict[int, SpawnProcess] = dict()
+        # record when each process was started
+        self._started: Dict[int, float] = dict()
+        # count each process's consecutive crashes
+        self._failures: Dict[int, int] = dict()
+        # record when each crashed process may be restarted
+        self._pending: Dict[int, float] = dict()
+
+    def run(self) -> None:
+        """
+        Runs the shard processes until every process has exited cleanly or the supervisor is interrupted.
+        """
+        for shard in self._shards: self.__start__(shard)
+        try:
+            while self._processes or self._pending:
+                self.__poll__()
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            log.info('Stopping shard processes')
+        finally:
+            self.__stop__()
+
+    def __start__(self, shard: ShardInfo) -> None:
+        """
+        Seeds the process's settings and starts it.
+        """
+        # copy the client settings so each process writes its own file
+        source: Path = self._directory.joinpath('global.ini')
+        destination: Path = self._directory.joinpath(shard.scope(Path('global.ini')).name)
+        if source.exists() and source != destination: shutil.copyfile(source, destination)
+        # start the process
+        process: SpawnProcess = self._context.Process(target=launch, args=(shard, self._directory), name=f'Shard-{shard.index}')
+        process.start()
+        self._processes[shard.index] = process
+        self._started[shard.index] = time.monotonic()
+        log.info('Started %s as pid %s', shard, process.pid)
+
+    def __poll__(self) -> None:
+        """
+        Collects exited processes and restarts crashed processes whose delay has elapsed.
+        """
+        now: float = time.monotonic()
+        for index, process in list(self._processes.items()):
+            if process.is_alive(): continue
+            del self._processes[index]
+            # a clean exit means the process was asked to stop
+            if process.exitcode == 0:
+                log.info('Process %s exited', index)
+                continue
+            # reset the backoff if the process had been running for a while
+            if now - self._started[index] >= self._stable: self._failures[index] = 0
+            failures: int = self._failures.get(index, 0)
+            delay: float = min(self._max_delay, self._delay * (2 ** failures))
+            self._failures[index] = failures + 1
+            self._pending[index] = now + delay
+            log.warning('Process %s exited with code %s; restarting in %.0fs', index, process.exitcode, delay)
+
+        for index, restart in list(self._pending.items()):
+            if restart > now: continue
+            del self._pending[index]
+            self.__start__(self._shards[index])
+
+    def __stop__(self, timeout: float = 30.0) -> None:
+        """
+        Waits for the processes to close, terminating any that do not.
+        """
+        self._pending.clear()
+        deadline: float = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                log.warning('Terminating %s', process.name)
+                process.terminate()
+                process.join()
+        self._processes.clear()
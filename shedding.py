@@ -0,0 +1,152 @@
+"""
+Refuses or defers expensive commands while the bot is overloaded.
+
+The shedder samples event loop lag and the number of queued commands. Shedding starts when
+either exceeds its threshold, and stops once both have stayed below the recovery fraction of
+their thresholds for the hold period. While shedding, commands in the shed lanes are refused
+with a short reply, or deferred until recovery; messages are still archived and the
+remaining lanes are served as usual.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from asyncio import Event, Task
+from logging import Logger
+from typing import Callable, Literal, Optional, Sequence, Tuple
+
+import metrics
+from metrics import Counter
+
+log: Logger = logging.getLogger(__name__)
+
+ACTIONS: Tuple[str, ...] = ('refuse', 'defer')
+"""How shed commands are handled"""
+
+SHED: Counter = metrics.counter('commands_shed_total', 'Commands refused because the bot was overloaded', ('lane', ))
+
+
+class LoadShedder():
+    """
+    Decides whether commands are admitted, from the event loop lag and command queue depth.
+    """
+
+    def __init__(self, lag: Callable[[], float], depth: Callable[[], int], *, lag_threshold: float = 0.5, depth_threshold: int = 64, recovery: float = 0.5, hold: float = 10.0, lanes: Sequence[str] = ('heavy', ), action: Literal['refuse', 'defer'] = 'refuse', defer_timeout: float = 15.0, interval: float = 0.5) -> None:
+        if action not in ACTIONS: raise ValueError(f"Unknown action '{action}'; expected one of {', '.join(ACTIONS)}")
+        # set the signal sources
+        self._lag: Callable[[], float] = lag
+        self._depth: Callable[[], int] = depth
+        # set the thresholds that start shedding
+        self._lag_threshold: float = lag_threshold
+        self._depth_threshold: int = depth_threshold
+        # set the fraction of each threshold the signals must fall below to recover
+        self._recovery: float = recovery
+        # set the number of seconds the signals must stay low before recovering
+        self._hold: float = hold
+        # set the lanes that are shed
+        self._lanes: Tuple[str, ...] = tuple(lanes)
+        self._action: str = action
+        self._defer_timeout: float = defer_timeout
+        self._interval: float = interval
+        # the time the signals were last over their recovery levels
+        self._last_overload: float = 0.0
+        self._shedding: bool = False
+        self._recovered: Optional[Event] = None
+        self._task: Optional[Task] = None
+
+    @property
+    def shedding(self) -> bool:
+        return self._shedding
+
+    @property
+    def lanes(self) -> Tuple[str, ...]:
+        return self._lanes
+
+    @property
+    def retry_after(self) -> int:
+        """
+        The estimated number of seconds until shedding stops.
+        """
+        remaining: float = self._hold - (time.monotonic() - self._last_overload)
+        return max(1, math.ceil(remaining))
+
+    def start(self) -> None:
+        """
+        Starts sampling on the running loop, so the shedder recovers even when no commands arrive.
+        """
+        if self._task: return
+        self._recovered = Event()
+        self._recovered.set()
+        self._task = asyncio.create_task(self.__run__(), name='load-shedder')
+
+    def stop(self) -> None:
+        if self._task: self._task.cancel()
+        self._task = None
+
+    def update(self) -> bool:
+        """
+        Samples the signals and updates the shedding state.
+        Returns whether the shedder is shedding.
+        """
+        lag: float = self._lag()
+        depth: int = self._depth()
+        now: float = time.monotonic()
+        # shedding starts when a signal crosses its threshold
+        if not self._shedding and (lag > self._lag_threshold or depth > self._depth_threshold):
+            self._shedding = True
+            self._last_overload = now
+            if self._recovered: self._recovered.clear()
+            log.warning('Shedding %s commands: loop lag %.3fs, %d commands queued', ', '.join(self._lanes), lag, depth)
+        # and stops once both signals have stayed below their recovery levels for the hold period
+        elif self._shedding:
+            if lag > self._lag_threshold * self._recovery or depth > self._depth_threshold * self._recovery:
+                self._last_overload = now
+            elif now - self._last_overload >= self._hold:
+                self._shedding = False
+                if self._recovered: self._recovered.set()
+                log.info('Stopped shedding commands: loop lag %.3fs, %d commands queued', lag, depth)
+        return self._shedding
+
+    async def admit(self, lane: str) -> None:
+        """
+        Returns if a command in the lane may run, waiting for recovery if shed commands are deferred.
+        Raises an OverloadedError if the command is refused.
+        """
+        if lane not in self._lanes or not self.update(): return
+        if self._action == 'defer' and self._recovered:
+            try:
+                await asyncio.wait_for(self._recovered.wait(), self._defer_timeout)
+                return
+            except asyncio.TimeoutError:
+                pass
+        SHED.inc(lane=lane)
+        raise OverloadedError(self.retry_after)
+
+    async def __run__(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                self.update()
+            except Exception as error:
+                log.error('Could not sample load: %s', error)
+
+
+class SheddingError(Exception):
+    def __init__(self, message: str, exception: Optional[Exception] = None):
+        self._message = message
+        self._inner_exception = exception
+
+    def __str__(self) -> str:
+        return self._message
+
+
+class OverloadedError(SheddingError):
+    def __init__(self, retry_after: int, exception: Optional[Exception] = None):
+        self._retry_after: int = retry_after
+        message: str = f'Busy, try again in {retry_after}s.'
+        super().__init__(message, exception)
+
+    @property
+    def retry_after(self) -> int:
+        return self._retry_after
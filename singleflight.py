@@ -0,0 +1,142 @@
+"""
+Coalesces identical concurrent work, so duplicates await the first execution instead of repeating it.
+
+Commands opt in with the coalesce decorator, naming the scope their result is shared in:
+
+    @coalesce(CHANNEL)
+    async def distribution(self, context: Context, *, containing: str = None): ...
+
+An invocation with the same command, normalized arguments and scope as one that is still
+queued or running waits for it, and sends nothing of its own; the first invocation's
+reply is visible to everyone in the scope. Components can also coalesce internal work,
+such as resolving a URL, with a SingleFlight of their own.
+"""
+
+import asyncio
+import logging
+import re
+from asyncio import Future
+from logging import Logger
+from re import Pattern
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+import metrics
+from metrics import Counter
+
+log: Logger = logging.getLogger(__name__)
+
+CHANNEL: str = 'channel'
+"""Duplicates in the same channel are coalesced"""
+GUILD: str = 'guild'
+"""Duplicates anywhere in the same guild are coalesced"""
+AUTHOR: str = 'author'
+"""Duplicates from the same author in the same channel are coalesced"""
+
+SCOPES: Tuple[str, ...] = (CHANNEL, GUILD, AUTHOR)
+
+COALESCED_COMMANDS: Dict[Tuple[str, str], str] = dict()
+"""The coalescing scope of each command, keyed by (component, command) name"""
+
+CALLS: Counter = metrics.counter('singleflight_calls_total', 'Executions started by single-flight groups', ('flight', ))
+COALESCED: Counter = metrics.counter('singleflight_coalesced_total', 'Calls that awaited an identical in-flight execution', ('flight', ))
+
+WHITESPACE_PATTERN: Pattern = re.compile(r'\s+')
+NICKNAME_MENTION_PATTERN: Pattern = re.compile(r'<@!(\d+)>')
+
+T = TypeVar('T')
+
+
+def coalesce(scope: str) -> Callable[[T], T]:
+    """
+    Declares that concurrent duplicates of a command share its first execution.
+    """
+    if scope not in SCOPES: raise ValueError(f"Unknown scope '{scope}'; expected one of {', '.join(SCOPES)}")
+    def decorator(function: T) -> T:
+        # a method's qualified name is Component.command
+        component, _, name = getattr(function, '__qualname__').rpartition('.')
+        COALESCED_COMMANDS[(component.rpartition('.')[2], name)] = scope
+        return function
+    return decorator
+
+
+def declare(component: str, name: str, scope: str) -> None:
+    """
+    Declares the coalescing scope of a component's command by name, for commands whose module hasn't been imported.
+    """
+    if scope in SCOPES: COALESCED_COMMANDS[(component, name)] = scope
+
+
+def forget(component: str) -> None:
+    """
+    Removes the scopes declared for a component's commands, before it is declared again or removed.
+    """
+    for key in [key for key in COALESCED_COMMANDS if key[0] == component]: del COALESCED_COMMANDS[key]
+
+
+def scope_of(command: Tuple[str, str]) -> Optional[str]:
+    """
+    Returns the (component, command)'s coalescing scope, or None if it isn't coalesced.
+    """
+    return COALESCED_COMMANDS.get(command)
+
+
+def normalize(text: str) -> str:
+    """
+    Normalizes command arguments, so trivially different spellings share a key.
+    """
+    # nickname and user mentions refer to the same user
+    text = NICKNAME_MENTION_PATTERN.sub(r'<@\1>', text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip().casefold()
+
+
+class SingleFlight():
+    """
+    A group of keyed executions, each shared by every concurrent caller with the same key.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name: str = name
+        self._calls: Dict[Hashable, Future] = dict()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]], *, label: Optional[str] = None) -> T:
+        """
+        Runs the factory, or awaits the execution already in flight for the key.
+        Callers share the first execution's result or exception. If the first caller is cancelled,
+        a waiting caller runs the work itself.
+        """
+        label = label if label else self._name
+        while True:
+            future: Optional[Future] = self._calls.get(key)
+            if future is None: break
+            COALESCED.inc(flight=label)
+            try:
+                # shield the shared execution from the cancellation of any one caller
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled(): raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        CALLS.inc(flight=label)
+        try:
+            result: T = await factory()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # mark the exception retrieved, since there may be no other caller
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
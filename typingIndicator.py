@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from asyncio import Task
+from logging import Logger
+from types import TracebackType
+from typing import Optional, Type
+
+from discord.abc import Messageable
+
+log: Logger = logging.getLogger(__name__)
+
+
+class DeferredTyping():
+    """
+    Shows a typing indicator only for commands that run longer than a delay,
+    and keeps it alive until the command finishes.
+    """
+
+    def __init__(self, *, interval: float = 8.0) -> None:
+        # set the time between typing requests; Discord shows the indicator for 10 seconds
+        self._interval: float = interval
+        # count the commands run under the indicator
+        self._commands: int = 0
+        # count the commands that outlived the delay and showed the indicator
+        self._triggered: int = 0
+        # count the typing requests sent
+        self._requests: int = 0
+
+    @property
+    def commands(self) -> int:
+        return self._commands
+
+    @property
+    def triggered(self) -> int:
+        return self._triggered
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    @property
+    def saved(self) -> int:
+        """
+        The number of typing requests avoided compared to triggering typing before every command.
+        """
+        return self._commands - self._triggered
+
+    def typing(self, channel: Messageable, delay: float) -> 'TypingContext':
+        """
+        Returns a context manager that starts typing in the channel if its body runs longer than the delay.
+        """
+        return TypingContext(self, channel, delay)
+
+    async def __run__(self, channel: Messageable, delay: float) -> None:
+        """
+        Waits for the delay, then keeps the typing indicator alive until cancelled.
+        """
+        await asyncio.sleep(delay)
+        self._triggered += 1
+        while True:
+            try:
+                self._requests += 1
+                await channel.trigger_typing()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                log.debug('Could not trigger typing: %s', error)
+            await asyncio.sleep(self._interval)
+
+
+class TypingContext():
+    """
+    The context manager returned by DeferredTyping.typing.
+    """
+
+    def __init__(self, indicator: DeferredTyping, channel: Messageable, delay: float) -> None:
+        self._indicator: DeferredTyping = indicator
+        self._channel: Messageable = channel
+        self._delay: float = delay
+        self._task: Optional[Task] = None
+
+    async def __aenter__(self) -> 'TypingContext':
+        self._indicator._commands += 1
+        self._task = asyncio.create_task(self._indicator.__run__(self._channel, self._delay))
+        return self
+
+    async def __aexit__(self, type: Optional[Type[BaseException]], value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        if self._task: self._task.cancel()
@@ -47,8 +47,12 @@ class Snowflake:
 
     @property
     def timestamp(self) -> int:
+        """
+        The snowflake's creation time, in milliseconds since the unix epoch.
+        """
+        # the timestamp is every bit above the worker, process and increment fields
         shift: int = 22
-        mask: int = 0x3FFFFFFFFC00000
+        mask: int = ~0 << shift
         offset: int = DISCORD_EPOCH
         return self.__calculate__(shift, mask, offset)
 
@@ -68,7 +72,7 @@ class Snowflake:
 
     @property
     def increment(self) -> int:
-        shift: int = 12
+        shift: int = 0
         mask: int = 0x000000000000FFF
         offset: int = 0
         return self.__calculate__(shift, mask, offset)